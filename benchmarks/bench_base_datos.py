@@ -0,0 +1,146 @@
+"""
+Mide las funciones de `conexion.database` que usan la interfaz y el dashboard
+sobre una base de datos sintética con muchos registros de asistencia. La base
+se crea en una carpeta temporal; la de `base_de_datos/` no se toca.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_base_datos [filas_asistencia]
+"""
+import contextlib
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from conexion import database
+
+FILAS_ASISTENCIA = 1_000_000
+N_EMPLEADOS = 500
+DIAS_HISTORIAL = 365
+REPETICIONES = 5
+
+@contextlib.contextmanager
+def base_de_datos_temporal(crear_tablas=True):
+    """
+    Redirige `conexion.database` a una base nueva en una carpeta temporal. Con
+    `crear_tablas=False` la base queda vacía (p. ej. para crear un esquema antiguo).
+    """
+    carpeta = tempfile.mkdtemp(prefix="bench_asistencia_")
+    anteriores = database.DB_FOLDER, database.DB_PATH
+    database.DB_FOLDER = carpeta
+    database.DB_PATH = os.path.join(carpeta, database.DB_NAME)
+    try:
+        if crear_tablas:
+            database.crear_tablas_iniciales()
+        yield database.DB_PATH
+    finally:
+        database.cerrar_conexiones()
+        database.DB_FOLDER, database.DB_PATH = anteriores
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+def poblar_empleados(ruta, n, rng, encodings=None, version=None):
+    """
+    Inserta `n` empleados con una foto ficticia. Si se dan `encodings` (n x 128)
+    también llena la caché de embeddings para la `version` del codificador.
+    Retorna la lista de códigos.
+    """
+    codigos = [f"{i:08d}" for i in range(n)]
+    filas, fotos, cache = [], [], []
+    for i, codigo in enumerate(codigos):
+        foto = rng.integers(0, 255, 2048, dtype=np.uint8).tobytes()
+        foto_hash = database.calcular_hash_foto(foto)
+        filas.append((codigo, f"Nombre{i}", f"Apellido{i}", foto_hash))
+        fotos.append((foto_hash, foto))
+        if encodings is not None:
+            cache.append((foto_hash, version, encodings[i].tobytes()))
+    conn = sqlite3.connect(ruta)
+    try:
+        conn.executemany("INSERT INTO fotos (hash, datos) VALUES (?, ?)", fotos)
+        conn.executemany("INSERT INTO empleados (codigo, nombre, apellidos, foto_hash) VALUES (?, ?, ?, ?)", filas)
+        conn.executemany("INSERT INTO embeddings_rostro (foto_hash, version, encoding) VALUES (?, ?, ?)", cache)
+        conn.commit()
+    finally:
+        conn.close()
+    return codigos
+
+def poblar_asistencia(ruta, codigos, filas, rng, dias=DIAS_HISTORIAL):
+    """
+    Inserta `filas` registros de asistencia repartidos en los últimos `dias`
+    días (incluido hoy, para que los contadores del dashboard tengan trabajo),
+    con el timestamp en UTC y la fecha local, como `registrar_asistencia`.
+    """
+    ahora = int(time.time())
+    segundos = rng.integers(0, dias * 86400, filas)
+    empleados = rng.integers(0, len(codigos), filas)
+    tipos = rng.integers(0, 2, filas)
+    cascos = rng.random(filas) > 0.05
+    chalecos = rng.random(filas) > 0.05
+
+    def generar():
+        for s, e, t, c, ch in zip(segundos.tolist(), empleados.tolist(), tipos.tolist(), cascos.tolist(), chalecos.tolist()):
+            instante = ahora - s
+            yield (
+                codigos[e],
+                time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(instante)),
+                time.strftime('%Y-%m-%d', time.localtime(instante)),
+                'entrada' if t == 0 else 'salida',
+                int(c),
+                int(ch),
+            )
+
+    conn = sqlite3.connect(ruta)
+    try:
+        conn.executemany(
+            "INSERT INTO asistencia (empleado_codigo, timestamp, fecha, tipo, casco, chaleco) VALUES (?, ?, ?, ?, ?, ?)",
+            generar()
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def medir(funcion, *args, repeticiones=REPETICIONES):
+    """Retorna {'mediana_ms', 'min_ms', 'max_ms'} de `repeticiones` llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': statistics.median(tiempos), 'min_ms': min(tiempos), 'max_ms': max(tiempos)}
+
+def ejecutar(filas=FILAS_ASISTENCIA, n_empleados=N_EMPLEADOS, repeticiones=REPETICIONES):
+    """Crea la base sintética, mide cada función y retorna un diccionario de resultados."""
+    rng = np.random.default_rng(0)
+    with base_de_datos_temporal() as ruta:
+        codigos = poblar_empleados(ruta, n_empleados, rng)
+        inicio = time.perf_counter()
+        poblar_asistencia(ruta, codigos, filas, rng)
+        segundos_poblado = time.perf_counter() - inicio
+
+        resultados = {
+            'filas_asistencia': filas,
+            'empleados': n_empleados,
+            'poblado_s': segundos_poblado,
+            'funciones': {
+                'registrar_asistencia': medir(database.registrar_asistencia, codigos[0], 'entrada', 1, 1, repeticiones=repeticiones * 10),
+                'obtener_reporte_asistencia': medir(database.obtener_reporte_asistencia, repeticiones=repeticiones),
+                'contar_total_empleados': medir(database.contar_total_empleados, repeticiones=repeticiones),
+                'contar_asistencias_hoy': medir(database.contar_asistencias_hoy, repeticiones=repeticiones),
+                'contar_incidentes_epp_hoy': medir(database.contar_incidentes_epp_hoy, repeticiones=repeticiones),
+                'obtener_asistencia_ultimos_7_dias': medir(database.obtener_asistencia_ultimos_7_dias, repeticiones=repeticiones),
+            },
+        }
+    return resultados
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else FILAS_ASISTENCIA
+    resultados = ejecutar(filas)
+    print(f"{resultados['filas_asistencia']} registros de asistencia, {resultados['empleados']} empleados (poblado en {resultados['poblado_s']:.1f} s)")
+    print(f"{'función':<36} {'mediana (ms)':>13} {'mín (ms)':>10} {'máx (ms)':>10}")
+    for nombre, tiempos in resultados['funciones'].items():
+        print(f"{nombre:<36} {tiempos['mediana_ms']:>13.2f} {tiempos['min_ms']:>10.2f} {tiempos['max_ms']:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Prueba de estrés de `conexion.database` con escritores y lectores concurrentes:
+varios hilos registran asistencias (como el modo kiosco) mientras otros leen
+los contadores y gráficos del dashboard. Reporta operaciones por segundo,
+latencias y errores, y al final comprueba que no se perdió ninguna escritura
+y que la base está íntegra. La base se crea en una carpeta temporal.
+
+Con `--modo anterior` la misma carga se ejecuta abriendo una conexión por
+consulta con el journal por defecto (rollback), para comparar.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_concurrencia_bd [--escritores 4] [--lectores 4] [--segundos 10] [--modo anterior]
+"""
+import argparse
+import sqlite3
+import threading
+import time
+import numpy as np
+from conexion import database
+from benchmarks.bench_base_datos import base_de_datos_temporal, poblar_empleados, poblar_asistencia
+
+ESCRITORES = 4
+LECTORES = 4
+DURACION_S = 10.0
+FILAS_PREVIAS = 100_000
+N_EMPLEADOS = 500
+
+# Consultas del dashboard tal como eran antes de la columna 'fecha'.
+CONSULTAS_DASHBOARD = (
+    "SELECT COUNT(codigo) FROM empleados",
+    """SELECT COUNT(DISTINCT empleado_codigo) FROM asistencia
+       WHERE DATE(timestamp) = DATE('now', 'localtime') AND tipo = 'entrada'""",
+    """SELECT strftime('%Y-%m-%d', timestamp) as dia, COUNT(DISTINCT empleado_codigo)
+       FROM asistencia WHERE DATE(timestamp) >= DATE('now', '-6 days', 'localtime') AND tipo = 'entrada'
+       GROUP BY dia ORDER BY dia ASC""",
+)
+
+def _registrar_anterior(codigo):
+    """registrar_asistencia como antes: una conexión nueva por llamada."""
+    conn = None
+    try:
+        conn = sqlite3.connect(database.DB_PATH)
+        conn.execute(
+            "INSERT INTO asistencia (empleado_codigo, tipo, casco, chaleco, fecha) VALUES (?, 'entrada', 1, 1, DATE('now', 'localtime'))",
+            (codigo,)
+        )
+        conn.commit()
+        return True
+    except sqlite3.Error as e:
+        print(f"Error al registrar asistencia: {e}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+def _leer_anterior():
+    conn = None
+    try:
+        conn = sqlite3.connect(database.DB_PATH)
+        for consulta in CONSULTAS_DASHBOARD:
+            conn.execute(consulta).fetchall()
+        return True
+    except sqlite3.Error as e:
+        print(f"Error al leer el dashboard: {e}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+def _leer_actual():
+    database.contar_total_empleados()
+    database.contar_asistencias_hoy()
+    database.obtener_asistencia_ultimos_7_dias()
+    return True
+
+def _trabajador(operacion, hasta, latencias, errores, indice):
+    while time.perf_counter() < hasta:
+        inicio = time.perf_counter()
+        ok = operacion()
+        latencias.append(time.perf_counter() - inicio)
+        if not ok:
+            errores[indice] += 1
+
+def _resumen(latencias, errores, segundos):
+    tiempos = np.array(latencias) * 1000 if latencias else np.zeros(1)
+    return {
+        'operaciones': len(latencias),
+        'por_segundo': len(latencias) / segundos,
+        'p50_ms': float(np.percentile(tiempos, 50)),
+        'p95_ms': float(np.percentile(tiempos, 95)),
+        'max_ms': float(tiempos.max()),
+        'errores': errores,
+    }
+
+def ejecutar(escritores=ESCRITORES, lectores=LECTORES, segundos=DURACION_S, modo='actual', filas_previas=FILAS_PREVIAS):
+    rng = np.random.default_rng(0)
+    with base_de_datos_temporal() as ruta:
+        codigos = poblar_empleados(ruta, N_EMPLEADOS, rng)
+        poblar_asistencia(ruta, codigos, filas_previas, rng)
+        if modo == 'anterior':
+            database.cerrar_conexiones() # Vuelve al journal por defecto
+            conn = sqlite3.connect(ruta)
+            conn.execute("PRAGMA journal_mode = DELETE")
+            conn.close()
+            registrar = _registrar_anterior
+            leer = _leer_anterior
+        else:
+            registrar = lambda codigo: database.registrar_asistencia(codigo, 'entrada', 1, 1)
+            leer = _leer_actual
+
+        conn = sqlite3.connect(ruta)
+        filas_antes = conn.execute("SELECT COUNT(*) FROM asistencia").fetchone()[0]
+        conn.close()
+
+        latencias_escritura, latencias_lectura = [], []
+        errores = [0, 0]
+        hasta = time.perf_counter() + segundos
+        hilos = [
+            threading.Thread(
+                target=_trabajador,
+                args=(lambda i=i: registrar(codigos[i % len(codigos)]), hasta, latencias_escritura, errores, 0)
+            )
+            for i in range(escritores)
+        ] + [
+            threading.Thread(target=_trabajador, args=(leer, hasta, latencias_lectura, errores, 1))
+            for _ in range(lectores)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        database.cerrar_conexiones()
+
+        conn = sqlite3.connect(ruta)
+        filas_despues = conn.execute("SELECT COUNT(*) FROM asistencia").fetchone()[0]
+        integridad = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        modo_journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+
+    escrituras_ok = len(latencias_escritura) - errores[0]
+    return {
+        'modo': modo,
+        'journal_mode': modo_journal,
+        'escritores': escritores,
+        'lectores': lectores,
+        'segundos': segundos,
+        'escritura': _resumen(latencias_escritura, errores[0], segundos),
+        'lectura': _resumen(latencias_lectura, errores[1], segundos),
+        'escrituras_perdidas': escrituras_ok - (filas_despues - filas_antes),
+        'integridad': integridad,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de estrés de la base de datos con escritores y lectores concurrentes.")
+    parser.add_argument('--escritores', type=int, default=ESCRITORES)
+    parser.add_argument('--lectores', type=int, default=LECTORES)
+    parser.add_argument('--segundos', type=float, default=DURACION_S)
+    parser.add_argument('--filas', type=int, default=FILAS_PREVIAS, help="Registros de asistencia previos en la base.")
+    parser.add_argument('--modo', choices=('actual', 'anterior'), default='actual')
+    args = parser.parse_args()
+
+    r = ejecutar(args.escritores, args.lectores, args.segundos, args.modo, args.filas)
+    print(f"Modo {r['modo']} (journal {r['journal_mode']}): {r['escritores']} escritores, {r['lectores']} lectores, {r['segundos']:.0f} s")
+    print(f"{'':<10} {'ops/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9} {'errores':>8}")
+    for nombre in ('escritura', 'lectura'):
+        d = r[nombre]
+        print(f"{nombre:<10} {d['por_segundo']:>9.1f} {d['p50_ms']:>9.2f} {d['p95_ms']:>9.2f} {d['max_ms']:>9.1f} {d['errores']:>8}")
+    print(f"Escrituras perdidas: {r['escrituras_perdidas']}  Integridad: {r['integridad']}")
+    if r['escrituras_perdidas'] or r['integridad'] != 'ok' or r['escritura']['errores'] or r['lectura']['errores']:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Compara los backends del detector de EPP: verifica que el modelo ONNX (y su
+versión int8, si existe) produce las mismas cajas y clases que el modelo
+PyTorch original, y mide la latencia de cada uno en CPU. Termina con código 1
+si algún backend no alcanza los umbrales de coincidencia.
+
+Uso (desde la raíz del proyecto, con best.pt y best.onnx exportado):
+    python -m benchmarks.bench_detector_backends [carpeta_de_imagenes]
+
+Sin carpeta se usan frames sintéticos, que sirven para medir latencia pero
+casi no tienen detecciones que comparar.
+"""
+import glob
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from logica.detectores import (
+    DetectorUltralytics, DetectorONNX,
+    RUTA_MODELO_PT, RUTA_MODELO_ONNX, RUTA_MODELO_ONNX_INT8
+)
+
+REPETICIONES = 20
+IOU_MINIMO = 0.9 # Dos cajas con este IoU se consideran la misma detección
+# Mínimos por backend: fracción de cajas emparejadas por IoU (sobre las de la
+# referencia y sobre las del backend) y fracción de las emparejadas con la misma clase.
+# La cuantización a int8 mueve algo las cajas y las confianzas cerca del umbral.
+CAJAS_IGUALES_MINIMO = {'onnx': 0.98, 'onnx-int8': 0.90}
+CLASES_IGUALES_MINIMO = {'onnx': 1.0, 'onnx-int8': 0.98}
+
+def cargar_frames(carpeta):
+    if carpeta:
+        rutas = sorted(glob.glob(os.path.join(carpeta, '*.jpg')) + glob.glob(os.path.join(carpeta, '*.png')))
+        return [cv2.imread(ruta) for ruta in rutas]
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(4)]
+
+def iou_xyxy(a, b):
+    ancho = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    alto = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    interseccion = ancho * alto
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - interseccion
+    return interseccion / union if union > 0 else 0.0
+
+def comparar(referencia, candidato):
+    """
+    Empareja cada caja de la referencia con la de mayor IoU del candidato (si
+    supera IOU_MINIMO). Retorna (emparejadas, misma_clase, total_referencia, total_candidato).
+    """
+    emparejadas = misma_clase = 0
+    usadas = set()
+    for caja in referencia:
+        libres = [(iou_xyxy(caja, otra), j) for j, otra in enumerate(candidato) if j not in usadas]
+        iou, j = max(libres, default=(0.0, None))
+        if iou >= IOU_MINIMO:
+            usadas.add(j)
+            emparejadas += 1
+            misma_clase += candidato[j][4] == caja[4]
+    return emparejadas, misma_clase, len(referencia), len(candidato)
+
+def fraccion(parte, total):
+    return parte / total if total else 1.0
+
+def medir(detector, frames):
+    detector.detectar(frames[:1]) # Calentamiento
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        for frame in frames:
+            detector.detectar([frame])
+    return (time.perf_counter() - inicio) * 1000 / (REPETICIONES * len(frames))
+
+def main():
+    frames = cargar_frames(sys.argv[1] if len(sys.argv) > 1 else None)
+    referencia_detector = DetectorUltralytics(RUTA_MODELO_PT)
+    referencia = [referencia_detector.detectar([f])[0] for f in frames]
+    print(f"{'backend':<14} {'ms/frame':>9} {'cajas iguales':>14} {'misma clase':>12}")
+    print(f"{'ultralytics':<14} {medir(referencia_detector, frames):>9.2f} {'(referencia)':>14}")
+
+    fallas = []
+    for nombre, ruta in (('onnx', RUTA_MODELO_ONNX), ('onnx-int8', RUTA_MODELO_ONNX_INT8)):
+        if not os.path.exists(ruta):
+            print(f"{nombre:<14} {'-':>9} {'no exportado':>14}")
+            continue
+        detector = DetectorONNX(ruta)
+        emparejadas = misma_clase = total_ref = total_cand = 0
+        for frame, cajas_ref in zip(frames, referencia):
+            e, c, r, k = comparar(cajas_ref, detector.detectar([frame])[0])
+            emparejadas, misma_clase, total_ref, total_cand = emparejadas + e, misma_clase + c, total_ref + r, total_cand + k
+        print(
+            f"{nombre:<14} {medir(detector, frames):>9.2f} "
+            f"{f'{emparejadas}/{total_ref} ({total_cand})':>14} {f'{misma_clase}/{emparejadas}':>12}"
+        )
+
+        if dict(detector.names) != dict(referencia_detector.names):
+            fallas.append(f"{nombre}: nombres de clases distintos ({detector.names} != {referencia_detector.names})")
+        cajas = min(fraccion(emparejadas, total_ref), fraccion(emparejadas, total_cand))
+        if cajas < CAJAS_IGUALES_MINIMO[nombre]:
+            fallas.append(f"{nombre}: {cajas:.1%} de cajas iguales (mínimo {CAJAS_IGUALES_MINIMO[nombre]:.0%})")
+        clases = fraccion(misma_clase, emparejadas)
+        if clases < CLASES_IGUALES_MINIMO[nombre]:
+            fallas.append(f"{nombre}: {clases:.1%} de cajas con la misma clase (mínimo {CLASES_IGUALES_MINIMO[nombre]:.0%})")
+
+    for falla in fallas:
+        print(f"FALLA: {falla}")
+    if fallas:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Mide el costo por frame de comparar los rostros detectados contra la galería.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_galeria
+"""
+import time
+import numpy as np
+from logica.galeria import GaleriaRostros
+from logica.indices import DIMENSION_EMBEDDING
+
+TAMANOS_GALERIA = (100, 10_000, 100_000)
+ROSTROS_POR_FRAME = 3
+REPETICIONES = 50
+
+def crear_galeria_sintetica(n, rng):
+    """Crea una galería con `n` embeddings aleatorios de norma ~0.5, como los de dlib."""
+    galeria = GaleriaRostros()
+    embeddings = rng.normal(size=(n, DIMENSION_EMBEDDING)).astype(np.float32)
+    embeddings *= 0.5 / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    codigos = [f"{i:08d}" for i in range(n)]
+    galeria.cargar_encodings(codigos, [f"Empleado {i}" for i in range(n)], embeddings)
+    return galeria, embeddings
+
+def medir(galeria, consultas, k=1):
+    """Retorna el tiempo medio (ms) de una búsqueda por lotes de `consultas`."""
+    galeria.buscar(consultas, k=k) # Calentamiento
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        galeria.buscar(consultas, k=k)
+    return (time.perf_counter() - inicio) * 1000 / REPETICIONES
+
+def ejecutar(tamanos=TAMANOS_GALERIA):
+    """Retorna una fila por tamaño de galería con el tiempo de búsqueda top-1 y top-5."""
+    rng = np.random.default_rng(0)
+    filas = []
+    for n in tamanos:
+        galeria, embeddings = crear_galeria_sintetica(n, rng)
+        consultas = embeddings[rng.integers(0, n, ROSTROS_POR_FRAME)]
+        consultas = consultas + rng.normal(scale=0.01, size=consultas.shape).astype(np.float32)
+        filas.append({
+            'identidades': n,
+            'rostros_por_frame': ROSTROS_POR_FRAME,
+            'top1_ms': medir(galeria, consultas, 1),
+            'top5_ms': medir(galeria, consultas, 5),
+        })
+    return filas
+
+def main():
+    print(f"{'identidades':>12} {'rostros/frame':>14} {'top-1 (ms)':>11} {'top-5 (ms)':>11}")
+    for fila in ejecutar():
+        print(f"{fila['identidades']:>12} {fila['rostros_por_frame']:>14} {fila['top1_ms']:>11.3f} {fila['top5_ms']:>11.3f}")
+
+if __name__ == '__main__':
+    main()
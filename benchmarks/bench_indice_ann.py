@@ -0,0 +1,115 @@
+"""
+Mide el recall y la latencia del índice aproximado (IVF) frente a la búsqueda
+exacta, sobre embeddings sintéticos agrupados como los de una galería real.
+Termina con código 1 si, con el `n_sondeos` por defecto de IndiceIVF, el
+recall queda por debajo de RECALL_MINIMO_1 / RECALL_MINIMO_K o la búsqueda es
+más lenta que la exacta (con el IVF entrenado), o si tras las altas y bajas
+incrementales falta una alta o aparece una baja.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_indice_ann [n_identidades]
+"""
+import sys
+import time
+import numpy as np
+from logica.indices import IndiceExacto, IndiceIVF, DIMENSION_EMBEDDING
+
+N_IDENTIDADES = 50_000
+N_CONSULTAS = 500
+K = 10
+SONDEOS = (1, 2, 4, 8, 16, 32, 64)
+# Recall mínimo exigido con el n_sondeos por defecto del índice.
+RECALL_MINIMO_1 = 0.95
+RECALL_MINIMO_K = 0.90
+
+def generar_embeddings(n, rng, n_grupos=200):
+    """
+    Genera `n` embeddings de norma ~0.5 alrededor de `n_grupos` centros, para
+    imitar que los rostros no se reparten de forma uniforme en el espacio.
+    """
+    centros = rng.normal(size=(n_grupos, DIMENSION_EMBEDDING)).astype(np.float32)
+    grupos = rng.integers(0, n_grupos, n)
+    embeddings = centros[grupos] + rng.normal(scale=0.8, size=(n, DIMENSION_EMBEDDING)).astype(np.float32)
+    embeddings *= 0.5 / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings
+
+def medir_busquedas(indice, consultas, k):
+    """Busca cada consulta por separado (como en un frame). Retorna (resultados, ms por consulta)."""
+    inicio = time.perf_counter()
+    resultados = [indice.buscar(c[None, :], k)[0] for c in consultas]
+    return resultados, (time.perf_counter() - inicio) * 1000 / len(consultas)
+
+def recall(resultados, referencia, k):
+    """Fracción de los k vecinos exactos que también devolvió el índice aproximado."""
+    aciertos = sum(
+        len({c for c, _ in aprox[:k]} & {c for c, _ in exacto[:k]})
+        for aprox, exacto in zip(resultados, referencia)
+    )
+    return aciertos / (k * len(referencia))
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_IDENTIDADES
+    rng = np.random.default_rng(0)
+    embeddings = generar_embeddings(n, rng)
+    codigos = [f"{i:08d}" for i in range(n)]
+    # Consultas: rostros de la galería con el ruido de una captura distinta.
+    elegidos = rng.integers(0, n, N_CONSULTAS)
+    consultas = embeddings[elegidos] + rng.normal(scale=0.02, size=(N_CONSULTAS, DIMENSION_EMBEDDING)).astype(np.float32)
+
+    exacto = IndiceExacto()
+    exacto.cargar(codigos, embeddings)
+    referencia, ms_exacto = medir_busquedas(exacto, consultas, K)
+    print(f"Identidades: {n}  Consultas: {N_CONSULTAS}  k={K}")
+    print(f"{'exacto':>10} {'':>8} {'recall@1':>9} {'recall@10':>10} {'ms/consulta':>12}")
+    print(f"{'':>10} {'':>8} {1.0:>9.3f} {1.0:>10.3f} {ms_exacto:>12.3f}")
+
+    inicio = time.perf_counter()
+    ivf = IndiceIVF()
+    sondeos_por_defecto = ivf.n_sondeos
+    ivf.cargar(codigos, embeddings)
+    print(f"\nIVF entrenado con {ivf.n_listas} listas en {time.perf_counter() - inicio:.2f} s")
+    print(f"{'n_sondeos':>10} {'':>8} {'recall@1':>9} {'recall@10':>10} {'ms/consulta':>12}")
+    for n_sondeos in sorted(set(SONDEOS) | {sondeos_por_defecto}):
+        ivf.n_sondeos = n_sondeos
+        resultados, ms = medir_busquedas(ivf, consultas, K)
+        recall_1, recall_k = recall(resultados, referencia, 1), recall(resultados, referencia, K)
+        if n_sondeos == sondeos_por_defecto:
+            recall_por_defecto, ms_por_defecto = (recall_1, recall_k), ms
+        print(f"{n_sondeos:>10} {'(def.)' if n_sondeos == sondeos_por_defecto else '':>8} {recall_1:>9.3f} "
+              f"{recall_k:>10.3f} {ms:>12.3f}")
+
+    # Altas y bajas incrementales: los vectores eliminados no deben aparecer.
+    eliminados = set(codigos[:1000])
+    for codigo in eliminados:
+        ivf.eliminar(codigo)
+    nuevos = generar_embeddings(1000, rng)
+    for i, embedding in enumerate(nuevos):
+        ivf.agregar(f"N{i:07d}", embedding)
+    ivf.n_sondeos = sondeos_por_defecto
+    resultados, _ = medir_busquedas(ivf, nuevos[:100], 1)
+    encontrados = sum(r[0][0] == f"N{i:07d}" for i, r in enumerate(resultados))
+    resultados, _ = medir_busquedas(ivf, embeddings[:100], K)
+    fugas = sum(c in eliminados for r in resultados for c, _ in r)
+    print(f"\nTras 1000 bajas y 1000 altas: {encontrados}/100 altas encontradas, {fugas} bajas devueltas")
+
+    fallas = []
+    if recall_por_defecto[0] < RECALL_MINIMO_1:
+        fallas.append(f"recall@1 {recall_por_defecto[0]:.3f} < {RECALL_MINIMO_1} con n_sondeos={sondeos_por_defecto}")
+    if recall_por_defecto[1] < RECALL_MINIMO_K:
+        fallas.append(f"recall@{K} {recall_por_defecto[1]:.3f} < {RECALL_MINIMO_K} con n_sondeos={sondeos_por_defecto}")
+    if ivf.entrenado and ms_por_defecto >= ms_exacto:
+        fallas.append(f"IVF más lento que la búsqueda exacta ({ms_por_defecto:.3f} >= {ms_exacto:.3f} ms/consulta) "
+                      f"con n_sondeos={sondeos_por_defecto}")
+    elif not ivf.entrenado:
+        print(f"\nAviso: con {n} identidades el IVF no se entrena (mínimo {ivf.minimo_entrenamiento}) y busca de forma exacta")
+    if encontrados < 100:
+        fallas.append(f"solo {encontrados}/100 altas encontradas")
+    if fugas:
+        fallas.append(f"{fugas} bajas devueltas")
+    for falla in fallas:
+        print(f"FALLA: {falla}")
+    if fallas:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Mide el reconocimiento de punta a punta:
+
+- `load_known_faces` (carga de la galería desde la BD con la caché de
+  embeddings ya llena) para varios tamaños de galería.
+- `reconocer_y_detectar` sobre un conjunto fijo de frames, con el desglose por
+  etapa (preprocesamiento, YOLO, face_locations, face_encodings, comparación y
+  dibujo) que registra `logica.metricas`.
+
+Uso (desde la raíz del proyecto, con best.pt disponible):
+    python -m benchmarks.bench_reconocimiento [carpeta_de_imagenes]
+
+Sin carpeta se usan frames sintéticos generados con semilla fija; sirven para
+comparar corridas entre sí pero casi no tienen rostros ni EPP.
+"""
+import statistics
+import sys
+import time
+import numpy as np
+from benchmarks.bench_base_datos import base_de_datos_temporal, poblar_empleados
+from benchmarks.bench_detector_backends import cargar_frames
+from benchmarks.bench_galeria import crear_galeria_sintetica
+from logica.galeria import GaleriaRostros, VERSION_CODIFICADOR
+from logica.indices import DIMENSION_EMBEDDING
+from logica.metricas import Metricas
+from logica.reconocimiento import ReconocimientoFacialEPP
+
+TAMANOS_CARGA = (100, 1_000, 10_000)
+TAMANO_GALERIA_PIPELINE = 1_000
+REPETICIONES_CARGA = 3
+REPETICIONES_PIPELINE = 10
+
+def medir_carga_galeria(reconocimiento, n, rng, repeticiones=REPETICIONES_CARGA):
+    """Tiempo (ms) de `load_known_faces` con `n` empleados y la caché de embeddings llena."""
+    encodings = rng.normal(size=(n, DIMENSION_EMBEDDING)).astype(np.float32)
+    encodings *= 0.5 / np.linalg.norm(encodings, axis=1, keepdims=True)
+    with base_de_datos_temporal() as ruta:
+        poblar_empleados(ruta, n, rng, encodings, VERSION_CODIFICADOR)
+        tiempos = []
+        for _ in range(repeticiones):
+            reconocimiento.galeria = GaleriaRostros()
+            inicio = time.perf_counter()
+            reconocimiento.load_known_faces()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        cargados = len(reconocimiento.galeria)
+    return {'identidades': n, 'cargadas': cargados, 'mediana_ms': statistics.median(tiempos), 'min_ms': min(tiempos)}
+
+def medir_pipeline(reconocimiento, frames, rng, repeticiones=REPETICIONES_PIPELINE):
+    """
+    Ejecuta `reconocer_y_detectar` `repeticiones` veces sobre cada frame y
+    retorna el tiempo total por frame y los percentiles de cada etapa.
+    """
+    reconocimiento.galeria, _ = crear_galeria_sintetica(TAMANO_GALERIA_PIPELINE, rng)
+    metricas = reconocimiento.metricas
+    reconocimiento.reconocer_y_detectar(frames[0].copy()) # Calentamiento
+    metricas.etapas.clear()
+    metricas.contadores.clear()
+
+    for _ in range(repeticiones):
+        # Cada vuelta empieza sin pistas para medir también la codificación de rostros.
+        reconocimiento.reiniciar_seguimiento()
+        for frame in frames:
+            with metricas.medir('total'):
+                reconocimiento.reconocer_y_detectar(frame.copy())
+    resumen = metricas.resumen()
+    return {
+        'frames': len(frames),
+        'repeticiones': repeticiones,
+        'galeria': TAMANO_GALERIA_PIPELINE,
+        'detector_cargado': reconocimiento.detector_epp is not None,
+        'etapas': resumen['etapas'],
+        'contadores': resumen['contadores'],
+    }
+
+def ejecutar(carpeta_frames=None, tamanos=TAMANOS_CARGA):
+    rng = np.random.default_rng(0)
+    # Un solo reconocedor (el detector se carga una vez) con métricas propias.
+    galeria, _ = crear_galeria_sintetica(1, rng)
+    reconocimiento = ReconocimientoFacialEPP(galeria=galeria, metricas=Metricas())
+    return {
+        'carga_galeria': [medir_carga_galeria(reconocimiento, n, rng) for n in tamanos],
+        'pipeline': medir_pipeline(reconocimiento, cargar_frames(carpeta_frames), rng),
+    }
+
+def main():
+    resultados = ejecutar(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"{'identidades':>12} {'load_known_faces (ms)':>22}")
+    for fila in resultados['carga_galeria']:
+        print(f"{fila['identidades']:>12} {fila['mediana_ms']:>22.1f}")
+    pipeline = resultados['pipeline']
+    print(f"\nreconocer_y_detectar: {pipeline['frames']} frames x {pipeline['repeticiones']} repeticiones")
+    print(f"{'etapa':<18} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'n':>6}")
+    for etapa, datos in pipeline['etapas'].items():
+        print(f"{etapa:<18} {datos['p50_ms']:>9.2f} {datos['p95_ms']:>9.2f} {datos['p99_ms']:>9.2f} {datos['n']:>6}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Comprueba el seguidor de rostros (`logica.seguimiento`) con cajas sintéticas:
+una pista confirmada que sigue a la vista no se vuelve a codificar, y una que
+se pierde y reaparece en la misma caja sí, para que otra persona que entre en
+ese lugar no herede la identidad. Termina con código 1 si alguna falla.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.comprobar_seguimiento
+"""
+from logica.seguimiento import SeguidorRostros
+
+CAJA = (100, 200, 200, 100) # (top, right, bottom, left)
+PERSONA_A = ('A0000001', 'Persona A', 0.3)
+PERSONA_B = ('B0000002', 'Persona B', 0.3)
+
+def confirmar(seguidor, coincidencia):
+    """Sigue una caja hasta que su pista queda confirmada con `coincidencia`. Retorna la pista."""
+    for _ in range(SeguidorRostros.CONFIRMACIONES_NECESARIAS):
+        pistas, pendientes = seguidor.actualizar([CAJA])
+        for i in pendientes:
+            seguidor.registrar_identidad(pistas[i], coincidencia)
+    return pistas[0]
+
+def comprobar():
+    """Retorna una lista de (comprobación, ok, detalle)."""
+    resultados = []
+
+    seguidor = SeguidorRostros()
+    pista = confirmar(seguidor, PERSONA_A)
+    resultados.append(("pista confirmada", pista.confirmada, f"confirmaciones = {pista.confirmaciones}"))
+    _, pendientes = seguidor.actualizar([CAJA])
+    resultados.append(("pista a la vista no se recodifica", not pendientes, f"pendientes = {pendientes}"))
+
+    # La persona sale de cuadro unos frames (menos que max_frames_perdida) y
+    # otra entra en la misma caja.
+    for _ in range(seguidor.max_frames_perdida - 1):
+        seguidor.actualizar([])
+    pistas, pendientes = seguidor.actualizar([CAJA])
+    misma_pista = pistas[0] is pista
+    resultados.append(("la pista se recupera", misma_pista, f"id {pistas[0].id} (antes {pista.id})"))
+    resultados.append(("pista recuperada se recodifica", pendientes == [0], f"pendientes = {pendientes}"))
+    for i in pendientes:
+        seguidor.registrar_identidad(pistas[i], PERSONA_B)
+    resultados.append((
+        "no hereda la identidad anterior",
+        pistas[0].codigo == PERSONA_B[0] and not pistas[0].confirmada,
+        f"código {pistas[0].codigo}, confirmada {pistas[0].confirmada}"
+    ))
+    _, pendientes = seguidor.actualizar([CAJA])
+    resultados.append(("la nueva identidad se confirma de nuevo", pendientes == [0], f"pendientes = {pendientes}"))
+    return resultados
+
+def main():
+    resultados = comprobar()
+    for comprobacion, ok, detalle in resultados:
+        print(f"[{'OK' if ok else 'FALLA'}] {comprobacion}: {detalle}")
+    if not all(ok for _, ok, _ in resultados):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Comprueba con EXPLAIN QUERY PLAN que las consultas del dashboard usan los
+índices de 'asistencia' en lugar de recorrer la tabla completa, y que una base
+con el esquema anterior al versionado se migra correctamente en su lugar
+(fecha local, índices, fotos en la tabla 'fotos' y PRAGMA user_version). Las bases se crean en carpetas
+temporales. Termina con código 1 si alguna comprobación falla.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.planes_consultas
+"""
+import sqlite3
+import numpy as np
+from conexion import database
+from benchmarks.bench_base_datos import base_de_datos_temporal, poblar_empleados, poblar_asistencia
+
+FILAS_ASISTENCIA = 20_000
+N_EMPLEADOS = 50
+
+# Función del dashboard -> índice que debe usar su consulta sobre 'asistencia'.
+CONSULTAS_VIGILADAS = {
+    'contar_asistencias_hoy': 'idx_asistencia_fecha_tipo_empleado',
+    'contar_incidentes_epp_hoy': 'idx_asistencia_fecha_tipo_empleado',
+    'obtener_asistencia_ultimos_7_dias': 'idx_asistencia_fecha_tipo_empleado',
+}
+
+# Esquema de las bases creadas antes de las migraciones (user_version = 0).
+ESQUEMA_ANTIGUO = (
+    """CREATE TABLE empleados (
+        codigo TEXT(8) PRIMARY KEY,
+        nombre TEXT NOT NULL,
+        apellidos TEXT NOT NULL,
+        foto BLOB NOT NULL
+    )""",
+    """CREATE TABLE asistencia (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        empleado_codigo TEXT(8) NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        tipo TEXT NOT NULL CHECK(tipo IN ('entrada', 'salida')),
+        casco INTEGER NOT NULL CHECK(casco IN (0, 1)),
+        chaleco INTEGER NOT NULL CHECK(chaleco IN (0, 1)),
+        FOREIGN KEY (empleado_codigo) REFERENCES empleados (codigo) ON DELETE CASCADE
+    )""",
+)
+
+def capturar_consultas(funcion):
+    """Ejecuta `funcion` y retorna las sentencias SQL (con los parámetros ya sustituidos) que envió."""
+    sentencias = []
+    conn = database.obtener_conexion()
+    conn.set_trace_callback(sentencias.append)
+    try:
+        funcion()
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in sentencias if s.lstrip().upper().startswith('SELECT')]
+
+def plan_de(conn, consulta):
+    """Retorna los pasos (columna 'detail') de EXPLAIN QUERY PLAN de la consulta."""
+    return [fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {consulta}")]
+
+def verificar_planes():
+    """Retorna una lista de (comprobación, ok, detalle)."""
+    resultados = []
+    rng = np.random.default_rng(0)
+    with base_de_datos_temporal() as ruta:
+        codigos = poblar_empleados(ruta, N_EMPLEADOS, rng)
+        poblar_asistencia(ruta, codigos, FILAS_ASISTENCIA, rng)
+        conn = database.obtener_conexion()
+        for nombre, indice in CONSULTAS_VIGILADAS.items():
+            consultas = capturar_consultas(getattr(database, nombre))
+            pasos = [paso for consulta in consultas for paso in plan_de(conn, consulta)]
+            recorre = [paso for paso in pasos if paso.startswith('SCAN asistencia')]
+            usa_indice = any(indice in paso for paso in pasos)
+            ok = bool(consultas) and usa_indice and not recorre
+            resultados.append((f"plan de {nombre}", ok, "; ".join(pasos) or "sin consultas"))
+    return resultados
+
+def verificar_migracion():
+    """Crea una base con el esquema antiguo, la migra y retorna una lista de (comprobación, ok, detalle)."""
+    resultados = []
+    rng = np.random.default_rng(1)
+    with base_de_datos_temporal(crear_tablas=False) as ruta:
+        conn = sqlite3.connect(ruta)
+        for sentencia in ESQUEMA_ANTIGUO:
+            conn.execute(sentencia)
+        fotos = {f"{i:08d}": rng.bytes(256) for i in range(N_EMPLEADOS)}
+        conn.executemany(
+            "INSERT INTO empleados (codigo, nombre, apellidos, foto) VALUES (?, ?, ?, ?)",
+            [(codigo, f"Nombre{i}", f"Apellido{i}", foto) for i, (codigo, foto) in enumerate(fotos.items())]
+        )
+        conn.executemany(
+            "INSERT INTO asistencia (empleado_codigo, timestamp, tipo, casco, chaleco) "
+            "VALUES (?, DATETIME('now', ?), ?, ?, ?)",
+            [
+                (f"{int(e):08d}", f"-{int(s)} seconds", 'entrada' if t else 'salida', int(c), int(ch))
+                for e, s, t, c, ch in zip(
+                    rng.integers(0, N_EMPLEADOS, 5000), rng.integers(0, 10 * 86400, 5000),
+                    rng.integers(0, 2, 5000), rng.integers(0, 2, 5000), rng.integers(0, 2, 5000)
+                )
+            ]
+        )
+        conn.commit()
+        # Resultados de las consultas con la fecha local calculada al vuelo, para comparar.
+        esperado_hoy = conn.execute(
+            "SELECT COUNT(DISTINCT empleado_codigo) FROM asistencia "
+            "WHERE DATE(timestamp, 'localtime') = DATE('now', 'localtime') AND tipo = 'entrada'"
+        ).fetchone()[0]
+        esperado_7_dias = conn.execute(
+            "SELECT DATE(timestamp, 'localtime') AS dia, COUNT(DISTINCT empleado_codigo) FROM asistencia "
+            "WHERE dia >= DATE('now', '-6 days', 'localtime') AND tipo = 'entrada' GROUP BY dia ORDER BY dia"
+        ).fetchall()
+        conn.close()
+
+        database.crear_tablas_iniciales()
+        conn = database.obtener_conexion()
+        version = database.obtener_version_esquema(conn)
+        resultados.append(("versión tras migrar", version == database.VERSION_ESQUEMA, f"user_version = {version}"))
+        sin_fecha = conn.execute(
+            "SELECT COUNT(*) FROM asistencia WHERE fecha IS NOT DATE(timestamp, 'localtime')"
+        ).fetchone()[0]
+        resultados.append(("fecha local de los registros existentes", sin_fecha == 0, f"{sin_fecha} filas distintas"))
+        indices = {fila[1] for fila in conn.execute("PRAGMA index_list(asistencia)")}
+        faltan = {'idx_asistencia_fecha_tipo_empleado', 'idx_asistencia_empleado_timestamp'} - indices
+        resultados.append(("índices de asistencia", not faltan, f"faltan: {sorted(faltan)}" if faltan else "ok"))
+        sin_hash = conn.execute("SELECT COUNT(*) FROM empleados WHERE foto_hash IS NULL").fetchone()[0]
+        resultados.append(("hash de las fotos existentes", sin_hash == 0, f"{sin_hash} sin hash"))
+        columnas_blob = [
+            f"{tabla}.{fila[1]}" for tabla in ('empleados', 'fotos_empleado')
+            for fila in conn.execute(f"PRAGMA table_info({tabla})") if fila[2].upper() == 'BLOB'
+        ]
+        resultados.append(("sin imágenes en las tablas de empleados", not columnas_blob, ", ".join(columnas_blob) or "ok"))
+        distintas = sum(database.obtener_foto_por_codigo(codigo) != foto for codigo, foto in fotos.items())
+        resultados.append(("fotos movidas a la tabla 'fotos'", distintas == 0, f"{distintas} fotos distintas"))
+        hoy = database.contar_asistencias_hoy()
+        resultados.append(("contar_asistencias_hoy tras migrar", hoy == esperado_hoy, f"{hoy} (esperado {esperado_hoy})"))
+        ultimos = [tuple(fila) for fila in database.obtener_asistencia_ultimos_7_dias()]
+        resultados.append(("obtener_asistencia_ultimos_7_dias tras migrar", ultimos == esperado_7_dias, f"{len(ultimos)} días"))
+
+        # Una segunda llamada no debe volver a migrar ni fallar.
+        database.crear_tablas_iniciales()
+        version = database.obtener_version_esquema(database.obtener_conexion())
+        resultados.append(("segunda llamada idempotente", version == database.VERSION_ESQUEMA, f"user_version = {version}"))
+    return resultados
+
+def main():
+    resultados = verificar_planes() + verificar_migracion()
+    for comprobacion, ok, detalle in resultados:
+        print(f"[{'OK' if ok else 'FALLA'}] {comprobacion}: {detalle}")
+    if not all(ok for _, ok, _ in resultados):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Ejecuta todos los benchmarks de rendimiento y guarda los resultados en JSON,
+junto con los datos del equipo y del commit, para comparar corridas en el
+tiempo. No necesita cámara ni red; solo CPU.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.suite [--salida resultados.json] [--frames carpeta]
+                               [--filas 1000000] [--rapido] [--comparar anterior.json]
+
+Con --comparar se imprime, para cada medición, la relación nueva/anterior
+(> 1 significa que ahora es más lenta).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import numpy as np
+from benchmarks import bench_base_datos, bench_galeria, bench_reconocimiento
+
+# Tamaños reducidos para una corrida rápida (p. ej. antes de cada commit).
+TAMANOS_CARGA_RAPIDO = (100, 1_000)
+TAMANOS_GALERIA_RAPIDO = (100, 10_000)
+FILAS_RAPIDO = 100_000
+
+def obtener_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def describir_entorno():
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': obtener_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sistema': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'nucleos': os.cpu_count(),
+    }
+
+def aplanar(datos, prefijo=''):
+    """Convierte los resultados anidados en {'ruta.a.la.medicion': valor} (solo tiempos en ms)."""
+    planos = {}
+    if isinstance(datos, dict):
+        for clave, valor in datos.items():
+            planos.update(aplanar(valor, f"{prefijo}.{clave}" if prefijo else clave))
+    elif isinstance(datos, list):
+        for fila in datos:
+            etiqueta = fila.get('identidades', len(planos)) if isinstance(fila, dict) else len(planos)
+            planos.update(aplanar(fila, f"{prefijo}[{etiqueta}]"))
+    elif isinstance(datos, (int, float)) and prefijo.endswith('_ms'):
+        planos[prefijo] = datos
+    return planos
+
+def comparar(actual, anterior):
+    nuevos, viejos = aplanar(actual['resultados']), aplanar(anterior['resultados'])
+    print(f"\nComparación con el commit {anterior['entorno'].get('commit')} ({anterior['entorno'].get('fecha')}):")
+    for clave in sorted(nuevos):
+        if clave in viejos and viejos[clave]:
+            print(f"  {clave:<70} {nuevos[clave]:>10.2f} ms  x{nuevos[clave] / viejos[clave]:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de reconocimiento, detección y base de datos.")
+    parser.add_argument('--salida', default='resultados_benchmarks.json', help="Archivo JSON de resultados.")
+    parser.add_argument('--frames', default=None, help="Carpeta con imágenes de muestra (por defecto, frames sintéticos).")
+    parser.add_argument('--filas', type=int, default=bench_base_datos.FILAS_ASISTENCIA, help="Registros de asistencia de la BD sintética.")
+    parser.add_argument('--rapido', action='store_true', help="Usa tamaños reducidos.")
+    parser.add_argument('--comparar', default=None, help="JSON de una corrida anterior para comparar.")
+    parser.add_argument('--solo', nargs='*', choices=('base_de_datos', 'galeria', 'reconocimiento'), help="Ejecuta solo estos grupos.")
+    args = parser.parse_args(argv)
+
+    grupos = set(args.solo or ('base_de_datos', 'galeria', 'reconocimiento'))
+    filas = min(args.filas, FILAS_RAPIDO) if args.rapido else args.filas
+    resultados = {}
+    if 'galeria' in grupos:
+        print("Comparación contra la galería...")
+        resultados['galeria'] = bench_galeria.ejecutar(TAMANOS_GALERIA_RAPIDO if args.rapido else bench_galeria.TAMANOS_GALERIA)
+    if 'reconocimiento' in grupos:
+        print("Carga de la galería y reconocer_y_detectar...")
+        resultados['reconocimiento'] = bench_reconocimiento.ejecutar(
+            args.frames, TAMANOS_CARGA_RAPIDO if args.rapido else bench_reconocimiento.TAMANOS_CARGA
+        )
+    if 'base_de_datos' in grupos:
+        print(f"Base de datos con {filas} registros de asistencia...")
+        resultados['base_de_datos'] = bench_base_datos.ejecutar(filas)
+
+    informe = {'entorno': describir_entorno(), 'resultados': resultados}
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            comparar(informe, json.load(archivo))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
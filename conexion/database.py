@@ -1,71 +1,356 @@
 import sqlite3
+import contextlib
+import hashlib
 import os
+import threading
+import time
 
 # --- Configuración de la Base de Datos ---
 DB_FOLDER = 'base_de_datos'
 DB_NAME = 'asistencia.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
 
+# PRAGMAs aplicados a cada conexión. Con WAL las lecturas (dashboard, reportes)
+# no bloquean las escrituras (kiosco) ni al revés; synchronous=NORMAL es seguro
+# en modo WAL y evita un fsync por transacción.
+PRAGMAS_CONEXION = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000", # En KiB: 16 MB de caché de páginas por conexión
+    "PRAGMA mmap_size = 268435456", # 256 MB de lectura por mmap
+    "PRAGMA temp_store = MEMORY",
+)
+# Milisegundos que una conexión espera a que se libere un bloqueo antes de fallar.
+ESPERA_BLOQUEO_MS = 5000
+# Sentencias preparadas que cada conexión mantiene compiladas (por texto SQL).
+SENTENCIAS_EN_CACHE = 128
+
+# --- Conexiones ---
+# Cada hilo reutiliza su propia conexión persistente en lugar de abrir y cerrar
+# una por consulta: el esquema se lee una sola vez y las sentencias preparadas
+# se reutilizan entre llamadas.
+_local = threading.local()
+_conexiones_abiertas = []
+_lock_conexiones = threading.Lock()
+_generacion = 0 # Aumenta con cerrar_conexiones para que cada hilo abra una nueva
+
+def obtener_conexion():
+    """
+    Retorna la conexión persistente del hilo actual a DB_PATH, abriéndola (y
+    configurándola) la primera vez. Si DB_PATH cambió o el proceso es un hijo
+    creado con fork, se abre una nueva.
+    """
+    conn = getattr(_local, 'conexion', None)
+    if conn is not None and _local.pid == os.getpid() and _local.generacion == _generacion:
+        if _local.ruta == DB_PATH:
+            return conn
+        _cerrar(conn)
+    # check_same_thread=False solo para poder cerrarlas todas al salir (cerrar_conexiones);
+    # cada conexión se usa únicamente desde el hilo que la abrió.
+    conn = sqlite3.connect(
+        DB_PATH, timeout=ESPERA_BLOQUEO_MS / 1000, cached_statements=SENTENCIAS_EN_CACHE, check_same_thread=False
+    )
+    conn.execute(f"PRAGMA busy_timeout = {ESPERA_BLOQUEO_MS}")
+    for pragma in PRAGMAS_CONEXION:
+        conn.execute(pragma)
+    _local.conexion, _local.ruta, _local.pid, _local.generacion = conn, DB_PATH, os.getpid(), _generacion
+    with _lock_conexiones:
+        _conexiones_abiertas.append(conn)
+    return conn
+
+@contextlib.contextmanager
+def conexion():
+    """
+    Entrega la conexión del hilo dentro de una transacción: se confirma al salir
+    del bloque y se deshace si ocurre una excepción. La conexión queda abierta.
+    """
+    conn = obtener_conexion()
+    with conn:
+        yield conn
+
+def _cerrar(conn):
+    with _lock_conexiones:
+        if conn in _conexiones_abiertas:
+            _conexiones_abiertas.remove(conn)
+    conn.close()
+
+def cerrar_conexiones():
+    """
+    Cierra las conexiones de todos los hilos (al salir de la aplicación, o en
+    pruebas). Si un hilo vuelve a consultar, abre una conexión nueva.
+    """
+    global _generacion
+    with _lock_conexiones:
+        conexiones = list(_conexiones_abiertas)
+        _conexiones_abiertas.clear()
+        _generacion += 1
+    for conn in conexiones:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error al cerrar una conexión a la base de datos: {e}")
+
 def crear_tablas_iniciales():
     """
-    Crea las tablas 'empleados' y 'asistencia' en la base de datos
-    si estas no existen. Esta función es segura de ejecutar múltiples veces.
+    Crea las tablas 'empleados' y 'asistencia' en la base de datos si estas no
+    existen y aplica las migraciones pendientes (ver MIGRACIONES). Esta función
+    es segura de ejecutar múltiples veces.
     """
     # Asegurarse de que la carpeta de la base de datos exista
     os.makedirs(DB_FOLDER, exist_ok=True)
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with conexion() as conn:
+            cursor = conn.cursor()
 
-        # --- Tabla de Empleados ---
-        # Almacena la información permanente de cada empleado.
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS empleados (
-                codigo TEXT(8) PRIMARY KEY,
-                nombre TEXT NOT NULL,
-                apellidos TEXT NOT NULL,
-                foto BLOB NOT NULL
-            )
-        """)
+            # --- Tabla de Empleados ---
+            # Almacena la información permanente de cada empleado.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS empleados (
+                    codigo TEXT(8) PRIMARY KEY,
+                    nombre TEXT NOT NULL,
+                    apellidos TEXT NOT NULL,
+                    foto BLOB NOT NULL
+                )
+            """)
 
-        # --- Tabla de Asistencia ---
-        # Almacena cada evento de entrada o salida.
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asistencia (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                empleado_codigo TEXT(8) NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                tipo TEXT NOT NULL CHECK(tipo IN ('entrada', 'salida')),
-                casco INTEGER NOT NULL CHECK(casco IN (0, 1)),
-                chaleco INTEGER NOT NULL CHECK(chaleco IN (0, 1)),
-                FOREIGN KEY (empleado_codigo) REFERENCES empleados (codigo) ON DELETE CASCADE
-            )
-        """)
+            # --- Tabla de Asistencia ---
+            # Almacena cada evento de entrada o salida.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS asistencia (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    empleado_codigo TEXT(8) NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    tipo TEXT NOT NULL CHECK(tipo IN ('entrada', 'salida')),
+                    casco INTEGER NOT NULL CHECK(casco IN (0, 1)),
+                    chaleco INTEGER NOT NULL CHECK(chaleco IN (0, 1)),
+                    FOREIGN KEY (empleado_codigo) REFERENCES empleados (codigo) ON DELETE CASCADE
+                )
+            """)
 
-        conn.commit()
+        aplicar_migraciones(obtener_conexion())
         print("Base de datos y tablas verificadas/creadas correctamente.")
 
     except sqlite3.Error as e:
         print(f"Error al crear/verificar la base de datos: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-def agregar_empleado(codigo, nombre, apellidos, foto_blob):
+# --- Migraciones del Esquema ---
+# La versión del esquema se guarda en PRAGMA user_version. La migración N
+# lleva una base de la versión N-1 a la N; las bases anteriores al versionado
+# tienen la versión 0.
+
+def _migrar_fotos(cursor):
     """
-    Agrega un nuevo empleado a la base de datos.
-    Retorna True si fue exitoso, False si ocurrió un error (ej. código duplicado).
+    v1: caché de embeddings, fotos adicionales y las columnas 'foto_hash',
+    'miniatura' y 'foto_original' de 'empleados'. Las bases sin versionar
+    pueden tener ya parte de esto, así que cada paso comprueba si hace falta.
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+    # --- Caché de Embeddings Faciales ---
+    # Guarda el vector de 128 dimensiones de cada foto, indexado por el hash
+    # del BLOB y la versión del codificador, para no volver a calcularlo.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings_rostro (
+            foto_hash TEXT NOT NULL,
+            version TEXT NOT NULL,
+            encoding BLOB NOT NULL,
+            PRIMARY KEY (foto_hash, version)
+        )
+    """)
+
+    # --- Fotos adicionales de cada empleado ---
+    # Además de la foto principal (en 'empleados'), cada empleado puede tener
+    # otras fotos de referencia (con casco, lentes, barba...).
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fotos_empleado (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            empleado_codigo TEXT(8) NOT NULL,
+            foto BLOB NOT NULL,
+            foto_hash TEXT NOT NULL,
+            miniatura BLOB,
+            FOREIGN KEY (empleado_codigo) REFERENCES empleados (codigo) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fotos_empleado_codigo ON fotos_empleado (empleado_codigo)")
+
+    columnas = [fila[1] for fila in cursor.execute("PRAGMA table_info(empleados)")]
+    if 'foto_hash' not in columnas:
+        cursor.execute("ALTER TABLE empleados ADD COLUMN foto_hash TEXT")
+    if 'miniatura' not in columnas:
+        cursor.execute("ALTER TABLE empleados ADD COLUMN miniatura BLOB")
+    if 'foto_original' not in columnas:
+        cursor.execute("ALTER TABLE empleados ADD COLUMN foto_original BLOB")
+    cursor.execute("SELECT codigo, foto FROM empleados WHERE foto_hash IS NULL")
+    for codigo, foto in cursor.fetchall():
         cursor.execute(
-            "INSERT INTO empleados (codigo, nombre, apellidos, foto) VALUES (?, ?, ?, ?)",
-            (codigo, nombre, apellidos, foto_blob)
+            "UPDATE empleados SET foto_hash = ? WHERE codigo = ?",
+            (calcular_hash_foto(foto), codigo)
+        )
+
+def _migrar_fecha_asistencia(cursor):
+    """
+    v2: columna 'fecha' (fecha local del evento, 'AAAA-MM-DD') e índices para
+    que las consultas del dashboard busquen por rango en vez de recorrer toda
+    la tabla con DATE(timestamp). 'timestamp' se guarda en UTC.
+    """
+    cursor.execute("ALTER TABLE asistencia ADD COLUMN fecha TEXT")
+    cursor.execute("UPDATE asistencia SET fecha = DATE(timestamp, 'localtime')")
+    # Contadores y gráfico del dashboard: por día y tipo, con el empleado en el índice.
+    cursor.execute("CREATE INDEX idx_asistencia_fecha_tipo_empleado ON asistencia (fecha, tipo, empleado_codigo)")
+    # Historial de un empleado en orden cronológico.
+    cursor.execute("CREATE INDEX idx_asistencia_empleado_timestamp ON asistencia (empleado_codigo, timestamp)")
+
+def _migrar_almacen_fotos(cursor):
+    """
+    v3: las imágenes (foto, miniatura y foto original) salen de 'empleados' y
+    'fotos_empleado' a la tabla 'fotos', direccionada por el hash SHA-256 del
+    contenido. Las tablas de empleados quedan con filas pequeñas (solo los
+    hashes), que se recorren sin arrastrar páginas de imágenes.
+    """
+    cursor.connection.create_function("hash_foto", 1, lambda blob: calcular_hash_foto(blob) if blob else None)
+    cursor.execute("""
+        CREATE TABLE fotos (
+            hash TEXT PRIMARY KEY,
+            datos BLOB NOT NULL
+        )
+    """)
+    for tabla, columna, columna_hash in (
+        ('empleados', 'foto', 'foto_hash'),
+        ('empleados', 'miniatura', 'hash_foto(miniatura)'),
+        ('empleados', 'foto_original', 'hash_foto(foto_original)'),
+        ('fotos_empleado', 'foto', 'foto_hash'),
+        ('fotos_empleado', 'miniatura', 'hash_foto(miniatura)'),
+    ):
+        cursor.execute(f"INSERT OR IGNORE INTO fotos (hash, datos) SELECT {columna_hash}, {columna} FROM {tabla} WHERE {columna} IS NOT NULL")
+
+    # SQLite no quita columnas con ALTER TABLE en todas las versiones: se
+    # reconstruye cada tabla (crear la nueva, copiar, borrar y renombrar).
+    cursor.execute("""
+        CREATE TABLE empleados_nueva (
+            codigo TEXT(8) PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            apellidos TEXT NOT NULL,
+            foto_hash TEXT NOT NULL,
+            miniatura_hash TEXT,
+            foto_original_hash TEXT
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO empleados_nueva (codigo, nombre, apellidos, foto_hash, miniatura_hash, foto_original_hash)
+        SELECT codigo, nombre, apellidos, foto_hash, hash_foto(miniatura), hash_foto(foto_original) FROM empleados
+    """)
+    cursor.execute("DROP TABLE empleados")
+    cursor.execute("ALTER TABLE empleados_nueva RENAME TO empleados")
+
+    cursor.execute("""
+        CREATE TABLE fotos_empleado_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            empleado_codigo TEXT(8) NOT NULL,
+            foto_hash TEXT NOT NULL,
+            miniatura_hash TEXT,
+            FOREIGN KEY (empleado_codigo) REFERENCES empleados (codigo) ON DELETE CASCADE
         )
-        conn.commit()
-        return True
+    """)
+    cursor.execute("""
+        INSERT INTO fotos_empleado_nueva (id, empleado_codigo, foto_hash, miniatura_hash)
+        SELECT id, empleado_codigo, foto_hash, hash_foto(miniatura) FROM fotos_empleado
+    """)
+    cursor.execute("DROP TABLE fotos_empleado")
+    cursor.execute("ALTER TABLE fotos_empleado_nueva RENAME TO fotos_empleado")
+    cursor.execute("CREATE INDEX idx_fotos_empleado_codigo ON fotos_empleado (empleado_codigo)")
+
+MIGRACIONES = (_migrar_fotos, _migrar_fecha_asistencia, _migrar_almacen_fotos)
+# Tras migrar, se compacta el archivo si al menos esta fracción de sus páginas quedó libre.
+FRACCION_LIBRE_VACUUM = 0.25
+VERSION_ESQUEMA = len(MIGRACIONES)
+
+def obtener_version_esquema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def aplicar_migraciones(conn):
+    """
+    Aplica en orden las migraciones pendientes, cada una en su propia
+    transacción junto con el nuevo user_version: si falla, la base queda en la
+    versión anterior. Retorna la versión final del esquema.
+    """
+    version = obtener_version_esquema(conn)
+    if version > VERSION_ESQUEMA:
+        print(f"Advertencia: la base de datos tiene la versión {version} del esquema, más nueva que esta aplicación ({VERSION_ESQUEMA}).")
+    for numero in range(version + 1, VERSION_ESQUEMA + 1):
+        with conn:
+            # BEGIN IMMEDIATE toma el bloqueo de escritura: si otro proceso está
+            # migrando, se espera y luego se comprueba si la migración ya se aplicó.
+            conn.execute("BEGIN IMMEDIATE")
+            if obtener_version_esquema(conn) >= numero:
+                continue
+            inicio = time.perf_counter()
+            MIGRACIONES[numero - 1](conn.cursor())
+            conn.execute(f"PRAGMA user_version = {numero}")
+        print(f"Base de datos actualizada a la versión {numero} del esquema ({time.perf_counter() - inicio:.1f} s).")
+    if version < VERSION_ESQUEMA:
+        _compactar_si_hace_falta(conn)
+    return obtener_version_esquema(conn)
+
+def _compactar_si_hace_falta(conn):
+    """Ejecuta VACUUM si una migración dejó libre buena parte del archivo (p. ej. al mover las fotos)."""
+    paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+    libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if paginas and libres / paginas >= FRACCION_LIBRE_VACUUM:
+        inicio = time.perf_counter()
+        conn.execute("VACUUM")
+        print(f"Base de datos compactada: {libres} de {paginas} páginas libres ({time.perf_counter() - inicio:.1f} s).")
+
+def calcular_hash_foto(foto_blob):
+    """Calcula el hash SHA-256 (hexadecimal) del BLOB de una foto."""
+    return hashlib.sha256(foto_blob).hexdigest()
+
+def _guardar_foto(cursor, foto_blob):
+    """
+    Guarda el BLOB en la tabla 'fotos' (una sola vez por contenido) y retorna
+    su hash, o None si no hay foto.
+    """
+    if foto_blob is None:
+        return None
+    foto_hash = calcular_hash_foto(foto_blob)
+    cursor.execute("INSERT OR IGNORE INTO fotos (hash, datos) VALUES (?, ?)", (foto_hash, foto_blob))
+    return foto_hash
+
+def _borrar_fotos_sin_uso(cursor, hashes):
+    """Borra de 'fotos' las de `hashes` que ya no usa ningún empleado ni foto adicional."""
+    for foto_hash in set(hashes) - {None}:
+        cursor.execute("""
+            DELETE FROM fotos WHERE hash = ?1
+            AND NOT EXISTS (SELECT 1 FROM empleados WHERE ?1 IN (foto_hash, miniatura_hash, foto_original_hash))
+            AND NOT EXISTS (SELECT 1 FROM fotos_empleado WHERE ?1 IN (foto_hash, miniatura_hash))
+        """, (foto_hash,))
+
+def obtener_foto(foto_hash):
+    """Recupera el BLOB de una foto por su hash. Retorna None si no existe."""
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT datos FROM fotos WHERE hash = ?", (foto_hash,))
+            resultado = cursor.fetchone()
+            return resultado[0] if resultado else None
+    except sqlite3.Error as e:
+        print(f"Error al obtener la foto: {e}")
+        return None
+
+def agregar_empleado(codigo, nombre, apellidos, foto_blob, miniatura=None, foto_original=None):
+    """
+    Agrega un nuevo empleado a la base de datos. `foto_blob` es el recorte del
+    rostro; `miniatura` y `foto_original` (resolución completa) son opcionales.
+    Retorna True si fue exitoso, False si ocurrió un error (ej. código duplicado).
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            # Las imágenes van a la tabla 'fotos'; el empleado solo guarda sus hashes.
+            cursor.execute(
+                "INSERT INTO empleados (codigo, nombre, apellidos, foto_hash, miniatura_hash, foto_original_hash) VALUES (?, ?, ?, ?, ?, ?)",
+                (codigo, nombre, apellidos, _guardar_foto(cursor, foto_blob),
+                 _guardar_foto(cursor, miniatura), _guardar_foto(cursor, foto_original))
+            )
+            return True
     except sqlite3.IntegrityError:
         # Este error ocurre si el 'codigo' (PRIMARY KEY) ya existe.
         print(f"Error: El código de empleado '{codigo}' ya existe.")
@@ -73,9 +358,6 @@ def agregar_empleado(codigo, nombre, apellidos, foto_blob):
     except sqlite3.Error as e:
         print(f"Error al agregar empleado: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def eliminar_empleado_por_codigo(codigo):
     """
@@ -83,19 +365,30 @@ def eliminar_empleado_por_codigo(codigo):
     Retorna True si fue exitoso, False si no.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # Gracias a ON DELETE CASCADE, los registros de asistencia se borrarán automáticamente.
-        cursor.execute("DELETE FROM empleados WHERE codigo = ?", (codigo,))
-        conn.commit()
-        # Verificar si la eliminación tuvo efecto
-        return cursor.rowcount > 0
+        with conexion() as conn:
+            cursor = conn.cursor()
+            hashes = [h for fila in cursor.execute(
+                "SELECT foto_hash, miniatura_hash, foto_original_hash FROM empleados WHERE codigo = ?"
+                " UNION ALL SELECT foto_hash, miniatura_hash, NULL FROM fotos_empleado WHERE empleado_codigo = ?",
+                (codigo, codigo)
+            ) for h in fila]
+            # Gracias a ON DELETE CASCADE, los registros de asistencia se borrarán automáticamente.
+            cursor.execute("DELETE FROM empleados WHERE codigo = ?", (codigo,))
+            eliminado = cursor.rowcount > 0
+            # Las claves foráneas no están activadas, así que las fotos adicionales se borran aparte.
+            cursor.execute("DELETE FROM fotos_empleado WHERE empleado_codigo = ?", (codigo,))
+            _borrar_fotos_sin_uso(cursor, hashes)
+            # Borrar los embeddings que ya no pertenecen a ninguna foto.
+            cursor.execute("""
+                DELETE FROM embeddings_rostro
+                WHERE foto_hash NOT IN (SELECT foto_hash FROM empleados WHERE foto_hash IS NOT NULL)
+                AND foto_hash NOT IN (SELECT foto_hash FROM fotos_empleado)
+            """)
+            # Verificar si la eliminación tuvo efecto
+            return eliminado
     except sqlite3.Error as e:
         print(f"Error al eliminar empleado: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def obtener_todos_los_empleados():
     """
@@ -103,17 +396,14 @@ def obtener_todos_los_empleados():
     Retorna una lista de tuplas.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT codigo, nombre, apellidos FROM empleados ORDER BY apellidos, nombre")
-        empleados = cursor.fetchall()
-        return empleados
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT codigo, nombre, apellidos FROM empleados ORDER BY apellidos, nombre")
+            empleados = cursor.fetchall()
+            return empleados
     except sqlite3.Error as e:
         print(f"Error al obtener los empleados: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def obtener_foto_por_codigo(codigo):
     """
@@ -121,38 +411,143 @@ def obtener_foto_por_codigo(codigo):
     Retorna el BLOB o None si no se encuentra.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT foto FROM empleados WHERE codigo = ?", (codigo,))
-        resultado = cursor.fetchone()
-        return resultado[0] if resultado else None
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT f.datos FROM empleados e JOIN fotos f ON f.hash = e.foto_hash WHERE e.codigo = ?", (codigo,))
+            resultado = cursor.fetchone()
+            return resultado[0] if resultado else None
     except sqlite3.Error as e:
         print(f"Error al obtener la foto: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
+
+def obtener_empleados_con_embedding(version):
+    """
+    Recupera en una sola consulta todos los empleados junto con el embedding
+    en caché de su foto para la versión de codificador indicada.
+    Retorna una lista de tuplas (codigo, nombre, apellidos, foto_hash, encoding);
+    `encoding` es None si la foto aún no fue codificada con esa versión.
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT e.codigo, e.nombre, e.apellidos, e.foto_hash, r.encoding
+                FROM empleados e
+                LEFT JOIN embeddings_rostro r
+                    ON r.foto_hash = e.foto_hash AND r.version = ?
+            """, (version,))
+            return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Error al obtener los embeddings de los empleados: {e}")
+        return []
+
+def agregar_foto_empleado(codigo, foto_blob, miniatura=None):
+    """
+    Agrega una foto de referencia adicional a un empleado existente.
+    Retorna True si fue exitoso, False si no (ej. el empleado no existe).
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM empleados WHERE codigo = ?", (codigo,))
+            if cursor.fetchone() is None:
+                print(f"Error: No existe un empleado con el código '{codigo}'.")
+                return False
+            cursor.execute(
+                "INSERT INTO fotos_empleado (empleado_codigo, foto_hash, miniatura_hash) VALUES (?, ?, ?)",
+                (codigo, _guardar_foto(cursor, foto_blob), _guardar_foto(cursor, miniatura))
+            )
+            return True
+    except sqlite3.Error as e:
+        print(f"Error al agregar la foto del empleado: {e}")
+        return False
+
+def obtener_fotos_adicionales_con_embedding(version):
+    """
+    Recupera en una sola consulta las fotos adicionales de todos los empleados
+    junto con su embedding en caché para la versión de codificador indicada.
+    Retorna una lista de tuplas (codigo, id_foto, foto_hash, encoding), en el
+    orden en que se agregaron; `encoding` es None si aún no fue codificada.
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT f.empleado_codigo, f.id, f.foto_hash, r.encoding
+                FROM fotos_empleado f
+                LEFT JOIN embeddings_rostro r
+                    ON r.foto_hash = f.foto_hash AND r.version = ?
+                ORDER BY f.empleado_codigo, f.id
+            """, (version,))
+            return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Error al obtener los embeddings de las fotos adicionales: {e}")
+        return []
+
+def obtener_foto_adicional(id_foto):
+    """Recupera el BLOB de una foto adicional por su id. Retorna None si no existe."""
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT f.datos FROM fotos_empleado e JOIN fotos f ON f.hash = e.foto_hash WHERE e.id = ?", (id_foto,))
+            resultado = cursor.fetchone()
+            return resultado[0] if resultado else None
+    except sqlite3.Error as e:
+        print(f"Error al obtener la foto adicional: {e}")
+        return None
+
+def obtener_embedding(foto_hash, version):
+    """
+    Recupera el embedding en caché de una foto para una versión de codificador.
+    Retorna el BLOB (b"" si la foto no tenía rostro) o None si no está en caché.
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT encoding FROM embeddings_rostro WHERE foto_hash = ? AND version = ?",
+                (foto_hash, version)
+            )
+            resultado = cursor.fetchone()
+            return resultado[0] if resultado else None
+    except sqlite3.Error as e:
+        print(f"Error al obtener el embedding: {e}")
+        return None
+
+def guardar_embedding(foto_hash, version, encoding_blob):
+    """
+    Guarda (o reemplaza) el embedding de una foto para una versión de codificador.
+    Retorna True si fue exitoso, False si no.
+    """
+    try:
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO embeddings_rostro (foto_hash, version, encoding) VALUES (?, ?, ?)",
+                (foto_hash, version, encoding_blob)
+            )
+            return True
+    except sqlite3.Error as e:
+        print(f"Error al guardar el embedding: {e}")
+        return False
 
 def registrar_asistencia(empleado_codigo, tipo, casco_ok, chaleco_ok):
     """
-    Registra un evento de asistencia para un empleado.
+    Registra un evento de asistencia para un empleado, con la fecha local
+    del momento (el timestamp queda en UTC).
     `casco_ok` y `chaleco_ok` deben ser 0 (NO) o 1 (OK).
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO asistencia (empleado_codigo, tipo, casco, chaleco) VALUES (?, ?, ?, ?)",
-            (empleado_codigo, tipo, casco_ok, chaleco_ok)
-        )
-        conn.commit()
-        return True
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO asistencia (empleado_codigo, tipo, casco, chaleco, fecha) VALUES (?, ?, ?, ?, DATE('now', 'localtime'))",
+                (empleado_codigo, tipo, casco_ok, chaleco_ok)
+            )
+            return True
     except sqlite3.Error as e:
         print(f"Error al registrar asistencia: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def obtener_reporte_asistencia():
     """
@@ -161,108 +556,93 @@ def obtener_reporte_asistencia():
     (codigo, nombre, apellidos, timestamp, tipo, casco, chaleco)
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT
-                e.codigo,
-                e.nombre,
-                e.apellidos,
-                a.timestamp,
-                a.tipo,
-                a.casco,
-                a.chaleco
-            FROM asistencia a
-            JOIN empleados e ON a.empleado_codigo = e.codigo
-            ORDER BY a.timestamp DESC
-        """)
-        reporte = cursor.fetchall()
-        return reporte
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    e.codigo,
+                    e.nombre,
+                    e.apellidos,
+                    a.timestamp,
+                    a.tipo,
+                    a.casco,
+                    a.chaleco
+                FROM asistencia a
+                JOIN empleados e ON a.empleado_codigo = e.codigo
+                ORDER BY a.timestamp DESC
+            """)
+            reporte = cursor.fetchall()
+            return reporte
     except sqlite3.Error as e:
         print(f"Error al obtener el reporte de asistencia: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 # --- Funciones para el Dashboard ---
 
 def contar_total_empleados():
     """Cuenta el número total de empleados registrados."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(codigo) FROM empleados")
-        total = cursor.fetchone()[0]
-        return total
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(codigo) FROM empleados")
+            total = cursor.fetchone()[0]
+            return total
     except sqlite3.Error as e:
         print(f"Error al contar empleados: {e}")
         return 0
-    finally:
-        if conn:
-            conn.close()
 
 def contar_asistencias_hoy():
     """Cuenta cuántos empleados únicos han marcado 'entrada' hoy."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT COUNT(DISTINCT empleado_codigo) 
-            FROM asistencia 
-            WHERE DATE(timestamp) = DATE('now', 'localtime') AND tipo = 'entrada'
-        """)
-        total = cursor.fetchone()[0]
-        return total
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(DISTINCT empleado_codigo) 
+                FROM asistencia 
+                WHERE fecha = DATE('now', 'localtime') AND tipo = 'entrada'
+            """)
+            total = cursor.fetchone()[0]
+            return total
     except sqlite3.Error as e:
         print(f"Error al contar asistencias de hoy: {e}")
         return 0
-    finally:
-        if conn:
-            conn.close()
 
 def contar_incidentes_epp_hoy():
     """Cuenta los registros de 'entrada' de hoy donde faltó casco o chaleco."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT COUNT(id) 
-            FROM asistencia 
-            WHERE DATE(timestamp) = DATE('now', 'localtime') 
-            AND tipo = 'entrada' 
-            AND (casco = 0 OR chaleco = 0)
-        """)
-        total = cursor.fetchone()[0]
-        return total
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(id) 
+                FROM asistencia 
+                WHERE fecha = DATE('now', 'localtime') 
+                AND tipo = 'entrada' 
+                AND (casco = 0 OR chaleco = 0)
+            """)
+            total = cursor.fetchone()[0]
+            return total
     except sqlite3.Error as e:
         print(f"Error al contar incidentes de EPP de hoy: {e}")
         return 0
-    finally:
-        if conn:
-            conn.close()
 
 def obtener_asistencia_ultimos_7_dias():
     """Recupera el conteo de asistencias únicas por día de los últimos 7 días."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 
-                strftime('%Y-%m-%d', timestamp) as dia,
-                COUNT(DISTINCT empleado_codigo) as total_asistencias
-            FROM asistencia
-            WHERE DATE(timestamp) >= DATE('now', '-6 days', 'localtime') AND tipo = 'entrada'
-            GROUP BY dia
-            ORDER BY dia ASC
-        """)
-        return cursor.fetchall()
+        with conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT 
+                    fecha as dia,
+                    COUNT(DISTINCT empleado_codigo) as total_asistencias
+                FROM asistencia
+                WHERE fecha >= DATE('now', '-6 days', 'localtime') AND tipo = 'entrada'
+                GROUP BY fecha
+                ORDER BY fecha ASC
+            """)
+            return cursor.fetchall()
     except sqlite3.Error as e:
         print(f"Error al obtener asistencia de los últimos 7 días: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 if __name__ == '__main__':
     # Si se ejecuta este archivo directamente, crea la base de datos.
@@ -0,0 +1,116 @@
+import collections
+import io
+import threading
+from PIL import Image, ImageTk
+from conexion.database import obtener_foto_por_codigo
+
+# Miniaturas listas para mostrar que se conservan (las menos usadas se descartan).
+CAPACIDAD_CACHE_MINIATURAS = 64
+# Empleados a cada lado de la selección que se decodifican por adelantado.
+VECINOS_PRECARGA = 3
+
+def decodificar_miniatura(foto_blob, tamano):
+    """Decodifica el BLOB de una foto y la reduce para caber en `tamano` (ancho, alto)."""
+    img = Image.open(io.BytesIO(foto_blob))
+    img.draft('RGB', tamano) # En JPEG, decodifica directamente a una escala reducida
+    img.thumbnail(tamano, Image.Resampling.LANCZOS)
+    img.load()
+    return img
+
+class CacheMiniaturas:
+    """
+    Caché LRU de las fotos de empleados ya reducidas, por (código, tamaño).
+    Un hilo en segundo plano lee y decodifica por adelantado las fotos de los
+    vecinos de la selección; como Tk solo admite crear imágenes desde su hilo,
+    la PhotoImage se crea al pedirla por primera vez con `obtener`.
+    """
+    def __init__(self, capacidad=CAPACIDAD_CACHE_MINIATURAS, leer_foto=obtener_foto_por_codigo):
+        self.capacidad = capacidad
+        self.leer_foto = leer_foto
+        self._entradas = collections.OrderedDict() # (codigo, tamano) -> PhotoImage o PIL.Image
+        self._lock = threading.Lock()
+        # Se incrementa al invalidar un código: descarta decodificaciones en curso de la foto anterior.
+        self._generaciones = collections.Counter()
+        self._pendientes = []
+        # PhotoImage expulsadas por el hilo de precarga: se liberan desde el hilo de Tk.
+        self._descartadas = []
+        self._hay_trabajo = threading.Condition(self._lock)
+        self._hilo = None
+
+    def obtener(self, codigo, tamano):
+        """
+        Retorna la PhotoImage de la foto del empleado reducida a `tamano`, o
+        None si no tiene foto. Si no estaba en caché la decodifica en el momento.
+        """
+        clave = (codigo, tamano)
+        with self._lock:
+            self._descartadas.clear()
+            generacion = self._generaciones[codigo]
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+        if entrada is None:
+            entrada = self._decodificar(codigo, tamano, generacion)
+            if entrada is None:
+                return None
+        if not isinstance(entrada, ImageTk.PhotoImage):
+            entrada = ImageTk.PhotoImage(entrada)
+            self._guardar(clave, entrada, generacion)
+        return entrada
+
+    def precargar(self, codigos, tamano):
+        """
+        Reemplaza la lista de fotos por decodificar en segundo plano (en orden
+        de prioridad): solo interesan los vecinos de la selección actual.
+        """
+        with self._hay_trabajo:
+            self._pendientes = [(codigo, tamano) for codigo in codigos if (codigo, tamano) not in self._entradas]
+            if self._pendientes:
+                if self._hilo is None:
+                    self._hilo = threading.Thread(target=self._precargar, name="precarga-miniaturas", daemon=True)
+                    self._hilo.start()
+                self._hay_trabajo.notify()
+
+    def invalidar(self, codigo):
+        """Descarta las miniaturas de un empleado (al eliminarlo o registrarlo de nuevo)."""
+        with self._lock:
+            self._generaciones[codigo] += 1
+            for clave in [clave for clave in self._entradas if clave[0] == codigo]:
+                del self._entradas[clave]
+
+    def _decodificar(self, codigo, tamano, generacion):
+        """Lee y reduce la foto; la guarda como PIL.Image salvo que se haya invalidado entretanto."""
+        foto_blob = self.leer_foto(codigo)
+        if not foto_blob:
+            return None
+        img = decodificar_miniatura(foto_blob, tamano)
+        self._guardar((codigo, tamano), img, generacion) # Si la foto ya se reemplazó, se usa pero no se guarda
+        return img
+
+    def _guardar(self, clave, entrada, generacion=None):
+        with self._lock:
+            if generacion is not None and self._generaciones[clave[0]] != generacion:
+                return
+            actual = self._entradas.get(clave)
+            if isinstance(actual, ImageTk.PhotoImage) and not isinstance(entrada, ImageTk.PhotoImage):
+                return # No reemplazar una PhotoImage ya creada por la PIL.Image equivalente
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                _, expulsada = self._entradas.popitem(last=False)
+                if isinstance(expulsada, ImageTk.PhotoImage):
+                    self._descartadas.append(expulsada)
+
+    def _precargar(self):
+        while True:
+            with self._hay_trabajo:
+                while not self._pendientes:
+                    self._hay_trabajo.wait()
+                codigo, tamano = self._pendientes.pop(0)
+                if (codigo, tamano) in self._entradas:
+                    continue
+                generacion = self._generaciones[codigo]
+            try:
+                self._decodificar(codigo, tamano, generacion)
+            except Exception as e:
+                print(f"Error al precargar la foto de '{codigo}': {e}")
@@ -1,37 +1,79 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-import cv2
-from PIL import Image, ImageTk
-import threading
-import time
-from logica.reconocimiento import ReconocimientoFacialEPP
+from interfaz.visor_video import VisorVideo
+from logica.planificador import PlanificadorInferencia
+from logica.camaras import GestorCamaras, FUENTES_CAMARA
+from logica.metricas import METRICAS, ExportadorMetricas, dibujar_metricas
 from tkinter import messagebox
 
 class PanelAsistencia(ttk.Frame):
     def __init__(self, parent, controlador):
         super().__init__(parent)
         self.controlador = controlador
-        self.reconocimiento_epp = ReconocimientoFacialEPP()
+        self.galeria = controlador.galeria
+        # Los modelos se cargan en segundo plano en el registro del controlador
+        # (ver logica.precarga); el planificador y las cámaras se crean cuando están listos.
+        self.servicio_inferencia = None
+        self.reconocimiento_epp = None
+        self.planificador = None
+        self.camaras = None
+        self._version_galeria = self.galeria.version
+        self._espera_modelos = None
         
-        self.hilo_camara = None
         self.camara_activa = False
-        self.cap = None
         self.latest_frame = None
         self.latest_detections = None
+        self.metricas = METRICAS
+        self.exportador_metricas = None
 
         self._crear_layout()
         # NO iniciar la cámara en el constructor
-        self.bind("<Destroy>", self._liberar_recursos)
+        self.bind("<Destroy>", self._al_destruir)
 
     def activate(self):
-        """Activa el panel: recarga caras y enciende la cámara."""
+        """Activa el panel: espera a los modelos, sincroniza la galería si cambió y enciende la cámara."""
         print("Activando panel de asistencia...")
-        self.reconocimiento_epp.recargar_caras_conocidas()
+        self._esperar_modelos()
+
+    def _esperar_modelos(self):
+        precarga = self.controlador.obtener_precarga()
+        if precarga.cargando:
+            for visor in self.visores:
+                visor.limpiar("Cargando modelos de reconocimiento...")
+            self._espera_modelos = self.after(200, self._esperar_modelos)
+            return
+        self._espera_modelos = None
+        if precarga.reconocimiento is None:
+            for visor in self.visores:
+                visor.limpiar("No se pudieron cargar los modelos de reconocimiento.")
+            return
+        if self.planificador is None:
+            registro = self.controlador.modelos
+            self.reconocimiento_epp = registro.adquirir('inferencia')
+            self.servicio_inferencia = self.reconocimiento_epp if registro.usar_procesos else None
+            # EPP y rostros se procesan en hilos propios, cada uno a su frecuencia;
+            # los frames de todas las cámaras comparten el mismo detector por lotes.
+            self.planificador = PlanificadorInferencia(self.reconocimiento_epp)
+            # Las cámaras son del controlador: al cambiar de panel no se cierran
+            self.camaras = GestorCamaras(FUENTES_CAMARA, self.planificador.publicar_frame,
+                                         servicio=self.controlador.obtener_camaras())
+
+        galeria = self.galeria
+        if galeria.version != self._version_galeria:
+            # La galería ya se actualizó de forma incremental; solo hay que descartar
+            # los resultados mostrados, que pueden ser de un empleado eliminado.
+            self._version_galeria = galeria.version
+            if self.servicio_inferencia:
+                self.servicio_inferencia.notificar_cambio_galeria()
+            self.reset_panel()
         self.iniciar_camara()
 
     def deactivate(self):
         """Desactiva el panel: apaga la cámara."""
         print("Desactivando panel de asistencia...")
+        if self._espera_modelos:
+            self.after_cancel(self._espera_modelos)
+            self._espera_modelos = None
         self._liberar_recursos()
 
     def _crear_layout(self):
@@ -78,63 +120,70 @@ class PanelAsistencia(ttk.Frame):
         )
         self.btn_marcar_asistencia.grid(row=len(campos)+2, column=0, columnspan=2, pady=(40, 0), sticky="ew")
 
+        # Superpone en el video los FPS y la latencia de cada etapa del pipeline
+        self.var_metricas = ttk.BooleanVar(value=False)
+        check_metricas = ttk.Checkbutton(form_frame, text="Mostrar métricas", variable=self.var_metricas, bootstyle="info-round-toggle")
+        check_metricas.grid(row=len(campos)+3, column=0, columnspan=2, pady=(20, 0), sticky="w")
+
         cam_frame = ttk.Frame(main_frame, padding=20)
         cam_frame.grid(row=0, column=1, sticky="nsew")
-        cam_frame.rowconfigure(0, weight=1)
-        cam_frame.columnconfigure(0, weight=1)
 
-        self.label_camara = ttk.Label(cam_frame, text="Iniciando Cámara...", anchor=CENTER, background="#2b2b2b")
-        self.label_camara.grid(row=0, column=0, sticky="nsew")
+        # Una vista por cámara: una sola ocupa todo el espacio; más de una, en cuadrícula de 2 columnas.
+        columnas = 1 if len(FUENTES_CAMARA) == 1 else 2
+        self.labels_camara = []
+        for canal in range(len(FUENTES_CAMARA)):
+            fila, columna = divmod(canal, columnas)
+            cam_frame.rowconfigure(fila, weight=1)
+            cam_frame.columnconfigure(columna, weight=1)
+            label = ttk.Label(cam_frame, text="Iniciando Cámara...", anchor=CENTER, background="#2b2b2b")
+            label.grid(row=fila, column=columna, sticky="nsew", padx=2, pady=2)
+            self.labels_camara.append(label)
+        self.label_camara = self.labels_camara[0]
+        self.visores = [VisorVideo(label) for label in self.labels_camara]
 
     def iniciar_camara(self):
         if not self.camara_activa:
             self.camara_activa = True
-            self.hilo_camara = threading.Thread(target=self._video_loop, daemon=True)
-            self.hilo_camara.start()
+            self.planificador.iniciar()
+            self.camaras.abrir()
+            self.exportador_metricas = ExportadorMetricas(self.metricas)
+            self.exportador_metricas.start()
             # Iniciar el bucle de actualización de la UI
             self.after(100, self._update_ui_loop)
 
-    def _video_loop(self):
-        """Bucle de video que se ejecuta en un hilo separado."""
-        self.cap = cv2.VideoCapture(0, cv2.CAP_MSMF)
-        if not self.cap.isOpened():
-            print("Error: No se pudo abrir la cámara.") # This should appear in the console if it fails.
-            self.camara_activa = False
-            return
-
-        while self.camara_activa:
-            ret, frame = self.cap.read()
-            if ret:
-                # Procesar el frame y guardar los resultados
-                self.latest_frame, self.latest_detections = self.reconocimiento_epp.reconocer_y_detectar(frame)
-            else:
-                # Si no se puede leer el frame, esperar un poco
-                time.sleep(0.1)
-        
-        if self.cap.isOpened():
-            self.cap.release()
-
     def _update_ui_loop(self):
         """Bucle que se ejecuta en el hilo principal para actualizar la UI."""
-        if self.latest_frame is not None:
-            self._mostrar_frame_en_label(self.latest_frame)
+        # Siempre el frame más nuevo de cada cámara, con las últimas anotaciones disponibles;
+        # solo se redibuja si llegó un frame o un resultado nuevo.
+        detecciones_panel = None
+        mostrar_metricas = self.var_metricas.get()
+        for canal, visor in enumerate(self.visores):
+            frame, anotar, detecciones, version = self.planificador.obtener_para_mostrar(canal)
+            if frame is None:
+                continue
+            if mostrar_metricas:
+                # Las métricas cambian en cada tick: se redibuja siempre
+                anotar_frame = anotar
+                def anotar(imagen, escala, anotar_frame=anotar_frame):
+                    anotar_frame(imagen, escala)
+                    dibujar_metricas(imagen, self.metricas)
+                version = None
+            with self.metricas.medir('mostrar'):
+                redibujado = visor.mostrar(frame, version, anotar)
+            if redibujado:
+                self.metricas.marcar_frame('mostrados')
+            if detecciones['codigo_reconocido']:
+                self.controlador.registrar_hito('primer_reconocimiento')
+            # El formulario muestra la primera cámara que reconoce a un empleado.
+            if detecciones_panel is None or (detecciones['codigo_reconocido'] and not detecciones_panel['codigo_reconocido']):
+                self.latest_frame, detecciones_panel = frame, detecciones
+        if detecciones_panel is not None:
+            self.latest_detections = detecciones_panel
             self._actualizar_estado_deteccion(self.latest_detections)
         
         if self.camara_activa:
             self.after(30, self._update_ui_loop) # Repetir cada ~30ms
 
-    def _mostrar_frame_en_label(self, frame_cv2):
-        frame_rgb = cv2.cvtColor(frame_cv2, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(frame_rgb)
-        
-        w, h = self.label_camara.winfo_width(), self.label_camara.winfo_height()
-        if w > 1 and h > 1:
-            img.thumbnail((w, h), Image.Resampling.LANCZOS)
-
-        photo = ImageTk.PhotoImage(image=img)
-        self.label_camara.config(image=photo)
-        self.label_camara.image = photo
-
     def _actualizar_estado_deteccion(self, detecciones):
         if not detecciones: return
 
@@ -167,6 +216,8 @@ class PanelAsistencia(ttk.Frame):
     def reset_panel(self):
         self.latest_frame = None
         self.latest_detections = None
+        if self.planificador:
+            self.planificador.reiniciar()
         self.vars['var_codigo'].set("")
         self.vars['var_nombre_completo'].set("")
         self.vars['var_casco'].set("")
@@ -176,5 +227,16 @@ class PanelAsistencia(ttk.Frame):
 
     def _liberar_recursos(self, event=None):
         self.camara_activa = False
-        if self.hilo_camara and self.hilo_camara.is_alive():
-            self.hilo_camara.join(timeout=1)
+        if self.camaras:
+            self.camaras.cerrar()
+        if self.planificador:
+            self.planificador.detener()
+        if self.exportador_metricas:
+            self.exportador_metricas.detener()
+            self.exportador_metricas = None
+
+    def _al_destruir(self, event=None):
+        self._liberar_recursos()
+        if self.reconocimiento_epp is not None:
+            self.controlador.modelos.liberar('inferencia')
+            self.reconocimiento_epp = None
@@ -6,8 +6,6 @@ from conexion.database import (
     contar_incidentes_epp_hoy, 
     obtener_asistencia_ultimos_7_dias
 )
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from datetime import date, timedelta
 
 class PanelInicio(ttk.Frame):
@@ -15,7 +13,19 @@ class PanelInicio(ttk.Frame):
         super().__init__(parent)
         self.parent = parent
         self.controlador = controlador
-        
+        self.canvas_semanal = None
+        self.canvas_epp = None
+
+        self.crear_widgets()
+        self.actualizar_dashboard()
+        # matplotlib tarda en importarse: los gráficos se crean cuando la ventana
+        # ya está visible, para no retrasar su aparición.
+        self.after_idle(self._crear_graficos)
+
+    def _crear_graficos(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         # Estilo para los gráficos
         plt.style.use('seaborn-v0_8-bright') 
 
@@ -23,7 +33,12 @@ class PanelInicio(ttk.Frame):
         self.fig_semanal, self.ax_semanal = plt.subplots(figsize=(7, 3.5), dpi=100)
         self.fig_epp, self.ax_epp = plt.subplots(figsize=(4, 3.5), dpi=100)
 
-        self.crear_widgets()
+        self.lbl_cargando_semanal.destroy()
+        self.lbl_cargando_epp.destroy()
+        self.canvas_semanal = FigureCanvasTkAgg(self.fig_semanal, master=self.semanal_frame)
+        self.canvas_semanal.get_tk_widget().pack(expand=True, fill=BOTH)
+        self.canvas_epp = FigureCanvasTkAgg(self.fig_epp, master=self.epp_frame)
+        self.canvas_epp.get_tk_widget().pack(expand=True, fill=BOTH)
         self.actualizar_dashboard()
 
     def crear_widgets(self):
@@ -54,18 +69,16 @@ class PanelInicio(ttk.Frame):
         graficos_frame.rowconfigure(0, weight=1)
 
         # Gráfico de Asistencia Semanal
-        semanal_frame = ttk.Labelframe(graficos_frame, text="Asistencia de los Últimos 7 Días", padding=15)
-        semanal_frame.grid(row=0, column=0, padx=(0, 10), sticky="nsew")
-        
-        self.canvas_semanal = FigureCanvasTkAgg(self.fig_semanal, master=semanal_frame)
-        self.canvas_semanal.get_tk_widget().pack(expand=True, fill=BOTH)
+        self.semanal_frame = ttk.Labelframe(graficos_frame, text="Asistencia de los Últimos 7 Días", padding=15)
+        self.semanal_frame.grid(row=0, column=0, padx=(0, 10), sticky="nsew")
+        self.lbl_cargando_semanal = ttk.Label(self.semanal_frame, text="Cargando gráfico...", anchor=CENTER)
+        self.lbl_cargando_semanal.pack(expand=True, fill=BOTH)
 
         # Gráfico de Cumplimiento EPP
-        epp_frame = ttk.Labelframe(graficos_frame, text="Cumplimiento EPP (Hoy)", padding=15)
-        epp_frame.grid(row=0, column=1, padx=(10, 0), sticky="nsew")
-
-        self.canvas_epp = FigureCanvasTkAgg(self.fig_epp, master=epp_frame)
-        self.canvas_epp.get_tk_widget().pack(expand=True, fill=BOTH)
+        self.epp_frame = ttk.Labelframe(graficos_frame, text="Cumplimiento EPP (Hoy)", padding=15)
+        self.epp_frame.grid(row=0, column=1, padx=(10, 0), sticky="nsew")
+        self.lbl_cargando_epp = ttk.Label(self.epp_frame, text="Cargando gráfico...", anchor=CENTER)
+        self.lbl_cargando_epp.pack(expand=True, fill=BOTH)
 
     def crear_kpi_card(self, parent, titulo, valor_inicial, bootstyle):
         """Crea una tarjeta KPI y devuelve el frame y la etiqueta del valor."""
@@ -89,6 +102,8 @@ class PanelInicio(ttk.Frame):
         self.lbl_asistencias_hoy.config(text=str(asistencias_hoy))
         self.lbl_incidentes_hoy.config(text=str(incidentes_hoy))
 
+        if self.canvas_semanal is None:
+            return # Los gráficos todavía no se crearon
         self.actualizar_grafico_semanal()
         self.actualizar_grafico_epp(asistencias_hoy, incidentes_hoy)
 
@@ -1,21 +1,19 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import cv2
-from PIL import Image, ImageTk
-import threading
-import time
-from tkinter import filedialog
+from PIL import Image
+from tkinter import filedialog, messagebox
 import numpy as np
+from logica.camaras import FUENTES_CAMARA
+from interfaz.visor_video import VisorVideo
 
 class PanelRegistro(ttk.Frame):
     def __init__(self, parent, controlador):
         super().__init__(parent)
         self.controlador = controlador
         
-        self.hilo_camara = None
+        self.camara = None
         self.camara_activa = False
-        self.cap = None
-        self.latest_frame_cv2 = None
         self.foto_capturada = None
 
         self._crear_layout()
@@ -60,6 +58,7 @@ class PanelRegistro(ttk.Frame):
 
         self.label_camara = ttk.Label(cam_frame, text="Iniciando Cámara...", anchor=CENTER, background="#2b2b2b")
         self.label_camara.grid(row=0, column=0, sticky="nsew")
+        self.visor = VisorVideo(self.label_camara)
 
         cam_button_frame = ttk.Frame(cam_frame)
         cam_button_frame.grid(row=1, column=0, pady=10, sticky="ew")
@@ -77,6 +76,10 @@ class PanelRegistro(ttk.Frame):
 
         self.btn_guardar = ttk.Button(button_container, text="Agregar Trabajador", bootstyle=SUCCESS, command=self._guardar_empleado)
         self.btn_guardar.pack(side=RIGHT, padx=5)
+
+        # Otra foto de referencia (con casco, lentes...) para el ID indicado
+        self.btn_agregar_foto = ttk.Button(button_container, text="Agregar Foto al ID", bootstyle=(SUCCESS, OUTLINE), command=self._agregar_foto)
+        self.btn_agregar_foto.pack(side=RIGHT, padx=5)
         
         self.btn_cancelar = ttk.Button(button_container, text="Cancelar", bootstyle=(SECONDARY, OUTLINE), command=self.controlador.mostrar_inicio)
         self.btn_cancelar.pack(side=RIGHT)
@@ -84,52 +87,33 @@ class PanelRegistro(ttk.Frame):
     def iniciar_camara(self):
         if not self.camara_activa:
             self.camara_activa = True
-            self.hilo_camara = threading.Thread(target=self._video_loop, daemon=True)
-            self.hilo_camara.start()
+            # Cámara compartida con el panel de asistencia: si ya está abierta no se reabre
+            self.camara = self.controlador.obtener_camaras().suscribir(FUENTES_CAMARA[0])
             self.after(100, self._update_ui_loop)
 
-    def _video_loop(self):
-        """Bucle de video en hilo separado."""
-        self.cap = cv2.VideoCapture(0, cv2.CAP_MSMF)
-        if not self.cap.isOpened():
-            print("Error: No se pudo abrir la cámara.")
-            self.camara_activa = False
-            return
-
-        while self.camara_activa:
-            ret, frame = self.cap.read()
-            if ret:
-                self.latest_frame_cv2 = frame
-            else:
-                time.sleep(0.1)
-        
-        if self.cap.isOpened():
-            self.cap.release()
-
     def _update_ui_loop(self):
         """Actualiza la UI en el hilo principal."""
-        if self.camara_activa and self.latest_frame_cv2 is not None:
-            self._mostrar_frame_en_label(self.latest_frame_cv2)
-        
-        if self.winfo_exists(): # Prevenir errores si el widget es destruido
-            self.after(30, self._update_ui_loop)
+        if not self.camara_activa or not self.winfo_exists(): # Prevenir errores si el widget es destruido
+            return
+        if self.camara.error:
+            self.visor.limpiar(self.camara.error)
+            self.camara_activa = False
+            return
+        # Solo se redibuja si la cámara entregó un frame nuevo; se lee del buffer sin
+        # copiarlo y se dibuja fuera de su lock para no frenar al capturador
+        frame, secuencia = self.camara.buffer.ver_ultimo()
+        if frame is not None:
+            self.visor.mostrar(frame, secuencia)
+        self.after(30, self._update_ui_loop)
 
     def _mostrar_frame_en_label(self, frame_cv2):
-        frame_rgb = cv2.cvtColor(frame_cv2, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(frame_rgb)
-        
-        w, h = self.label_camara.winfo_width(), self.label_camara.winfo_height()
-        if w > 1 and h > 1:
-            img.thumbnail((w, h), Image.Resampling.LANCZOS)
-
-        photo = ImageTk.PhotoImage(image=img)
-        self.label_camara.config(image=photo)
-        self.label_camara.image = photo
+        self.visor.mostrar(frame_cv2)
 
     def _tomar_foto(self):
-        if self.latest_frame_cv2 is not None:
-            self.foto_capturada = self.latest_frame_cv2.copy()
-            self.camara_activa = False # Detiene el bucle de video
+        frame = self.camara.ultimo()[0] if self.camara else None
+        if frame is not None:
+            self.foto_capturada = frame
+            self._liberar_recursos() # Detiene el bucle de video
             self._mostrar_frame_en_label(self.foto_capturada) # Muestra la foto estática
             self.btn_tomar_foto.config(text="Volver a Tomar", bootstyle=WARNING, command=self._reset_camara)
             self.btn_subir_foto.config(state=DISABLED)
@@ -138,7 +122,7 @@ class PanelRegistro(ttk.Frame):
         filepath = filedialog.askopenfilename(filetypes=(("Archivos de imagen", "*.png *.jpg *.jpeg"),))
         if not filepath: return
 
-        self.camara_activa = False
+        self._liberar_recursos()
         try:
             img_pil = Image.open(filepath)
             self.foto_capturada = cv2.cvtColor(np.array(img_pil.convert("RGB")), cv2.COLOR_RGB2BGR)
@@ -150,10 +134,9 @@ class PanelRegistro(ttk.Frame):
 
     def _reset_camara(self):
         self.foto_capturada = None
-        self.latest_frame_cv2 = None
         self.btn_tomar_foto.config(text="Tomar Foto", bootstyle=PRIMARY, command=self._tomar_foto)
         self.btn_subir_foto.config(state=NORMAL)
-        self.label_camara.config(image=None, text="Iniciando Cámara...")
+        self.visor.limpiar("Iniciando Cámara...")
         self.iniciar_camara()
 
     def _guardar_empleado(self):
@@ -162,6 +145,9 @@ class PanelRegistro(ttk.Frame):
         apellidos = self.entry_apellidos.get()
         self.controlador.guardar_empleado(codigo, nombre, apellidos, self.foto_capturada)
 
+    def _agregar_foto(self):
+        self.controlador.agregar_foto_empleado(self.entry_id.get(), self.foto_capturada)
+
     def reset_panel(self):
         self.entry_id.delete(0, END)
         self.entry_nombres.delete(0, END)
@@ -170,5 +156,6 @@ class PanelRegistro(ttk.Frame):
 
     def _liberar_recursos(self, event=None):
         self.camara_activa = False
-        if self.hilo_camara and self.hilo_camara.is_alive():
-            self.hilo_camara.join(timeout=1)
+        if self.camara:
+            self.controlador.obtener_camaras().desuscribir(FUENTES_CAMARA[0])
+            self.camara = None
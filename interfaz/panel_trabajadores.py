@@ -1,13 +1,14 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from conexion.database import obtener_todos_los_empleados, obtener_foto_por_codigo
-from PIL import Image, ImageTk
-import io
+from conexion.database import obtener_todos_los_empleados
+from interfaz.cache_miniaturas import CacheMiniaturas, VECINOS_PRECARGA
 
 class PanelTrabajadores(ttk.Frame):
     def __init__(self, parent, controlador):
         super().__init__(parent)
         self.controlador = controlador
+        # Fotos ya reducidas para el visor, para recorrer la lista sin esperas
+        self.miniaturas = CacheMiniaturas()
         self._crear_widgets()
         self.cargar_lista_empleados()
 
@@ -63,7 +64,8 @@ class PanelTrabajadores(ttk.Frame):
         empleados = obtener_todos_los_empleados()
         for i, empleado in enumerate(empleados):
             tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert("", END, values=empleado, tags=(tag,))
+            # El código es el id de la fila: se conserva como texto (con ceros a la izquierda)
+            self.tree.insert("", END, iid=empleado[0], values=empleado, tags=(tag,))
         
         self.tree.tag_configure('evenrow', background='#f0f0f0')
         self.tree.tag_configure('oddrow', background='white')
@@ -87,28 +89,29 @@ class PanelTrabajadores(ttk.Frame):
             self.label_foto.config(image=None, text="Seleccione un empleado\nde la lista")
             return
 
-        item = self.tree.item(seleccion[0])
-        codigo_empleado = item['values'][0]
-        
-        foto_blob = obtener_foto_por_codigo(codigo_empleado)
-
-        if foto_blob:
-            try:
-                # Convertir el BLOB a una imagen que Tkinter pueda mostrar
-                img_data = io.BytesIO(foto_blob)
-                img = Image.open(img_data)
-
-                w, h = self.label_foto.winfo_width(), self.label_foto.winfo_height()
-                if w > 1 and h > 1:
-                    img.thumbnail((w - 20, h - 20), Image.Resampling.LANCZOS)
+        codigo_empleado = seleccion[0]
+        w, h = self.label_foto.winfo_width(), self.label_foto.winfo_height()
+        tamano = (w - 20, h - 20) if w > 20 and h > 20 else (400, 400)
 
-                photo = ImageTk.PhotoImage(img)
+        try:
+            photo = self.miniaturas.obtener(codigo_empleado, tamano)
+        except Exception as e:
+            self.label_foto.config(image=None, text=f"Error al cargar\nla imagen: {e}")
+            photo = None
+        else:
+            if photo:
                 self.label_foto.config(image=photo, text="")
                 self.label_foto.image = photo
-            except Exception as e:
-                self.label_foto.config(image=None, text=f"Error al cargar\nla imagen: {e}")
-        else:
-            self.label_foto.config(image=None, text="No se encontró\nfoto para este empleado")
+            else:
+                self.label_foto.config(image=None, text="No se encontró\nfoto para este empleado")
+
+        # Decodificar en segundo plano las fotos de los vecinos, los más cercanos primero
+        filas = self.tree.get_children()
+        posicion = self.tree.index(codigo_empleado)
+        vecinos = []
+        for distancia in range(1, VECINOS_PRECARGA + 1):
+            vecinos += [filas[i] for i in (posicion + distancia, posicion - distancia) if 0 <= i < len(filas)]
+        self.miniaturas.precargar(vecinos, tamano)
 
     def _solicitar_eliminacion(self):
         seleccion = self.tree.selection()
@@ -116,7 +119,7 @@ class PanelTrabajadores(ttk.Frame):
             return
         
         item = self.tree.item(seleccion[0])
-        codigo = item['values'][0]
+        codigo = seleccion[0]
         nombre_completo = f"{item['values'][1]} {item['values'][2]}"
         
         self.controlador.eliminar_empleado(codigo, nombre_completo)
@@ -1,13 +1,6 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 
-# Importar los nuevos paneles
-from interfaz.panel_inicio import PanelInicio
-from interfaz.panel_asistencia import PanelAsistencia
-from interfaz.panel_registro import PanelRegistro
-from interfaz.panel_reportes import PanelReportes
-from interfaz.panel_trabajadores import PanelTrabajadores
-
 class VentanaPrincipal(ttk.Window):
 
     def __init__(self, controlador):
@@ -30,6 +23,16 @@ class VentanaPrincipal(ttk.Window):
 
 
 
+        # Barra de estado (p. ej. mientras se cargan los modelos en segundo plano)
+
+        self.var_estado = ttk.StringVar()
+
+        self.barra_estado = ttk.Label(self, textvariable=self.var_estado, padding=(10, 4), bootstyle=SECONDARY)
+
+        self.barra_estado.pack(side=BOTTOM, fill=X)
+
+
+
         # Contenedor principal para los paneles
 
         self.container = ttk.Frame(self)
@@ -82,6 +85,20 @@ class VentanaPrincipal(ttk.Window):
 
         menu_opciones.add_command(label="Ver Reportes", command=self.controlador.mostrar_reportes)
 
+        menu_opciones.add_separator()
+
+        menu_opciones.add_command(label="Actualizar Modelo EPP...", command=self.controlador.actualizar_modelo_epp)
+
+
+
+    def mostrar_estado(self, texto, bootstyle=SECONDARY):
+
+        """Muestra un mensaje en la barra de estado inferior."""
+
+        self.var_estado.set(texto)
+
+        self.barra_estado.configure(bootstyle=bootstyle)
+
 
 
     def mostrar_panel(self, panel_class):
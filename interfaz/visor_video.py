@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+class VisorVideo:
+    """
+    Muestra frames de OpenCV (BGR) en un Label sin desperdiciar trabajo: solo
+    redibuja cuando cambia la `version` del frame, lo reduce una sola vez con
+    interpolación lineal a un buffer reutilizado y actualiza en su lugar la
+    misma PhotoImage (`paste`) en vez de crear una nueva en cada tick.
+    """
+    def __init__(self, label):
+        self.label = label
+        self.version = None # Versión del último frame mostrado
+        self._reducido = None
+        self._rgb = None
+        self._foto = None
+
+    def mostrar(self, frame, version=None, anotar=None):
+        """
+        Muestra `frame` (no se modifica) ajustado al tamaño del Label, sin
+        agrandarlo. `anotar(imagen, escala)` puede dibujar sobre la imagen ya
+        reducida. Con la misma `version` que el frame anterior no hace nada.
+        Retorna True si se redibujó.
+        """
+        if version is not None and version == self.version:
+            return False
+        alto, ancho = frame.shape[:2]
+        w, h = self.label.winfo_width(), self.label.winfo_height()
+        escala = min(1.0, w / ancho, h / alto) if w > 1 and h > 1 else 1.0
+        tamano = (max(1, int(ancho * escala)), max(1, int(alto * escala)))
+
+        if self._reducido is None or self._reducido.shape[:2] != (tamano[1], tamano[0]):
+            self._reducido = np.empty((tamano[1], tamano[0], 3), dtype=np.uint8)
+            self._rgb = np.empty_like(self._reducido)
+            self._foto = None # La PhotoImage solo se reutiliza si no cambia de tamaño
+        if tamano == (ancho, alto):
+            np.copyto(self._reducido, frame)
+        else:
+            cv2.resize(frame, tamano, dst=self._reducido, interpolation=cv2.INTER_LINEAR)
+        if anotar:
+            anotar(self._reducido, escala)
+        cv2.cvtColor(self._reducido, cv2.COLOR_BGR2RGB, dst=self._rgb)
+
+        imagen = Image.fromarray(self._rgb)
+        if self._foto is None:
+            self._foto = ImageTk.PhotoImage(image=imagen)
+            self.label.config(image=self._foto, text="")
+            self.label.image = self._foto
+        else:
+            self._foto.paste(imagen)
+        self.version = version
+        return True
+
+    def limpiar(self, texto=""):
+        """Quita la imagen del Label y muestra `texto`."""
+        self.label.config(image="", text=texto)
+        self.label.image = None
+        self._foto = None
+        self.version = None
@@ -0,0 +1,37 @@
+import cv2
+
+# Color (BGR) con el que se dibuja cada clase detectada por 'best.pt'.
+COLORES_EPP = {
+    'casco': (0, 255, 0), # Verde
+    'chaleco': (255, 255, 0), # Amarillo/Cian
+    'humano': (0, 0, 255), # Rojo
+}
+
+def combinar_detecciones(estado_epp, rostros):
+    """Arma el diccionario de detecciones a partir de los resultados de cada etapa."""
+    detecciones_epp = {'casco': False, 'chaleco': False, 'persona_detectada': False, 'nombre_reconocido': "Desconocido", 'codigo_reconocido': None}
+    detecciones_epp.update(estado_epp)
+    for _, codigo, nombre in rostros:
+        if codigo is not None:
+            detecciones_epp['nombre_reconocido'] = nombre
+            detecciones_epp['codigo_reconocido'] = codigo
+    return detecciones_epp
+
+def dibujar_anotaciones(frame, cajas_epp, rostros, escala=1.0):
+    """
+    Dibuja sobre `frame` las cajas de EPP y los rostros con su nombre. Con
+    `escala` se dibuja sobre una versión reducida del frame original.
+    """
+    if escala != 1.0:
+        cajas_epp = [tuple(int(v * escala) for v in caja[:4]) + (caja[4],) for caja in cajas_epp]
+        rostros = [(tuple(int(v * escala) for v in caja), codigo, nombre) for caja, codigo, nombre in rostros]
+    for x1, y1, x2, y2, label in cajas_epp:
+        color = COLORES_EPP.get(label, (255, 255, 255)) # Blanco por defecto
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+    for (top, right, bottom, left), codigo, nombre in rostros:
+        name = f"{nombre} ({codigo})" if codigo is not None else "Desconocido"
+        cv2.rectangle(frame, (left, top), (right, bottom), (255, 0, 0), 2)
+        cv2.putText(frame, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2, cv2.LINE_AA)
+    return frame
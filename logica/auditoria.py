@@ -0,0 +1,203 @@
+"""
+Auditoría sin interfaz gráfica de videos grabados: recorre uno o más archivos
+(o carpetas) con la misma lógica de ReconocimientoFacialEPP y genera, por
+persona, una línea de tiempo de apariciones con su estado de EPP, además de
+estadísticas de rendimiento.
+
+Las personas no reconocidas se distinguen por su pista del seguidor de
+rostros ('desconocido-<id>'), y el EPP de cada rostro es el de las cajas que
+caen dentro de la persona detectada que lo contiene.
+"""
+import json
+import multiprocessing as mp
+import os
+import time
+import cv2
+
+EXTENSIONES_VIDEO = ('.mp4', '.avi', '.mkv', '.mov', '.m4v', '.mpg', '.mpeg', '.wmv')
+# Procesar 1 de cada PASO_FRAMES frames; los demás se saltan sin decodificar.
+PASO_FRAMES = 5
+# Dos apariciones separadas por menos de estos segundos se unen en un solo tramo.
+SEPARACION_MAXIMA_S = 2.0
+
+_reconocimiento = None # Uno por proceso de trabajo
+
+def listar_videos(rutas):
+    """Expande carpetas (recursivamente) en la lista de archivos de video a auditar."""
+    videos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            for carpeta, _, archivos in os.walk(ruta):
+                videos.extend(
+                    os.path.join(carpeta, archivo) for archivo in sorted(archivos)
+                    if archivo.lower().endswith(EXTENSIONES_VIDEO)
+                )
+        elif os.path.isfile(ruta):
+            videos.append(ruta)
+        else:
+            print(f"Advertencia: '{ruta}' no existe, se omite.")
+    return videos
+
+def _inicializar_trabajador():
+    global _reconocimiento
+    from logica.reconocimiento import ReconocimientoFacialEPP
+    _reconocimiento = ReconocimientoFacialEPP()
+
+def _contiene(caja, x, y):
+    x1, y1, x2, y2 = caja[:4]
+    return x1 <= x <= x2 and y1 <= y <= y2
+
+def epp_de_rostro(caja_rostro, cajas_epp):
+    """
+    Retorna (casco, chaleco) de la persona de un rostro (top, right, bottom, left):
+    las cajas de EPP cuyo centro cae dentro de la caja 'humano' más chica que
+    contiene el centro del rostro. Sin esa caja se usa la zona que ocuparía el
+    cuerpo según el tamaño del rostro.
+    """
+    top, right, bottom, left = caja_rostro
+    cx, cy = (left + right) / 2, (top + bottom) / 2
+    personas = [c for c in cajas_epp if c[4] == 'humano' and _contiene(c, cx, cy)]
+    if personas:
+        zona = min(personas, key=lambda c: (c[2] - c[0]) * (c[3] - c[1]))
+    else:
+        ancho, alto = right - left, bottom - top
+        zona = (left - ancho, top - alto, right + ancho, bottom + 4 * alto)
+    presentes = {c[4] for c in cajas_epp if _contiene(zona, (c[0] + c[2]) / 2, (c[1] + c[3]) / 2)}
+    casco = 'casco' in presentes
+    # La misma suposición que detectar_epp: con casco se asume el chaleco.
+    return casco, casco or 'chaleco' in presentes
+
+def _agregar_aparicion(tramos, t, casco, chaleco, separacion_maxima):
+    """Extiende el último tramo de una persona o abre uno nuevo."""
+    if tramos and t - tramos[-1]['fin_s'] <= separacion_maxima:
+        tramo = tramos[-1]
+        tramo['fin_s'] = t
+    else:
+        tramo = {'inicio_s': t, 'fin_s': t, 'frames': 0, 'frames_con_casco': 0, 'frames_con_chaleco': 0}
+        tramos.append(tramo)
+    tramo['frames'] += 1
+    tramo['frames_con_casco'] += int(casco)
+    tramo['frames_con_chaleco'] += int(chaleco)
+
+def auditar_video(ruta, paso=PASO_FRAMES, separacion_maxima=SEPARACION_MAXIMA_S):
+    """
+    Audita un archivo de video. Retorna un diccionario con la línea de tiempo por
+    persona ({codigo: {'codigo', 'nombre', 'tramos'}}, con 'desconocido-<id>' de
+    clave y codigo None para los no reconocidos) y las estadísticas del archivo.
+    """
+    if _reconocimiento is None:
+        _inicializar_trabajador()
+    reconocimiento = _reconocimiento
+    reconocimiento.reiniciar_seguimiento()
+
+    inicio = time.perf_counter()
+    cap = cv2.VideoCapture(ruta)
+    if not cap.isOpened():
+        return {'archivo': ruta, 'error': 'No se pudo abrir el video.'}
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    personas = {}
+    leidos = procesados = 0
+    try:
+        while True:
+            # grab() avanza sin decodificar; solo se decodifican los frames a procesar.
+            if not cap.grab():
+                break
+            indice = leidos
+            leidos += 1
+            if indice % paso:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+            procesados += 1
+            t = indice / fps
+
+            _, cajas_epp = reconocimiento.detectar_epp(frame)
+            rostros = reconocimiento.reconocer_rostros(frame)
+            # Las primeras pistas del seguidor son las de estos rostros, en el mismo orden.
+            for (caja, codigo, nombre), pista in zip(rostros, reconocimiento.seguidor.pistas):
+                clave = codigo or f"desconocido-{pista.id}"
+                persona = personas.setdefault(clave, {'codigo': codigo, 'nombre': nombre or 'Desconocido', 'tramos': []})
+                casco, chaleco = epp_de_rostro(caja, cajas_epp)
+                _agregar_aparicion(persona['tramos'], t, casco, chaleco, separacion_maxima)
+    finally:
+        cap.release()
+
+    for persona in personas.values():
+        for tramo in persona['tramos']:
+            tramo['epp_completo'] = tramo['frames_con_casco'] == tramo['frames'] and tramo['frames_con_chaleco'] == tramo['frames']
+    segundos = time.perf_counter() - inicio
+    return {
+        'archivo': ruta,
+        'duracion_video_s': leidos / fps,
+        'frames_leidos': leidos,
+        'frames_procesados': procesados,
+        'tiempo_s': segundos,
+        'fps_procesados': procesados / segundos if segundos > 0 else 0.0,
+        'personas': personas,
+    }
+
+def _auditar_en_trabajador(argumentos):
+    return auditar_video(*argumentos)
+
+def auditar(rutas, paso=PASO_FRAMES, procesos=None, separacion_maxima=SEPARACION_MAXIMA_S):
+    """
+    Audita todos los videos de `rutas` repartiéndolos entre `procesos` procesos
+    (por defecto, uno por núcleo). Retorna el informe completo como diccionario.
+    """
+    videos = listar_videos(rutas)
+    inicio = time.perf_counter()
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(videos) or 1))
+    argumentos = [(video, paso, separacion_maxima) for video in videos]
+
+    if procesos == 1:
+        resultados = [_auditar_en_trabajador(a) for a in argumentos]
+    else:
+        with mp.get_context('spawn').Pool(procesos, initializer=_inicializar_trabajador) as pool:
+            resultados = list(pool.imap_unordered(_auditar_en_trabajador, argumentos))
+    resultados.sort(key=lambda r: r['archivo'])
+
+    # Línea de tiempo combinada por persona, a través de todos los archivos. Las
+    # pistas de desconocidos solo identifican a alguien dentro de su archivo.
+    linea_tiempo = {}
+    for resultado in resultados:
+        for clave, persona in resultado.get('personas', {}).items():
+            if persona['codigo'] is None:
+                clave = f"{clave}@{resultado['archivo']}"
+            entrada = linea_tiempo.setdefault(clave, {'nombre': persona['nombre'], 'apariciones': []})
+            entrada['apariciones'].extend(dict(tramo, archivo=resultado['archivo']) for tramo in persona['tramos'])
+
+    tiempo_total = time.perf_counter() - inicio
+    frames_leidos = sum(r.get('frames_leidos', 0) for r in resultados)
+    frames_procesados = sum(r.get('frames_procesados', 0) for r in resultados)
+    return {
+        'parametros': {'paso_frames': paso, 'procesos': procesos, 'separacion_maxima_s': separacion_maxima},
+        'estadisticas': {
+            'archivos': len(videos),
+            'frames_leidos': frames_leidos,
+            'frames_procesados': frames_procesados,
+            'tiempo_total_s': tiempo_total,
+            'fps_leidos': frames_leidos / tiempo_total if tiempo_total > 0 else 0.0,
+            'fps_procesados': frames_procesados / tiempo_total if tiempo_total > 0 else 0.0,
+            'duracion_video_s': sum(r.get('duracion_video_s', 0) for r in resultados),
+        },
+        'personas': linea_tiempo,
+        'archivos': resultados,
+    }
+
+def imprimir_resumen(informe):
+    """Muestra en consola las estadísticas y la línea de tiempo de cada persona."""
+    est = informe['estadisticas']
+    print(f"Archivos: {est['archivos']}  Frames leídos: {est['frames_leidos']}  Procesados: {est['frames_procesados']}")
+    print(f"Tiempo: {est['tiempo_total_s']:.1f} s  ({est['fps_leidos']:.1f} frames/s leídos, "
+          f"{est['fps_procesados']:.1f} frames/s procesados, {est['duracion_video_s']:.0f} s de video)")
+    for codigo, persona in sorted(informe['personas'].items()):
+        print(f"\n{persona['nombre']} ({codigo})")
+        for tramo in persona['apariciones']:
+            estado = "EPP completo" if tramo['epp_completo'] else "EPP incompleto"
+            print(f"  {os.path.basename(tramo['archivo'])}: {tramo['inicio_s']:.1f}s - {tramo['fin_s']:.1f}s  {estado}")
+
+def guardar_informe(informe, ruta):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=2)
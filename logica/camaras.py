@@ -0,0 +1,222 @@
+import threading
+import time
+from logica.fuentes import crear_fuente, BufferFrames
+
+# Fuentes de video del panel de asistencia: índices de dispositivo, URLs
+# (rtsp://, http://), rutas a archivos de video o carpetas de imágenes para
+# pruebas (ver logica.fuentes).
+FUENTES_CAMARA = [0]
+# Segundos que una cámara sin suscriptores sigue abierta en el ServicioCamaras,
+# para no pagar de nuevo la apertura (1-3 s en cámaras USB) al cambiar de panel.
+TIEMPO_INACTIVIDAD_CAMARA_S = 30.0
+
+class Camara(threading.Thread):
+    """
+    Hilo capturador dedicado a una fuente: lee sin pausa (las cámaras en vivo
+    no acumulan frames viejos en el driver) y deja siempre el más reciente en
+    un buffer circular preasignado, de donde lo toman los consumidores con
+    `ultimo()`. Los suscriptores `al_recibir_frame(frame, canal)` reciben
+    además una copia de cada frame, compartida entre todos (no deben
+    modificarla). Los archivos y carpetas se reproducen a su velocidad nominal
+    y vuelven a empezar al terminar.
+    """
+    def __init__(self, canal, fuente, al_recibir_frame=None):
+        super().__init__(name=f"camara-{canal}", daemon=True)
+        self.canal = canal
+        self.fuente = crear_fuente(fuente)
+        # Tupla de (al_recibir_frame, canal); se reemplaza entera para leerla sin lock
+        self._suscriptores = ((al_recibir_frame, canal),) if al_recibir_frame else ()
+        self.buffer = BufferFrames()
+        self.activa = False
+        self._detenida = False
+        self.abierta = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            abierta = self.fuente.abrir()
+        except Exception as e:
+            print(f"Error al abrir la fuente de video '{self.fuente}': {e}")
+            abierta = False
+        if not abierta:
+            self.error = f"No se pudo abrir la fuente de video '{self.fuente}'."
+            print(f"Error: {self.error}")
+            self.abierta.set()
+            return
+        self.activa = not self._detenida # Pudo detenerse mientras se abría
+        self.abierta.set()
+
+        try:
+            while self.activa:
+                frame = self.fuente.leer(self.buffer.siguiente_ranura())
+                if frame is None:
+                    if getattr(self.fuente, 'terminada', False):
+                        break
+                    # Si no se puede leer el frame, esperar un poco
+                    time.sleep(0.1)
+                    continue
+                self.buffer.publicar(frame)
+                suscriptores = self._suscriptores
+                if suscriptores:
+                    copia = self.buffer.ultimo()[0]
+                    for al_recibir_frame, canal in suscriptores:
+                        al_recibir_frame(copia, canal)
+        finally:
+            self.activa = False
+            self.fuente.cerrar()
+
+    def ultimo(self, destino=None):
+        """Retorna (copia del frame más reciente, secuencia); ver BufferFrames.ultimo."""
+        return self.buffer.ultimo(destino)
+
+    def agregar_suscriptor(self, al_recibir_frame, canal):
+        self._suscriptores = self._suscriptores + ((al_recibir_frame, canal),)
+
+    def quitar_suscriptor(self, al_recibir_frame, canal):
+        self._suscriptores = tuple(s for s in self._suscriptores if s != (al_recibir_frame, canal))
+
+    def detener(self):
+        self._detenida = True
+        self.activa = False
+
+class ServicioCamaras:
+    """
+    Cámaras compartidas por todos los paneles (lo crea el ControladorPrincipal).
+    Cada fuente se abre una sola vez aunque la usen varios paneles; al cambiar
+    de panel el dispositivo sigue abierto y solo se cierra cuando pasa
+    `tiempo_inactividad_s` sin suscriptores.
+    """
+    def __init__(self, tiempo_inactividad_s=TIEMPO_INACTIVIDAD_CAMARA_S):
+        self.tiempo_inactividad_s = tiempo_inactividad_s
+        self._lock = threading.Lock()
+        self._camaras = {} # clave de la fuente -> Camara
+        self._suscripciones = {} # clave de la fuente -> cantidad de suscripciones
+        self._cierres = {} # clave de la fuente -> threading.Timer del cierre pendiente
+
+    @staticmethod
+    def _clave(fuente):
+        return str(fuente)
+
+    def suscribir(self, fuente, al_recibir_frame=None, canal=0):
+        """
+        Abre la fuente si hace falta (o cancela su cierre pendiente) y retorna
+        su Camara. Con `al_recibir_frame(frame, canal)` se recibe cada frame;
+        sin él, se toma el más reciente con `camara.ultimo()`.
+        Cada suscripción debe equilibrarse con `desuscribir`.
+        """
+        clave = self._clave(fuente)
+        with self._lock:
+            cierre = self._cierres.pop(clave, None)
+            if cierre:
+                cierre.cancel()
+            camara = self._camaras.get(clave)
+            if camara is None or (camara.abierta.is_set() and not camara.is_alive()):
+                # Primera vez, o la cámara terminó (p. ej. no se pudo abrir): volver a intentarlo
+                camara = self._camaras[clave] = Camara(0, fuente)
+                camara.start()
+            if al_recibir_frame:
+                camara.agregar_suscriptor(al_recibir_frame, canal)
+            self._suscripciones[clave] = self._suscripciones.get(clave, 0) + 1
+            return camara
+
+    def desuscribir(self, fuente, al_recibir_frame=None, canal=0):
+        """Deja de recibir frames de la fuente; se cierra tras el tiempo de inactividad."""
+        clave = self._clave(fuente)
+        with self._lock:
+            camara = self._camaras.get(clave)
+            if camara is None or not self._suscripciones.get(clave):
+                return
+            if al_recibir_frame:
+                camara.quitar_suscriptor(al_recibir_frame, canal)
+            self._suscripciones[clave] -= 1
+            if self._suscripciones[clave] > 0:
+                return
+            if self.tiempo_inactividad_s <= 0:
+                self._cerrar_camara(clave)
+                return
+            cierre = self._cierres[clave] = threading.Timer(self.tiempo_inactividad_s, self._cerrar_si_inactiva, (clave,))
+            cierre.daemon = True
+            cierre.start()
+
+    def _cerrar_si_inactiva(self, clave):
+        with self._lock:
+            if self._suscripciones.get(clave):
+                return
+            self._cierres.pop(clave, None)
+            self._cerrar_camara(clave)
+
+    def _cerrar_camara(self, clave):
+        camara = self._camaras.pop(clave, None)
+        self._suscripciones.pop(clave, None)
+        if camara is not None:
+            print(f"Cerrando la fuente de video '{camara.fuente}' por inactividad.")
+            camara.detener()
+
+    def abiertas(self):
+        """Claves de las fuentes que siguen abiertas (con o sin suscriptores)."""
+        with self._lock:
+            return [clave for clave, camara in self._camaras.items() if camara.is_alive()]
+
+    def cerrar(self):
+        """Cierra todas las cámaras de inmediato (al salir de la aplicación)."""
+        with self._lock:
+            for cierre in self._cierres.values():
+                cierre.cancel()
+            self._cierres.clear()
+            camaras = list(self._camaras.values())
+            self._camaras.clear()
+            self._suscripciones.clear()
+        for camara in camaras:
+            camara.detener()
+        for camara in camaras:
+            if camara.is_alive():
+                camara.join(timeout=1)
+
+class GestorCamaras:
+    """
+    Abre N fuentes de video y reparte sus frames a un único consumidor
+    (normalmente el PlanificadorInferencia compartido), identificando cada
+    cámara por su canal (su posición en `fuentes`).
+
+    Con `servicio` (un ServicioCamaras) las cámaras se comparten con otros
+    paneles: abrir y cerrar solo suscriben y desuscriben al consumidor.
+    """
+    def __init__(self, fuentes, al_recibir_frame, servicio=None):
+        self.fuentes = list(fuentes)
+        self.al_recibir_frame = al_recibir_frame
+        self.servicio = servicio
+        self.camaras = []
+
+    def __len__(self):
+        return len(self.fuentes)
+
+    @property
+    def activo(self):
+        return any(camara.activa for camara in self.camaras)
+
+    def abrir(self):
+        if self.camaras:
+            return
+        if self.servicio:
+            self.camaras = [
+                self.servicio.suscribir(fuente, self.al_recibir_frame, canal)
+                for canal, fuente in enumerate(self.fuentes)
+            ]
+            return
+        self.camaras = [Camara(canal, fuente, self.al_recibir_frame) for canal, fuente in enumerate(self.fuentes)]
+        for camara in self.camaras:
+            camara.start()
+
+    def cerrar(self):
+        if self.servicio:
+            if self.camaras:
+                for canal, fuente in enumerate(self.fuentes):
+                    self.servicio.desuscribir(fuente, self.al_recibir_frame, canal)
+                self.camaras = []
+            return
+        for camara in self.camaras:
+            camara.detener()
+        for camara in self.camaras:
+            if camara.is_alive():
+                camara.join(timeout=1)
+        self.camaras = []
@@ -1,42 +1,132 @@
-from interfaz.panel_inicio import PanelInicio
-from interfaz.panel_asistencia import PanelAsistencia
-from interfaz.panel_registro import PanelRegistro
-from interfaz.panel_reportes import PanelReportes
-from interfaz.panel_inicio import PanelInicio
-from interfaz.panel_asistencia import PanelAsistencia
-from interfaz.panel_registro import PanelRegistro
-from interfaz.panel_reportes import PanelReportes
-from interfaz.panel_trabajadores import PanelTrabajadores
-from conexion.database import agregar_empleado, eliminar_empleado_por_codigo, registrar_asistencia
-from tkinter import messagebox
-import cv2
+import threading
+import time
+from conexion.database import (
+    agregar_empleado, agregar_foto_empleado, eliminar_empleado_por_codigo, registrar_asistencia, cerrar_conexiones
+)
+from logica.galeria import GaleriaRostros, TOLERANCIA, TOLERANCIA_FOTO_REPETIDA
+from logica.metricas import METRICAS
+from logica.modelos import RegistroModelos
+from logica.precarga import PrecargaModelos
+from tkinter import messagebox, filedialog
+
+# Los paneles (y con ellos cv2, matplotlib y los modelos) se importan al
+# mostrarlos por primera vez, para que la ventana aparezca cuanto antes.
 
 class ControladorPrincipal:
-    def __init__(self, app):
+    def __init__(self, app, inicio=None, trabajadores=None):
         self.app = app
+        # Instante de arranque del programa, para medir los tiempos de inicio.
+        self.inicio = inicio if inicio is not None else time.perf_counter()
+        # Galería de rostros compartida; se carga junto con los modelos
+        # y se mantiene al día con cada alta o baja de empleados.
+        self.galeria = GaleriaRostros()
+        # Modelos compartidos por todos los paneles: cada uno se carga una sola vez.
+        # `trabajadores`: procesos de inferencia (None: NUM_TRABAJADORES).
+        self.modelos = RegistroModelos(self.galeria, num_trabajadores=trabajadores)
+        self.precarga = None
+        # Cámaras compartidas por los paneles de registro y asistencia (ver obtener_camaras)
+        self.camaras = None
+        # Comprobación de una foto de registro en curso (se hace fuera del hilo de Tk)
+        self._comprobando_foto = False
+
+    def registrar_hito(self, hito):
+        """Registra los segundos transcurridos desde el arranque hasta un hito (solo la primera vez)."""
+        METRICAS.registrar_hito(hito, time.perf_counter() - self.inicio)
+
+    def al_mostrar_ventana(self):
+        """Se llama cuando la ventana ya está visible: inicia la carga de los modelos."""
+        self.registrar_hito('primera_ventana')
+        self.obtener_precarga()
+
+    def obtener_precarga(self):
+        """Retorna la carga en segundo plano de los modelos, iniciándola si hace falta."""
+        if self.precarga is None:
+            self.precarga = PrecargaModelos(self.modelos)
+            self.precarga.start()
+            if self.app:
+                self.app.mostrar_estado("Cargando modelos de reconocimiento...", "warning")
+                self.app.after(200, self._vigilar_precarga)
+        return self.precarga
+
+    def obtener_camaras(self):
+        """
+        Retorna el servicio de cámaras compartido, creándolo la primera vez: la
+        cámara sigue abierta al pasar de un panel a otro.
+        """
+        if self.camaras is None:
+            from logica.camaras import ServicioCamaras
+            self.camaras = ServicioCamaras()
+        return self.camaras
+
+    def _vigilar_precarga(self):
+        """Actualiza la barra de estado cuando termina la carga de los modelos."""
+        if self.precarga.cargando:
+            self.app.after(200, self._vigilar_precarga)
+        elif self.precarga.reconocimiento is None:
+            self.app.mostrar_estado("No se pudieron cargar los modelos de reconocimiento.", "danger")
+        else:
+            self.registrar_hito('modelos_listos')
+            self.app.mostrar_estado(f"Modelos listos ({self.precarga.duracion_s:.1f} s).", "success")
+
+    def actualizar_modelo_epp(self):
+        """
+        Pide un nuevo archivo del modelo de EPP (p. ej. una versión reentrenada de
+        best.pt) y lo carga en segundo plano; se activa sin reiniciar la aplicación.
+        """
+        ruta = filedialog.askopenfilename(
+            title="Seleccionar nuevo modelo de EPP",
+            filetypes=[("Modelos YOLO", "*.pt *.onnx"), ("Todos los archivos", "*.*")]
+        )
+        if not ruta:
+            return
+        resultado = []
+        self.modelos.reemplazar_detector(ruta, al_terminar=resultado.append)
+        if self.app:
+            self.app.mostrar_estado(f"Cargando el nuevo modelo de EPP '{ruta}'...", "warning")
+            self.app.after(200, self._vigilar_reemplazo, ruta, resultado)
+
+    def _vigilar_reemplazo(self, ruta, resultado):
+        if not resultado:
+            self.app.after(200, self._vigilar_reemplazo, ruta, resultado)
+        elif resultado[0] is None:
+            self.app.mostrar_estado(f"Modelo de EPP actualizado: {ruta}", "success")
+        else:
+            self.app.mostrar_estado(f"No se pudo cargar el modelo de EPP: {resultado[0]}", "danger")
+
+    def cerrar(self):
+        """Libera las cámaras, los modelos, los procesos de inferencia y las conexiones a la BD al salir."""
+        if self.camaras is not None:
+            self.camaras.cerrar()
+        self.modelos.cerrar()
+        cerrar_conexiones()
 
     def mostrar_inicio(self):
         """ Muestra el panel de bienvenida. """
+        from interfaz.panel_inicio import PanelInicio
         if self.app:
             self.app.mostrar_panel(PanelInicio)
 
     def mostrar_asistencia(self):
         """ Muestra el panel principal de marcado de asistencia. """
+        from interfaz.panel_asistencia import PanelAsistencia
         if self.app:
             self.app.mostrar_panel(PanelAsistencia)
 
     def mostrar_registro(self):
         """ Muestra el panel para registrar un nuevo empleado. """
+        from interfaz.panel_registro import PanelRegistro
         if self.app:
             self.app.mostrar_panel(PanelRegistro)
 
     def mostrar_reportes(self):
         """ Muestra el panel con los reportes de asistencia. """
+        from interfaz.panel_reportes import PanelReportes
         if self.app:
             self.app.mostrar_panel(PanelReportes)
 
     def mostrar_trabajadores(self):
         """ Muestra el panel con la lista de trabajadores. """
+        from interfaz.panel_trabajadores import PanelTrabajadores
         if self.app:
             panel = self.app.paneles.get(PanelTrabajadores)
             if panel:
@@ -51,6 +141,8 @@ class ControladorPrincipal:
         )
         if confirmar:
             if eliminar_empleado_por_codigo(codigo):
+                self.galeria.eliminar(codigo)
+                self._invalidar_miniatura(codigo)
                 messagebox.showinfo("Éxito", "Empleado eliminado correctamente.")
                 self.mostrar_trabajadores() # Recargar la lista
             else:
@@ -61,18 +153,149 @@ class ControladorPrincipal:
         if not all([codigo, nombre, apellidos, foto_cv2 is not None]):
             messagebox.showerror("Error", "Todos los campos y la foto son obligatorios.")
             return
-        
-        _, buffer = cv2.imencode('.PNG', foto_cv2)
-        foto_blob = buffer.tobytes()
 
-        if agregar_empleado(codigo, nombre, apellidos, foto_blob):
+        def comprobar():
+            # Detectar el rostro y preparar recorte, embedding y miniatura una sola vez
+            from logica.enrolamiento import procesar_foto_registro
+            registro = procesar_foto_registro(foto_cv2)
+            # Evitar registrar dos veces a la misma persona con códigos distintos
+            parecidos = self._consultar_galeria('buscar_parecidos', registro.encoding, excluir=codigo)
+            return registro, parecidos
+
+        self._comprobar_foto(comprobar, lambda registro, parecidos: self._guardar_empleado_comprobado(
+            codigo, nombre, apellidos, registro, parecidos
+        ))
+
+    def _guardar_empleado_comprobado(self, codigo, nombre, apellidos, registro, parecidos):
+        if parecidos:
+            codigo_parecido, nombre_parecido, distancia = parecidos[0]
+            if not messagebox.askyesno(
+                title="Posible empleado duplicado",
+                message=f"La foto se parece mucho a '{nombre_parecido}' ({codigo_parecido}), que ya está registrado "
+                        f"(distancia {distancia:.2f}).\n\n¿Registrarlo de todas formas como un empleado nuevo?"
+            ):
+                return
+
+        if agregar_empleado(codigo, nombre, apellidos, registro.foto, registro.miniatura, registro.foto_original):
+            self.galeria.agregar(codigo, nombre, apellidos, registro.foto, registro.encoding)
+            self._notificar_cambio_galeria()
+            self._invalidar_miniatura(codigo) # Por si el código se volvió a registrar con otra foto
             messagebox.showinfo("Éxito", "Empleado registrado correctamente.")
-            panel_registro = self.app.paneles.get(PanelRegistro)
-            if panel_registro:
-                panel_registro.reset_panel()
+            self._reiniciar_panel_registro()
         else:
             messagebox.showerror("Error", "No se pudo registrar al empleado. El código podría existir.")
 
+    def agregar_foto_empleado(self, codigo, foto_cv2):
+        """
+        Agrega otra foto de referencia a un empleado ya registrado (p. ej. con
+        casco o lentes), tras comprobar que es la misma persona y que la foto
+        aporta algo nuevo.
+        """
+        if not codigo or foto_cv2 is None:
+            messagebox.showerror("Error", "Indique el ID del empleado y tome o suba una foto.")
+            return
+
+        def comprobar():
+            from logica.enrolamiento import procesar_foto_registro
+            registro = procesar_foto_registro(foto_cv2)
+            distancia_propia = self._consultar_galeria('distancia_a_fotos', codigo, registro.encoding)
+            parecidos = None
+            if distancia_propia is not None:
+                parecidos = self._consultar_galeria(
+                    'buscar_parecidos', registro.encoding, tolerancia=distancia_propia, excluir=codigo
+                )
+            return registro, distancia_propia, parecidos
+
+        self._comprobar_foto(comprobar, lambda *resultado: self._agregar_foto_comprobada(codigo, *resultado))
+
+    def _agregar_foto_comprobada(self, codigo, registro, distancia_propia, parecidos):
+        if distancia_propia is None:
+            messagebox.showerror("Error", f"No hay un empleado registrado con el código '{codigo}'.")
+            return
+        if distancia_propia <= TOLERANCIA_FOTO_REPETIDA:
+            messagebox.showinfo("Foto repetida", "Esta foto es prácticamente igual a una que el empleado ya tiene.")
+            return
+        aviso = None
+        if parecidos:
+            aviso = f"La foto se parece más a '{parecidos[0][1]}' ({parecidos[0][0]}) que a las fotos de este empleado."
+        elif distancia_propia > TOLERANCIA:
+            aviso = f"La foto no parece de la misma persona (distancia {distancia_propia:.2f})."
+        if aviso and not messagebox.askyesno("Confirmar foto", f"{aviso}\n\n¿Agregarla de todas formas?"):
+            return
+
+        if agregar_foto_empleado(codigo, registro.foto, registro.miniatura):
+            self.galeria.agregar_foto(codigo, registro.foto, registro.encoding)
+            self._notificar_cambio_galeria()
+            messagebox.showinfo("Éxito", "Foto agregada al empleado.")
+            self._reiniciar_panel_registro()
+        else:
+            messagebox.showerror("Error", "No se pudo agregar la foto.")
+
+    def _comprobar_foto(self, comprobar, al_terminar):
+        """
+        Ejecuta `comprobar()` (detección del rostro y consultas a la galería) en un
+        hilo para no congelar la interfaz, y luego `al_terminar(*resultado)` en el
+        hilo de Tk. Un ValueError de `comprobar` es una foto no válida.
+        """
+        if self._comprobando_foto:
+            return # Ya hay una foto en comprobación (p. ej. doble clic)
+        self._comprobando_foto = True
+        resultado = []
+        def ejecutar():
+            try:
+                resultado.append((comprobar(), None))
+            except Exception as e:
+                resultado.append((None, e))
+        threading.Thread(target=ejecutar, name="comprobar-foto", daemon=True).start()
+        self.app.mostrar_estado("Comprobando la foto...", "warning")
+        self.app.after(100, self._vigilar_comprobacion, resultado, al_terminar)
+
+    def _vigilar_comprobacion(self, resultado, al_terminar):
+        if not resultado:
+            self.app.after(100, self._vigilar_comprobacion, resultado, al_terminar)
+            return
+        self._comprobando_foto = False
+        self.app.mostrar_estado("")
+        valor, error = resultado[0]
+        if isinstance(error, ValueError):
+            messagebox.showerror("Foto no válida", str(error))
+        elif error is not None:
+            messagebox.showerror("Error", f"No se pudo comprobar la foto: {error}")
+        else:
+            al_terminar(*valor)
+
+    def _consultar_galeria(self, metodo, *args, **kwargs):
+        """
+        Consulta la galería desde un hilo de trabajo. Con los modelos en procesos
+        de trabajo se pregunta a ellos, que ya tienen la galería cargada, en
+        lugar de mantener otra copia en este proceso; si no, se usa la galería
+        compartida, que el reconocimiento de este proceso ya cargó.
+        """
+        if self.modelos.usar_procesos:
+            # Normalmente ya lo cargó la precarga; si no, se carga aquí, fuera del hilo de Tk.
+            return self.modelos.cargar('servicio_inferencia').consultar_galeria(metodo, *args, **kwargs)
+        if not self.galeria.cargada:
+            self.galeria.cargar()
+        return getattr(self.galeria, metodo)(*args, **kwargs)
+
+    def _notificar_cambio_galeria(self):
+        """Avisa a los procesos de inferencia (si están cargados) que relean la galería."""
+        if self.modelos.cargado('servicio_inferencia'):
+            self.modelos.cargar('servicio_inferencia').notificar_cambio_galeria()
+
+    def _reiniciar_panel_registro(self):
+        from interfaz.panel_registro import PanelRegistro
+        panel_registro = self.app.paneles.get(PanelRegistro)
+        if panel_registro:
+            panel_registro.reset_panel()
+
+    def _invalidar_miniatura(self, codigo):
+        """Descarta la foto en caché de la lista de trabajadores, si el panel ya se creó."""
+        from interfaz.panel_trabajadores import PanelTrabajadores
+        panel_trabajadores = self.app.paneles.get(PanelTrabajadores) if self.app else None
+        if panel_trabajadores:
+            panel_trabajadores.miniaturas.invalidar(codigo)
+
     def registrar_asistencia(self, codigo, tipo, casco_ok, chaleco_ok):
         """ Registra la asistencia de un empleado. """
         if registrar_asistencia(codigo, tipo, casco_ok, chaleco_ok):
@@ -0,0 +1,215 @@
+"""
+Backends intercambiables para el detector de EPP ('best.pt').
+
+- 'ultralytics': el modelo PyTorch original a través de ultralytics.YOLO.
+- 'onnx': el modelo exportado a ONNX (opcionalmente cuantizado a int8) y
+  ejecutado con ONNX Runtime en CPU (o con OpenVINO si está disponible).
+  Con este backend no se importa torch ni ultralytics.
+
+Para exportar el modelo:
+    python -m logica.detectores best.pt [--int8]
+"""
+import ast
+import json
+import os
+import sys
+import cv2
+import numpy as np
+
+RUTA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RUTA_MODELO_PT = os.path.join(RUTA_BASE, 'best.pt')
+RUTA_MODELO_ONNX = os.path.join(RUTA_BASE, 'best.onnx')
+RUTA_MODELO_ONNX_INT8 = os.path.join(RUTA_BASE, 'best_int8.onnx')
+
+# Backend usado por ReconocimientoFacialEPP: 'ultralytics', 'onnx' u 'onnx-int8'.
+BACKEND_DETECTOR = 'ultralytics'
+UMBRAL_CONFIANZA = 0.5
+UMBRAL_NMS = 0.7 # El mismo IoU que usa ultralytics por defecto
+# Proveedores de ONNX Runtime en orden de preferencia (se usan los disponibles).
+PROVEEDORES_ONNX = ['OpenVINOExecutionProvider', 'CPUExecutionProvider']
+
+class DetectorUltralytics:
+    """Ejecuta el modelo .pt con ultralytics (PyTorch en modo eager)."""
+    def __init__(self, ruta_modelo=RUTA_MODELO_PT):
+        from ultralytics import YOLO # Importación diferida: arrastra torch
+        self.modelo = YOLO(ruta_modelo)
+        self.names = self.modelo.names
+
+    def detectar(self, frames, conf=UMBRAL_CONFIANZA):
+        """
+        Retorna, por cada frame, una lista de (x1, y1, x2, y2, clase, confianza)
+        en coordenadas del frame.
+        """
+        salida = []
+        for results in self.modelo(list(frames), verbose=False, conf=conf):
+            cajas = []
+            for r in results.boxes:
+                x1, y1, x2, y2 = map(int, r.xyxy[0])
+                cajas.append((x1, y1, x2, y2, int(r.cls[0]), float(r.conf[0])))
+            salida.append(cajas)
+        return salida
+
+def letterbox(frame, tamano, relleno=114):
+    """
+    Redimensiona manteniendo la proporción y rellena hasta `tamano` x `tamano`,
+    igual que el preprocesamiento de ultralytics. Retorna (imagen, escala, (dx, dy)).
+    """
+    alto, ancho = frame.shape[:2]
+    escala = min(tamano / alto, tamano / ancho)
+    nuevo_ancho, nuevo_alto = int(round(ancho * escala)), int(round(alto * escala))
+    dx, dy = (tamano - nuevo_ancho) // 2, (tamano - nuevo_alto) // 2
+    imagen = np.full((tamano, tamano, 3), relleno, dtype=np.uint8)
+    imagen[dy:dy + nuevo_alto, dx:dx + nuevo_ancho] = cv2.resize(frame, (nuevo_ancho, nuevo_alto), interpolation=cv2.INTER_LINEAR)
+    return imagen, escala, (dx, dy)
+
+class DetectorONNX:
+    """
+    Ejecuta el modelo YOLOv8 exportado a ONNX con ONNX Runtime. Replica el pre
+    y posprocesamiento de ultralytics (letterbox, BGR->RGB, /255, NMS por clase).
+    """
+    def __init__(self, ruta_modelo=RUTA_MODELO_ONNX, hilos=None):
+        import onnxruntime as ort
+        opciones = ort.SessionOptions()
+        opciones.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if hilos:
+            opciones.intra_op_num_threads = hilos
+        disponibles = ort.get_available_providers()
+        proveedores = [p for p in PROVEEDORES_ONNX if p in disponibles] or disponibles
+        self.sesion = ort.InferenceSession(ruta_modelo, sess_options=opciones, providers=proveedores)
+
+        entrada = self.sesion.get_inputs()[0]
+        self.nombre_entrada = entrada.name
+        self.tamano = entrada.shape[2] if isinstance(entrada.shape[2], int) else 640
+        # Un modelo exportado sin dynamic=True solo acepta lotes de 1 frame.
+        self.lote_fijo = isinstance(entrada.shape[0], int)
+        # ultralytics guarda los nombres de las clases en los metadatos del ONNX.
+        metadatos = self.sesion.get_modelmeta().custom_metadata_map
+        if 'names' in metadatos:
+            self.names = ast.literal_eval(metadatos['names'])
+        else:
+            self.names = leer_nombres_clases(ruta_modelo)
+
+    def detectar(self, frames, conf=UMBRAL_CONFIANZA):
+        """
+        Retorna, por cada frame, una lista de (x1, y1, x2, y2, clase, confianza)
+        en coordenadas del frame.
+        """
+        preparados = [letterbox(frame, self.tamano) for frame in frames]
+        tensores = np.stack([img[:, :, ::-1].transpose(2, 0, 1) for img, _, _ in preparados]).astype(np.float32)
+        tensores /= 255.0
+
+        if self.lote_fijo:
+            salidas = [self.sesion.run(None, {self.nombre_entrada: t[None]})[0][0] for t in tensores]
+        else:
+            salidas = self.sesion.run(None, {self.nombre_entrada: tensores})[0]
+        return [
+            self._posprocesar(salida, escala, desplazamiento, frame.shape, conf)
+            for salida, (_, escala, desplazamiento), frame in zip(salidas, preparados, frames)
+        ]
+
+    def _posprocesar(self, salida, escala, desplazamiento, forma, conf):
+        """Decodifica la salida (4 + clases, anclas) de YOLOv8 y aplica NMS por clase."""
+        predicciones = salida.T
+        puntajes = predicciones[:, 4:]
+        clases = np.argmax(puntajes, axis=1)
+        confianzas = puntajes[np.arange(len(clases)), clases]
+        mascara = confianzas >= conf
+        if not mascara.any():
+            return []
+        cx, cy, w, h = predicciones[mascara, :4].T
+        clases, confianzas = clases[mascara], confianzas[mascara]
+
+        dx, dy = desplazamiento
+        x1 = (cx - w / 2 - dx) / escala
+        y1 = (cy - h / 2 - dy) / escala
+        cajas_xywh = np.stack([x1, y1, w / escala, h / escala], axis=1)
+        indices = cv2.dnn.NMSBoxesBatched(cajas_xywh.tolist(), confianzas.tolist(), clases.tolist(), conf, UMBRAL_NMS)
+
+        alto, ancho = forma[:2]
+        cajas = []
+        for i in np.array(indices).reshape(-1):
+            bx, by, bw, bh = cajas_xywh[i]
+            cajas.append((
+                int(np.clip(bx, 0, ancho)), int(np.clip(by, 0, alto)),
+                int(np.clip(bx + bw, 0, ancho)), int(np.clip(by + bh, 0, alto)),
+                int(clases[i]), float(confianzas[i])
+            ))
+        cajas.sort(key=lambda c: c[5], reverse=True)
+        return cajas
+
+def ruta_nombres_clases(ruta_onnx):
+    """Archivo con los nombres de las clases que `exportar_onnx` deja junto al ONNX."""
+    return os.path.splitext(ruta_onnx)[0] + '.names.json'
+
+def leer_nombres_clases(ruta_onnx):
+    """
+    Nombres de las clases para un ONNX sin metadatos 'names' (p. ej. cuantizado
+    con otra herramienta), leídos del archivo que escribe `exportar_onnx`.
+    Lanza ValueError si no existe o no se puede leer.
+    """
+    ruta = ruta_nombres_clases(ruta_onnx)
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return {int(clase): nombre for clase, nombre in json.load(archivo).items()}
+    except (OSError, ValueError, AttributeError) as e:
+        raise ValueError(
+            f"El modelo '{ruta_onnx}' no tiene los nombres de las clases en sus metadatos "
+            f"ni en '{ruta}' ({e}). Vuelve a exportarlo con 'python -m logica.detectores'."
+        ) from e
+
+def guardar_nombres_clases(ruta_onnx, names):
+    with open(ruta_nombres_clases(ruta_onnx), 'w', encoding='utf-8') as archivo:
+        json.dump({str(clase): nombre for clase, nombre in dict(names).items()}, archivo, ensure_ascii=False)
+
+def crear_detector(backend=BACKEND_DETECTOR, ruta_modelo=None):
+    """
+    Crea el detector de EPP para el backend indicado. `ruta_modelo` permite
+    cargar otro archivo (p. ej. una versión nueva de best.pt) con ese backend.
+    """
+    if backend == 'ultralytics':
+        return DetectorUltralytics(ruta_modelo or RUTA_MODELO_PT)
+    if backend == 'onnx':
+        return DetectorONNX(ruta_modelo or RUTA_MODELO_ONNX)
+    if backend == 'onnx-int8':
+        return DetectorONNX(ruta_modelo or RUTA_MODELO_ONNX_INT8)
+    raise ValueError(f"Backend de detector desconocido: '{backend}'")
+
+def backend_para_archivo(ruta_modelo):
+    """Deduce el backend a partir de la extensión del archivo del modelo."""
+    return 'onnx' if ruta_modelo.lower().endswith('.onnx') else 'ultralytics'
+
+def precalentar_detector(detector, forma=(480, 640, 3)):
+    """Ejecuta una detección sobre un frame vacío (la primera llamada es la más lenta)."""
+    detector.detectar([np.zeros(forma, dtype=np.uint8)])
+    return detector
+
+def exportar_onnx(ruta_pt=RUTA_MODELO_PT, int8=False, dinamico=True):
+    """
+    Exporta el modelo .pt a ONNX (junto al original) y, si se pide, genera
+    además una versión cuantizada dinámicamente a int8. Junto a cada ONNX deja
+    los nombres de las clases (ver `leer_nombres_clases`). Retorna la ruta final.
+    """
+    from ultralytics import YOLO
+    modelo = YOLO(ruta_pt)
+    ruta_onnx = modelo.export(format='onnx', dynamic=dinamico, simplify=True)
+    guardar_nombres_clases(ruta_onnx, modelo.names)
+    if not int8:
+        return ruta_onnx
+    import onnx
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    ruta_int8 = ruta_onnx.replace('.onnx', '_int8.onnx')
+    quantize_dynamic(ruta_onnx, ruta_int8, weight_type=QuantType.QUInt8)
+    # Conservar los metadatos de ultralytics (nombres de las clases, tamaño de entrada...).
+    modelo_int8 = onnx.load(ruta_int8)
+    actuales = {m.key: m.value for m in modelo_int8.metadata_props}
+    metadatos = {m.key: m.value for m in onnx.load(ruta_onnx).metadata_props}
+    metadatos.update(actuales)
+    if metadatos != actuales:
+        onnx.helper.set_model_props(modelo_int8, metadatos)
+        onnx.save(modelo_int8, ruta_int8)
+    guardar_nombres_clases(ruta_int8, modelo.names)
+    return ruta_int8
+
+if __name__ == '__main__':
+    ruta = next((a for a in sys.argv[1:] if not a.startswith('--')), RUTA_MODELO_PT)
+    print(f"Modelo exportado: {exportar_onnx(ruta, int8='--int8' in sys.argv)}")
@@ -0,0 +1,98 @@
+"""
+Procesamiento de la foto al registrar un empleado: se detecta el rostro
+(rechazando fotos sin rostro o con más de uno), se guarda un recorte
+normalizado en lugar del frame completo, su embedding (directo a la caché) y
+una miniatura para las listas. Así el trabajo caro se hace una sola vez, al
+registrar, y no en cada carga de la galería.
+"""
+import collections
+import cv2
+import numpy as np
+
+# Lado (px) del recorte cuadrado del rostro que se guarda como foto del empleado.
+TAMANO_ROSTRO = 300
+# Margen alrededor de la caja del rostro, como fracción de su tamaño.
+MARGEN_ROSTRO = 0.4
+# Lado (px) de la miniatura usada en las listas.
+TAMANO_MINIATURA = 96
+CALIDAD_JPEG = 92
+# Guardar además la foto original a resolución completa (ocupa mucho más espacio).
+GUARDAR_FOTO_ORIGINAL = False
+# Lado máximo con el que se buscan rostros; las fotos más grandes se reducen
+# solo para la detección (la caja se lleva luego a la resolución original).
+LADO_MAXIMO_DETECCION = 800
+
+FotoRegistro = collections.namedtuple('FotoRegistro', ['foto', 'miniatura', 'encoding', 'foto_original'])
+
+def codificar_jpeg(imagen_bgr, calidad=CALIDAD_JPEG):
+    ok, buffer = cv2.imencode('.jpg', imagen_bgr, [cv2.IMWRITE_JPEG_QUALITY, calidad])
+    if not ok:
+        raise ValueError("No se pudo codificar la imagen.")
+    return buffer.tobytes()
+
+def localizar_rostros(imagen_rgb):
+    """Retorna las cajas (top, right, bottom, left) de los rostros, en coordenadas de la imagen."""
+    import face_recognition # dlib tarda en cargarse; solo se importa al registrar
+
+    alto, ancho = imagen_rgb.shape[:2]
+    escala = min(1.0, LADO_MAXIMO_DETECCION / max(alto, ancho))
+    if escala < 1.0:
+        reducida = cv2.resize(imagen_rgb, (int(ancho * escala), int(alto * escala)), interpolation=cv2.INTER_AREA)
+    else:
+        reducida = imagen_rgb
+    return [
+        tuple(int(round(v / escala)) for v in caja)
+        for caja in face_recognition.face_locations(reducida)
+    ]
+
+def recortar_rostro(imagen, caja, tamano=TAMANO_ROSTRO, margen=MARGEN_ROSTRO):
+    """
+    Recorta un cuadrado centrado en el rostro, con margen, y lo lleva a
+    `tamano` x `tamano`. Los bordes fuera de la imagen se rellenan replicando.
+    Retorna (recorte, caja del rostro dentro del recorte).
+    """
+    top, right, bottom, left = caja
+    lado = int(max(bottom - top, right - left) * (1 + 2 * margen))
+    cy, cx = (top + bottom) // 2, (left + right) // 2
+    y0, x0 = cy - lado // 2, cx - lado // 2
+    alto, ancho = imagen.shape[:2]
+    relleno = max(0, -y0, -x0, y0 + lado - alto, x0 + lado - ancho)
+    if relleno:
+        imagen = cv2.copyMakeBorder(imagen, relleno, relleno, relleno, relleno, cv2.BORDER_REPLICATE)
+        y0, x0 = y0 + relleno, x0 + relleno
+    recorte = cv2.resize(imagen[y0:y0 + lado, x0:x0 + lado], (tamano, tamano), interpolation=cv2.INTER_AREA)
+    escala = tamano / lado
+    y0, x0 = y0 - relleno, x0 - relleno
+    caja_recorte = tuple(int(round(v)) for v in (
+        (top - y0) * escala, (right - x0) * escala, (bottom - y0) * escala, (left - x0) * escala
+    ))
+    return recorte, caja_recorte
+
+def procesar_foto_registro(foto_bgr, guardar_original=GUARDAR_FOTO_ORIGINAL):
+    """
+    Valida y prepara la foto de un empleado nuevo. Lanza ValueError con un
+    mensaje para el usuario si no hay exactamente un rostro.
+    Retorna un FotoRegistro con los BLOB del recorte (JPEG) y la miniatura, el
+    embedding (float32) calculado sobre el mismo recorte que se guarda, y la
+    foto original (JPEG) o None.
+    """
+    import face_recognition
+
+    cajas = localizar_rostros(cv2.cvtColor(foto_bgr, cv2.COLOR_BGR2RGB))
+    if not cajas:
+        raise ValueError("No se detectó ningún rostro en la foto. Tome otra foto con el rostro de frente y bien iluminado.")
+    if len(cajas) > 1:
+        raise ValueError(f"Se detectaron {len(cajas)} rostros en la foto. Debe aparecer solo el empleado.")
+
+    recorte, caja_recorte = recortar_rostro(foto_bgr, cajas[0])
+    foto = codificar_jpeg(recorte)
+    # El embedding se calcula sobre el recorte ya comprimido, igual que si se
+    # volviera a codificar la foto guardada (p. ej. con otra versión del modelo).
+    recorte_guardado = cv2.imdecode(np.frombuffer(foto, dtype=np.uint8), cv2.IMREAD_COLOR)
+    encodings = face_recognition.face_encodings(cv2.cvtColor(recorte_guardado, cv2.COLOR_BGR2RGB), [caja_recorte])
+    if not encodings:
+        raise ValueError("No se pudo calcular la huella facial del rostro. Tome otra foto.")
+
+    miniatura = codificar_jpeg(cv2.resize(recorte, (TAMANO_MINIATURA, TAMANO_MINIATURA), interpolation=cv2.INTER_AREA))
+    foto_original = codificar_jpeg(foto_bgr) if guardar_original else None
+    return FotoRegistro(foto, miniatura, np.asarray(encodings[0], dtype=np.float32), foto_original)
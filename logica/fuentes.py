@@ -0,0 +1,268 @@
+"""
+Fuentes de frames independientes de la plataforma: cámaras (V4L2 en Linux,
+Media Foundation en Windows o el backend por defecto de OpenCV), streams por
+URL, archivos de video y carpetas de imágenes. Las dos últimas permiten
+probar todo el pipeline sin hardware.
+
+Una fuente se describe con un índice de dispositivo (0), una URL
+(rtsp://...), una ruta a un video o a una carpeta de imágenes, o con un
+prefijo que fuerza el backend: 'v4l2:0', 'msmf:0', 'dshow:0', 'default:0',
+'archivo:ruta' o 'imagenes:carpeta'.
+"""
+import os
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+
+# Backend de las cámaras locales: 'auto' (V4L2 en Linux, Media Foundation en
+# Windows, el de OpenCV en el resto), 'v4l2', 'msmf', 'dshow' o 'default'.
+BACKEND_CAMARA = 'auto'
+# Resolución (ancho, alto) y FPS pedidos a las cámaras; None usa los del driver.
+RESOLUCION_CAMARA = None
+FPS_CAMARA = None
+# Velocidad a la que se reproducen las carpetas de imágenes.
+FPS_IMAGENES = 10.0
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.bmp')
+# Ranuras del buffer circular de cada capturador.
+RANURAS_BUFFER = 3
+
+APIS_CAMARA = {
+    'v4l2': cv2.CAP_V4L2,
+    'msmf': cv2.CAP_MSMF,
+    'dshow': cv2.CAP_DSHOW,
+    'default': cv2.CAP_ANY,
+}
+
+def backend_por_defecto():
+    if sys.platform.startswith('linux'):
+        return 'v4l2'
+    if sys.platform.startswith('win'):
+        return 'msmf'
+    return 'default'
+
+class FuenteCaptura:
+    """
+    Fuente basada en cv2.VideoCapture. `leer(destino)` decodifica directamente
+    en `destino` cuando tiene la forma adecuada, sin reservar memoria.
+    """
+    en_vivo = True # Las fuentes en vivo no se pausan: entregan lo que produce el dispositivo
+
+    def __init__(self, descripcion):
+        self.descripcion = descripcion
+        self.cap = None
+
+    def _crear_captura(self):
+        return cv2.VideoCapture(self.descripcion)
+
+    def abrir(self):
+        self.cap = self._crear_captura()
+        return self.cap.isOpened()
+
+    def leer(self, destino=None):
+        ok, frame = self.cap.read(destino) if destino is not None else self.cap.read()
+        return frame if ok else None
+
+    def cerrar(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def __str__(self):
+        return str(self.descripcion)
+
+class FuenteCamara(FuenteCaptura):
+    """Cámara local por índice de dispositivo, con backend, resolución y FPS configurables."""
+    def __init__(self, indice, backend=BACKEND_CAMARA, resolucion=RESOLUCION_CAMARA, fps=FPS_CAMARA):
+        super().__init__(indice)
+        self.backend = backend_por_defecto() if backend == 'auto' else backend
+        if self.backend not in APIS_CAMARA:
+            raise ValueError(f"Backend de cámara desconocido: '{backend}'. Opciones: auto, {', '.join(APIS_CAMARA)}")
+        self.resolucion = resolucion
+        self.fps = fps
+
+    def _crear_captura(self):
+        cap = cv2.VideoCapture(self.descripcion, APIS_CAMARA[self.backend])
+        if cap.isOpened():
+            # Un solo frame en el driver: el capturador lee sin pausa y siempre obtiene el más reciente.
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if self.resolucion:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolucion[0])
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolucion[1])
+            if self.fps:
+                cap.set(cv2.CAP_PROP_FPS, self.fps)
+        return cap
+
+    def __str__(self):
+        return f"cámara {self.descripcion} ({self.backend})"
+
+class FuenteArchivo(FuenteCaptura):
+    """
+    Archivo de video reproducido a su velocidad nominal, como una cámara en
+    vivo; con `repetir` vuelve a empezar al terminar.
+    """
+    en_vivo = False
+
+    def __init__(self, ruta, repetir=True):
+        super().__init__(ruta)
+        self.repetir = repetir
+        self.terminada = False
+        self._periodo = 0.0
+        self._siguiente = None
+
+    def abrir(self):
+        if not super().abrir():
+            return False
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self._periodo = 1.0 / fps if fps and fps > 0 else 0.0
+        return True
+
+    def leer(self, destino=None):
+        _esperar_turno(self)
+        frame = super().leer(destino)
+        if frame is None and self.repetir:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # Volver al inicio del archivo
+            frame = super().leer(destino)
+        if frame is None:
+            self.terminada = True
+        return frame
+
+class FuenteImagenes:
+    """Carpeta de imágenes, en orden alfabético, entregadas a `fps` imágenes por segundo."""
+    en_vivo = False
+
+    def __init__(self, carpeta, fps=FPS_IMAGENES, repetir=True):
+        self.carpeta = carpeta
+        self.repetir = repetir
+        self.terminada = False
+        self._periodo = 1.0 / fps if fps and fps > 0 else 0.0
+        self._siguiente = None
+        self._rutas = []
+        self._posicion = 0
+
+    def abrir(self):
+        if not os.path.isdir(self.carpeta):
+            return False
+        self._rutas = sorted(
+            os.path.join(self.carpeta, nombre) for nombre in os.listdir(self.carpeta)
+            if nombre.lower().endswith(EXTENSIONES_IMAGEN)
+        )
+        self._posicion = 0
+        return bool(self._rutas)
+
+    def leer(self, destino=None):
+        _esperar_turno(self)
+        while True:
+            if self._posicion >= len(self._rutas):
+                if not self.repetir:
+                    self.terminada = True
+                    return None
+                self._posicion = 0
+            ruta = self._rutas[self._posicion]
+            self._posicion += 1
+            frame = cv2.imread(ruta, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return frame
+            print(f"Error: No se pudo leer la imagen '{ruta}'.")
+
+    def cerrar(self):
+        self._rutas = []
+
+    def __str__(self):
+        return f"carpeta de imágenes '{self.carpeta}'"
+
+def _esperar_turno(fuente):
+    """Espera hasta el instante del siguiente frame de una fuente reproducida (archivo o carpeta)."""
+    ahora = time.perf_counter()
+    if fuente._siguiente is not None and fuente._siguiente > ahora:
+        time.sleep(fuente._siguiente - ahora)
+        ahora = fuente._siguiente
+    fuente._siguiente = ahora + fuente._periodo
+
+def crear_fuente(descripcion, backend=BACKEND_CAMARA, resolucion=RESOLUCION_CAMARA, fps=FPS_CAMARA):
+    """Crea la fuente que corresponde a `descripcion` (ver el docstring del módulo)."""
+    if not isinstance(descripcion, (int, str)):
+        return descripcion # Ya es una fuente
+    descripcion = str(descripcion)
+    prefijo, separador, resto = descripcion.partition(':')
+    if separador and prefijo in APIS_CAMARA:
+        return FuenteCamara(int(resto), prefijo, resolucion, fps)
+    if separador and prefijo == 'archivo':
+        return FuenteArchivo(resto)
+    if separador and prefijo == 'imagenes':
+        return FuenteImagenes(resto)
+    if descripcion.isdigit():
+        return FuenteCamara(int(descripcion), backend, resolucion, fps)
+    if "://" in descripcion:
+        return FuenteCaptura(descripcion)
+    if os.path.isdir(descripcion):
+        return FuenteImagenes(descripcion)
+    return FuenteArchivo(descripcion)
+
+class BufferFrames:
+    """
+    Buffer circular preasignado con los últimos frames de una fuente. El
+    capturador decodifica en la ranura siguiente a la más reciente, así que los
+    lectores nunca ven un frame a medio escribir (salvo que el capturador dé la
+    vuelta completa mientras copian, lo que con 3 ranuras exige dos frames
+    enteros). Cada frame publicado recibe un número de secuencia creciente.
+    """
+    def __init__(self, ranuras=RANURAS_BUFFER):
+        self.n_ranuras = max(2, ranuras)
+        self._ranuras = None
+        self._lock = threading.Lock()
+        self._actual = -1
+        self.secuencia = 0
+        self.instante = None # time.perf_counter() del último frame
+
+    def siguiente_ranura(self):
+        """Ranura donde escribir el próximo frame, o None si el buffer aún no tiene forma."""
+        if self._ranuras is None:
+            return None
+        return self._ranuras[(self._actual + 1) % self.n_ranuras]
+
+    def publicar(self, frame):
+        """
+        Publica el frame como el más reciente. Si no se decodificó en la ranura
+        (primer frame o cambio de resolución), se reserva el buffer y se copia.
+        """
+        ranura = (self._actual + 1) % self.n_ranuras
+        if self._ranuras is None or self._ranuras.shape[1:] != frame.shape:
+            with self._lock:
+                self._ranuras = np.empty((self.n_ranuras,) + frame.shape, dtype=frame.dtype)
+                self._actual = -1
+            ranura = 0
+        if frame is not self._ranuras[ranura] and not np.shares_memory(frame, self._ranuras[ranura]):
+            self._ranuras[ranura] = frame
+        with self._lock:
+            self._actual = ranura
+            self.secuencia += 1
+            self.instante = time.perf_counter()
+
+    def ver_ultimo(self):
+        """
+        Retorna (frame más reciente sin copiarlo, secuencia), o (None, 0) si aún
+        no hay frames. El frame es la propia ranura: no debe modificarse y solo
+        sirve para un uso breve (p. ej. mostrarlo), ya que el capturador la
+        reescribe al dar la vuelta al buffer.
+        """
+        with self._lock:
+            if self._actual < 0:
+                return None, 0
+            return self._ranuras[self._actual], self.secuencia
+
+    def ultimo(self, destino=None):
+        """
+        Retorna (copia del frame más reciente, secuencia), o (None, 0) si aún no
+        hay frames. Con `destino` de la misma forma, copia en él sin reservar memoria.
+        """
+        with self._lock:
+            if self._actual < 0:
+                return None, 0
+            frame = self._ranuras[self._actual]
+            if destino is not None and destino.shape == frame.shape:
+                np.copyto(destino, frame)
+            else:
+                destino = frame.copy()
+            return destino, self.secuencia
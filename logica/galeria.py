@@ -0,0 +1,348 @@
+import numpy as np
+import threading
+import io
+from PIL import Image
+from logica.indices import crear_indice, DIMENSION_EMBEDDING
+from conexion.database import (
+    obtener_empleados_con_embedding,
+    obtener_fotos_adicionales_con_embedding,
+    obtener_foto_por_codigo,
+    obtener_foto_adicional,
+    obtener_embedding,
+    guardar_embedding,
+    calcular_hash_foto
+)
+
+# Identifica el modelo con el que se calcularon los embeddings guardados en caché.
+# Cambiarlo invalida la caché y obliga a recodificar todas las fotos.
+VERSION_CODIFICADOR = "dlib_face_recognition_resnet_model_v1/jitters=1"
+# Índice usado por defecto para buscar en la galería ('exacto' o 'ivf').
+TIPO_INDICE = 'exacto'
+# Distancia máxima para considerar que dos rostros son la misma persona
+# (el mismo valor por defecto que face_recognition.compare_faces).
+TOLERANCIA = 0.6
+# Cómo se resumen en un solo vector las fotos de un empleado: 'media' o 'medoide'.
+PROTOTIPO = 'media'
+# Indexar además cada foto por separado: más filas que comparar, pero reconoce
+# mejor a quien cambia mucho de aspecto (con y sin lentes, barba, casco...).
+INDEXAR_MUESTRAS = False
+# Distancia por debajo de la cual una foto nueva parece de alguien ya registrado.
+TOLERANCIA_DUPLICADO = 0.5
+# Distancia por debajo de la cual una foto nueva no aporta nada respecto a las
+# que ya tiene el empleado (prácticamente la misma imagen).
+TOLERANCIA_FOTO_REPETIDA = 0.1
+
+def calcular_prototipo(muestras, tipo=PROTOTIPO):
+    """
+    Resume los embeddings (n, 128) de las fotos de un empleado en un solo vector:
+    su media, o el medoide (la foto más cercana a todas las demás).
+    """
+    if len(muestras) == 1:
+        return muestras[0]
+    if tipo == 'media':
+        return muestras.mean(axis=0)
+    if tipo == 'medoide':
+        distancias = np.linalg.norm(muestras[:, None, :] - muestras[None, :, :], axis=2)
+        return muestras[np.argmin(distancias.sum(axis=1))]
+    raise ValueError(f"Tipo de prototipo desconocido: '{tipo}'. Opciones: media, medoide")
+
+def codificar_foto(foto_blob):
+    """
+    Calcula el embedding facial (128-d) de una foto en BLOB.
+    Retorna un array float32 o None si no se encontró un rostro.
+    """
+    import face_recognition # dlib tarda en cargarse; solo se importa al codificar
+
+    img_pil = Image.open(io.BytesIO(foto_blob))
+    img_np = np.array(img_pil.convert("RGB")) # Asegurar RGB para face_recognition
+    face_encodings = face_recognition.face_encodings(img_np)
+    if not face_encodings:
+        return None
+    return np.asarray(face_encodings[0], dtype=np.float32)
+
+def obtener_encoding_en_cache(foto_blob, foto_hash=None, consultar_cache=True):
+    """
+    Devuelve el embedding de la foto: lo busca en la caché por el hash de la
+    imagen y solo si no está la codifica y lo guarda. Con `consultar_cache=False`
+    (quien ya sabe que no está, como `cargar`) se codifica directamente.
+    Retorna None si la foto no tiene un rostro.
+    """
+    if foto_hash is None:
+        foto_hash = calcular_hash_foto(foto_blob)
+    if consultar_cache:
+        encoding_blob = obtener_embedding(foto_hash, VERSION_CODIFICADOR)
+        if encoding_blob is not None:
+            return np.frombuffer(encoding_blob, dtype=np.float32) if encoding_blob else None
+    try:
+        encoding = codificar_foto(foto_blob)
+    except Exception:
+        return None
+    guardar_embedding(foto_hash, VERSION_CODIFICADOR, encoding.tobytes() if encoding is not None else b"")
+    return encoding
+
+class GaleriaRostros:
+    """
+    Galería en memoria de los rostros conocidos, con operaciones incrementales
+    por código de empleado. `version` aumenta con cada cambio para que los
+    consumidores puedan saber, sin recorrerla, si algo cambió.
+
+    Los embeddings viven en un índice intercambiable (ver `logica.indices`):
+    'exacto' compara contra toda la galería y 'ivf' solo contra las particiones
+    más cercanas, para galerías de decenas de miles de personas.
+
+    Un empleado puede tener varias fotos (la principal primero). El índice
+    guarda un prototipo por empleado y, con `indexar_muestras`, también cada
+    foto por separado; en ambos casos la búsqueda es una sola pasada.
+    """
+    def __init__(self, tipo_indice=TIPO_INDICE, prototipo=PROTOTIPO, indexar_muestras=INDEXAR_MUESTRAS,
+                 **parametros_indice):
+        self._lock = threading.RLock()
+        self.tipo_indice = tipo_indice
+        self.parametros_indice = parametros_indice
+        self.prototipo = prototipo
+        self.indexar_muestras = indexar_muestras
+        self.indice = crear_indice(tipo_indice, **parametros_indice)
+        self.nombres = {}
+        self.muestras = {} # codigo -> embeddings (n, 128) de sus fotos
+        self._codigo_por_clave = {} # Claves del índice de las fotos indexadas por separado
+        self._max_claves = 1 # Máximo de filas del índice por empleado
+        self.version = 0
+        self.cargada = False
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __contains__(self, codigo):
+        return codigo in self.nombres
+
+    def cargar(self):
+        """
+        Carga (o vuelve a cargar) toda la galería desde la base de datos, con
+        la foto principal y las fotos adicionales de cada empleado.
+        Solo se codifican con dlib las fotos que no están en la caché.
+        """
+        def leer_encoding(encoding_blob, foto_hash, leer_foto):
+            if encoding_blob == b"":
+                return None # Foto ya analizada en la que no se encontró un rostro
+            if encoding_blob is not None:
+                return np.frombuffer(encoding_blob, dtype=np.float32)
+            foto_blob = leer_foto()
+            return obtener_encoding_en_cache(foto_blob, foto_hash, consultar_cache=False) if foto_blob else None
+
+        muestras, nombres = {}, {}
+        for codigo, nombre, apellidos, foto_hash, encoding_blob in obtener_empleados_con_embedding(VERSION_CODIFICADOR):
+            nombres[codigo] = f"{nombre} {apellidos}"
+            encoding = leer_encoding(encoding_blob, foto_hash, lambda: obtener_foto_por_codigo(codigo))
+            if encoding is not None:
+                muestras[codigo] = [encoding]
+        for codigo, id_foto, foto_hash, encoding_blob in obtener_fotos_adicionales_con_embedding(VERSION_CODIFICADOR):
+            if codigo not in nombres:
+                continue
+            encoding = leer_encoding(encoding_blob, foto_hash, lambda: obtener_foto_adicional(id_foto))
+            if encoding is not None:
+                muestras.setdefault(codigo, []).append(encoding)
+        codigos = list(muestras)
+        self.cargar_encodings(codigos, [nombres[c] for c in codigos], [muestras[c] for c in codigos])
+
+    def cargar_encodings(self, codigos, nombres_completos, encodings):
+        """
+        Reemplaza el contenido de la galería por los embeddings dados, alineados
+        con `codigos` y `nombres_completos`: una matriz (n, 128) con una foto por
+        empleado, o por cada empleado un vector o una lista de vectores (uno por
+        foto). El índice se construye aparte y se intercambia de forma atómica.
+        """
+        if isinstance(encodings, np.ndarray) and encodings.ndim == 2:
+            matriz = np.ascontiguousarray(encodings, dtype=np.float32)
+            muestras = {codigo: matriz[i:i + 1] for i, codigo in enumerate(codigos)}
+        else:
+            muestras = {
+                codigo: np.asarray(encoding, dtype=np.float32).reshape(-1, DIMENSION_EMBEDDING)
+                for codigo, encoding in zip(codigos, encodings)
+            }
+            matriz = np.asarray(
+                [calcular_prototipo(m, self.prototipo) for m in muestras.values()], dtype=np.float32
+            ).reshape(-1, DIMENSION_EMBEDDING)
+        claves = list(muestras)
+        codigo_por_clave = {}
+        if self.indexar_muestras:
+            extras = [(codigo, m) for codigo, m in muestras.items() if len(m) > 1]
+            for codigo, m in extras:
+                for j in range(len(m)):
+                    clave = self._clave_muestra(codigo, j)
+                    claves.append(clave)
+                    codigo_por_clave[clave] = codigo
+            if extras:
+                matriz = np.concatenate([matriz] + [m for _, m in extras])
+        indice = crear_indice(self.tipo_indice, **self.parametros_indice)
+        indice.cargar(claves, matriz)
+        nombres = dict(zip(codigos, nombres_completos))
+
+        with self._lock:
+            self.indice, self.nombres, self.muestras = indice, nombres, muestras
+            self._codigo_por_clave = codigo_por_clave
+            self._max_claves = max([self._claves_por_empleado(len(m)) for m in muestras.values()], default=1)
+            self.cargada = True
+            self.version += 1
+
+    @staticmethod
+    def _clave_muestra(codigo, j):
+        """Clave en el índice de la foto `j` de un empleado (cuando se indexan por separado)."""
+        return f"{codigo}#foto{j}"
+
+    def _claves_por_empleado(self, n_muestras):
+        return 1 + n_muestras if self.indexar_muestras and n_muestras > 1 else 1
+
+    def _quitar_del_indice(self, codigo):
+        anteriores = self.muestras.get(codigo)
+        if anteriores is None:
+            return False
+        self.indice.eliminar(codigo)
+        for j in range(len(anteriores)):
+            clave = self._clave_muestra(codigo, j)
+            if self._codigo_por_clave.pop(clave, None) is not None:
+                self.indice.eliminar(clave)
+        return True
+
+    def agregar_encoding(self, codigo, nombre_completo, encoding):
+        """
+        Agrega o reemplaza directamente los embeddings de un empleado: un vector
+        (una foto) o una matriz (n, 128) con todas sus fotos.
+        """
+        muestras = np.asarray(encoding, dtype=np.float32).reshape(-1, DIMENSION_EMBEDDING)
+        with self._lock:
+            self._quitar_del_indice(codigo)
+            self.indice.agregar(codigo, calcular_prototipo(muestras, self.prototipo))
+            if self._claves_por_empleado(len(muestras)) > 1:
+                for j, muestra in enumerate(muestras):
+                    clave = self._clave_muestra(codigo, j)
+                    self.indice.agregar(clave, muestra)
+                    self._codigo_por_clave[clave] = codigo
+            self.muestras[codigo] = muestras
+            self.nombres[codigo] = nombre_completo
+            self._max_claves = max(self._max_claves, self._claves_por_empleado(len(muestras)))
+            self.version += 1
+
+    def agregar(self, codigo, nombre, apellidos, foto_blob, encoding=None):
+        """
+        Agrega un empleado (o reemplaza sus datos si ya estaba) calculando
+        un único embedding, o usando `encoding` si ya se calculó al registrarlo
+        (se guarda en la caché). Retorna True si la foto tiene un rostro.
+        """
+        if encoding is not None:
+            encoding = np.asarray(encoding, dtype=np.float32)
+            guardar_embedding(calcular_hash_foto(foto_blob), VERSION_CODIFICADOR, encoding.tobytes())
+        else:
+            encoding = obtener_encoding_en_cache(foto_blob)
+        if encoding is None:
+            self.eliminar(codigo)
+            return False
+
+        with self._lock:
+            if not self.cargada:
+                # La galería completa se leerá de la BD (y de la caché) al cargarla;
+                # aun así se cuenta el cambio para quien replique la galería.
+                self.version += 1
+                return True
+            # Se conservan las fotos adicionales; la principal es siempre la primera.
+            muestras = self.muestras.get(codigo)
+            if muestras is not None:
+                muestras = muestras.copy()
+                muestras[0] = encoding
+                encoding = muestras
+            self.agregar_encoding(codigo, f"{nombre} {apellidos}", encoding)
+        return True
+
+    def agregar_foto(self, codigo, foto_blob, encoding=None):
+        """
+        Agrega una foto adicional a un empleado que ya está en la galería y
+        recalcula su prototipo. Igual que `agregar`, usa `encoding` si ya se
+        calculó (y lo guarda en la caché). Retorna True si la foto tiene un rostro.
+        """
+        if encoding is not None:
+            encoding = np.asarray(encoding, dtype=np.float32)
+            guardar_embedding(calcular_hash_foto(foto_blob), VERSION_CODIFICADOR, encoding.tobytes())
+        else:
+            encoding = obtener_encoding_en_cache(foto_blob)
+        if encoding is None:
+            return False
+
+        with self._lock:
+            if not self.cargada or codigo not in self.muestras:
+                self.version += 1
+                return True
+            muestras = np.vstack([self.muestras[codigo], encoding[None, :]])
+            self.agregar_encoding(codigo, self.nombres[codigo], muestras)
+        return True
+
+    def numero_fotos(self, codigo):
+        """Número de fotos con rostro de un empleado en la galería (0 si no está)."""
+        muestras = self.muestras.get(codigo)
+        return 0 if muestras is None else len(muestras)
+
+    def actualizar(self, codigo, nombre, apellidos, foto_blob):
+        """Actualiza los datos y la foto de un empleado existente."""
+        return self.agregar(codigo, nombre, apellidos, foto_blob)
+
+    def eliminar(self, codigo):
+        """Quita a un empleado de la galería. Retorna True si estaba presente."""
+        with self._lock:
+            if not self.cargada:
+                self.version += 1
+                return False
+            if not self._quitar_del_indice(codigo):
+                return False
+            del self.nombres[codigo]
+            del self.muestras[codigo]
+            self.version += 1
+            return True
+
+    def buscar(self, consultas, k=1):
+        """
+        Busca todos los embeddings de `consultas` (M, 128) en la galería en una
+        sola llamada al índice. Retorna, por cada consulta, una lista de hasta `k`
+        tuplas (codigo, nombre, distancia) ordenadas de menor a mayor distancia.
+        """
+        with self._lock:
+            if not self._codigo_por_clave:
+                resultados = self.indice.buscar(consultas, k)
+                return [
+                    [(codigo, self.nombres[codigo], distancia) for codigo, distancia in mejores]
+                    for mejores in resultados
+                ]
+            # Con las fotos indexadas por separado un empleado ocupa varias filas:
+            # se piden suficientes vecinos y se deja la mejor distancia de cada uno.
+            resultados = self.indice.buscar(consultas, k * self._max_claves)
+            codigo_por_clave = self._codigo_por_clave
+            salida = []
+            for mejores in resultados:
+                vistos, fila = set(), []
+                for clave, distancia in mejores:
+                    codigo = codigo_por_clave.get(clave, clave)
+                    if codigo in vistos:
+                        continue
+                    vistos.add(codigo)
+                    fila.append((codigo, self.nombres[codigo], distancia))
+                    if len(fila) == k:
+                        break
+                salida.append(fila)
+            return salida
+
+    def buscar_parecidos(self, encoding, tolerancia=TOLERANCIA_DUPLICADO, excluir=None, k=3):
+        """
+        Retorna los empleados (codigo, nombre, distancia) cuyo rostro está a menos
+        de `tolerancia` de `encoding`, del más al menos parecido, sin contar a
+        `excluir`. Sirve para detectar a alguien que ya está registrado.
+        """
+        mejores = self.buscar(np.asarray(encoding, dtype=np.float32)[None, :], k=k + 1)[0]
+        return [m for m in mejores if m[0] != excluir and m[2] <= tolerancia][:k]
+
+    def distancia_a_fotos(self, codigo, encoding):
+        """
+        Distancia mínima entre `encoding` y las fotos de un empleado, o None si
+        no está en la galería.
+        """
+        with self._lock:
+            muestras = self.muestras.get(codigo)
+        if muestras is None:
+            return None
+        return float(np.min(np.linalg.norm(muestras - np.asarray(encoding, dtype=np.float32), axis=1)))
@@ -0,0 +1,277 @@
+import numpy as np
+
+DIMENSION_EMBEDDING = 128
+CAPACIDAD_INICIAL = 64
+# Vectores a partir de los cuales IndiceIVF se entrena. Con n_sondeos=8 el IVF
+# recién empata con la búsqueda exacta hacia los 10 000 vectores y es más lento
+# por debajo (ver benchmarks/bench_indice_ann.py), así que se deja margen.
+MINIMO_ENTRENAMIENTO_IVF = 20_000
+
+class IndiceExacto:
+    """
+    Índice de búsqueda exacta (fuerza bruta) sobre una matriz (capacidad, 128)
+    float32 preasignada. Cada fila se identifica por una clave (el código del
+    empleado); eliminar mueve la última fila al hueco para mantenerla contigua.
+    """
+    def __init__(self, capacidad_inicial=CAPACIDAD_INICIAL):
+        self._matriz = np.empty((capacidad_inicial, DIMENSION_EMBEDDING), dtype=np.float32)
+        self._normas2 = np.empty(capacidad_inicial, dtype=np.float32)
+        self._n = 0
+        self.claves = []
+        self._fila_por_clave = {}
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, clave):
+        return clave in self._fila_por_clave
+
+    @property
+    def matriz(self):
+        """Vista (sin copia) de las filas ocupadas de la matriz de embeddings."""
+        return self._matriz[:self._n]
+
+    def cargar(self, claves, vectores):
+        """Reemplaza todo el contenido del índice de una sola vez."""
+        vectores = np.asarray(vectores, dtype=np.float32).reshape(-1, DIMENSION_EMBEDDING)
+        n = len(claves)
+        capacidad = max(n * 2, CAPACIDAD_INICIAL)
+        self._matriz = np.empty((capacidad, DIMENSION_EMBEDDING), dtype=np.float32)
+        self._matriz[:n] = vectores
+        self._normas2 = np.empty(capacidad, dtype=np.float32)
+        np.einsum('ij,ij->i', self._matriz[:n], self._matriz[:n], out=self._normas2[:n])
+        self._n = n
+        self.claves = list(claves)
+        self._fila_por_clave = {clave: i for i, clave in enumerate(self.claves)}
+
+    def agregar(self, clave, vector):
+        """Agrega un vector o reemplaza el de una clave existente."""
+        vector = np.asarray(vector, dtype=np.float32)
+        fila = self._fila_por_clave.get(clave)
+        if fila is None:
+            if self._n == len(self._matriz):
+                self._crecer()
+            fila = self._n
+            self._n += 1
+            self.claves.append(clave)
+            self._fila_por_clave[clave] = fila
+        self._matriz[fila] = vector
+        self._normas2[fila] = vector @ vector
+
+    def eliminar(self, clave):
+        """Quita una clave del índice. Retorna True si estaba presente."""
+        fila = self._fila_por_clave.pop(clave, None)
+        if fila is None:
+            return False
+        ultima = self._n - 1
+        if fila != ultima:
+            self._matriz[fila] = self._matriz[ultima]
+            self._normas2[fila] = self._normas2[ultima]
+            self.claves[fila] = self.claves[ultima]
+            self._fila_por_clave[self.claves[fila]] = fila
+        self.claves.pop()
+        self._n = ultima
+        return True
+
+    def _crecer(self):
+        """Duplica la capacidad de la matriz conservando las filas ocupadas."""
+        capacidad = max(len(self._matriz) * 2, CAPACIDAD_INICIAL)
+        matriz = np.empty((capacidad, DIMENSION_EMBEDDING), dtype=np.float32)
+        normas2 = np.empty(capacidad, dtype=np.float32)
+        matriz[:self._n] = self._matriz[:self._n]
+        normas2[:self._n] = self._normas2[:self._n]
+        self._matriz, self._normas2 = matriz, normas2
+
+    def buscar(self, consultas, k=1):
+        """
+        Compara todas las `consultas` (M, 128) contra el índice en un solo cálculo
+        matricial de distancias euclídeas. Retorna, por cada consulta, una lista de
+        hasta `k` tuplas (clave, distancia) ordenadas de menor a mayor distancia.
+        """
+        consultas = np.asarray(consultas, dtype=np.float32).reshape(-1, DIMENSION_EMBEDDING)
+        n = self._n
+        if n == 0 or len(consultas) == 0:
+            return [[] for _ in range(len(consultas))]
+        # |q - g|^2 = |q|^2 + |g|^2 - 2 q.g
+        distancias = consultas @ self._matriz[:n].T
+        distancias *= -2
+        distancias += self._normas2[:n]
+        distancias += np.einsum('ij,ij->i', consultas, consultas)[:, None]
+
+        k = min(k, n)
+        if k < n:
+            candidatos = np.argpartition(distancias, k - 1, axis=1)[:, :k]
+        else:
+            candidatos = np.broadcast_to(np.arange(n), (len(consultas), n))
+        filas = np.arange(len(consultas))[:, None]
+        orden = np.argsort(distancias[filas, candidatos], axis=1)
+        mejores = candidatos[filas, orden]
+        mejores_dist = np.sqrt(np.maximum(distancias[filas, mejores], 0))
+
+        claves = self.claves
+        return [
+            [(claves[j], float(d)) for j, d in zip(fila_idx, fila_dist)]
+            for fila_idx, fila_dist in zip(mejores, mejores_dist)
+        ]
+
+def asignar_centroide(vectores, centroides, bloque=4096):
+    """
+    Retorna el índice del centroide más cercano a cada vector. Se procesa por
+    bloques para no materializar la matriz completa de distancias.
+    """
+    normas2_centroides = np.einsum('ij,ij->i', centroides, centroides)
+    asignacion = np.empty(len(vectores), dtype=np.intp)
+    for inicio in range(0, len(vectores), bloque):
+        parte = vectores[inicio:inicio + bloque]
+        distancias = normas2_centroides - 2 * (parte @ centroides.T)
+        asignacion[inicio:inicio + bloque] = np.argmin(distancias, axis=1)
+    return asignacion
+
+def kmeans(vectores, k, iteraciones=10, semilla=0):
+    """
+    K-means de Lloyd en NumPy. Retorna la matriz (k, 128) de centroides.
+    Los centroides que se quedan sin puntos se reinician en un punto al azar.
+    """
+    rng = np.random.default_rng(semilla)
+    vectores = np.asarray(vectores, dtype=np.float32)
+    centroides = vectores[rng.choice(len(vectores), k, replace=False)].copy()
+    for _ in range(iteraciones):
+        asignacion = asignar_centroide(vectores, centroides)
+        conteos = np.bincount(asignacion, minlength=k)
+        sumas = np.zeros_like(centroides)
+        np.add.at(sumas, asignacion, vectores)
+        vacios = conteos == 0
+        centroides[~vacios] = sumas[~vacios] / conteos[~vacios, None]
+        if vacios.any():
+            centroides[vacios] = vectores[rng.choice(len(vectores), int(vacios.sum()), replace=False)]
+    return centroides
+
+class IndiceIVF:
+    """
+    Índice aproximado de archivo invertido (IVF): los vectores se reparten entre
+    `n_listas` particiones obtenidas con k-means y cada búsqueda solo revisa las
+    `n_sondeos` particiones más cercanas a la consulta.
+
+    `n_sondeos` es el control de recall/latencia: con n_sondeos == n_listas la
+    búsqueda es exacta. Mientras haya pocos vectores (menos de
+    `minimo_entrenamiento`) el índice se comporta como uno exacto.
+    """
+    def __init__(self, n_listas=None, n_sondeos=8, minimo_entrenamiento=MINIMO_ENTRENAMIENTO_IVF, iteraciones_kmeans=10):
+        self.n_listas_fijo = n_listas
+        self.n_sondeos = n_sondeos
+        self.minimo_entrenamiento = minimo_entrenamiento
+        self.iteraciones_kmeans = iteraciones_kmeans
+        self._centroides = None
+        self._listas = [IndiceExacto()]
+        self._lista_por_clave = {}
+        self._n_entrenado = 0
+
+    def __len__(self):
+        return len(self._lista_por_clave)
+
+    def __contains__(self, clave):
+        return clave in self._lista_por_clave
+
+    @property
+    def entrenado(self):
+        return self._centroides is not None
+
+    @property
+    def n_listas(self):
+        return len(self._listas)
+
+    def cargar(self, claves, vectores):
+        """Reemplaza todo el contenido del índice y lo entrena si hay suficientes datos."""
+        vectores = np.asarray(vectores, dtype=np.float32).reshape(-1, DIMENSION_EMBEDDING)
+        self._centroides = None
+        self._listas = [IndiceExacto()]
+        self._lista_por_clave = {}
+        if len(claves) >= self.minimo_entrenamiento:
+            self._entrenar(list(claves), vectores)
+        else:
+            self._listas[0].cargar(claves, vectores)
+            self._lista_por_clave = {clave: 0 for clave in claves}
+
+    def _entrenar(self, claves, vectores):
+        """Calcula las particiones con k-means y reparte los vectores entre ellas."""
+        n_listas = self.n_listas_fijo or max(1, int(np.sqrt(len(claves))))
+        n_listas = min(n_listas, len(claves))
+        # Entrenar con una muestra basta para estimar las particiones.
+        rng = np.random.default_rng(0)
+        muestra = vectores
+        if len(vectores) > 40 * n_listas:
+            muestra = vectores[rng.choice(len(vectores), 40 * n_listas, replace=False)]
+        self._centroides = kmeans(muestra, n_listas, self.iteraciones_kmeans)
+
+        asignacion = asignar_centroide(vectores, self._centroides)
+        self._listas = []
+        self._lista_por_clave = {}
+        claves_arr = np.array(claves, dtype=object)
+        for lista in range(n_listas):
+            miembros = np.flatnonzero(asignacion == lista)
+            indice = IndiceExacto(capacidad_inicial=max(len(miembros), 1))
+            indice.cargar(claves_arr[miembros].tolist(), vectores[miembros])
+            self._listas.append(indice)
+        for clave, lista in zip(claves, asignacion.tolist()):
+            self._lista_por_clave[clave] = lista
+        self._n_entrenado = len(claves)
+
+    def reentrenar(self):
+        """Recalcula las particiones con el contenido actual del índice."""
+        claves, vectores = [], []
+        for indice in self._listas:
+            claves.extend(indice.claves)
+            vectores.append(indice.matriz)
+        vectores = np.concatenate(vectores) if vectores else np.empty((0, DIMENSION_EMBEDDING), np.float32)
+        self.cargar(claves, vectores)
+
+    def agregar(self, clave, vector):
+        """Agrega (o reemplaza) un vector en la partición más cercana."""
+        vector = np.asarray(vector, dtype=np.float32)
+        self.eliminar(clave)
+        lista = 0 if not self.entrenado else int(asignar_centroide(vector[None, :], self._centroides)[0])
+        self._listas[lista].agregar(clave, vector)
+        self._lista_por_clave[clave] = lista
+        # Las particiones se degradan si el índice crece mucho desde el entrenamiento.
+        if len(self) >= max(self.minimo_entrenamiento, 2 * self._n_entrenado):
+            self.reentrenar()
+
+    def eliminar(self, clave):
+        """Quita una clave del índice. Retorna True si estaba presente."""
+        lista = self._lista_por_clave.pop(clave, None)
+        if lista is None:
+            return False
+        return self._listas[lista].eliminar(clave)
+
+    def buscar(self, consultas, k=1):
+        """
+        Busca los `k` vecinos más cercanos revisando solo `n_sondeos` particiones.
+        Retorna, por cada consulta, una lista de tuplas (clave, distancia).
+        """
+        consultas = np.asarray(consultas, dtype=np.float32).reshape(-1, DIMENSION_EMBEDDING)
+        if not self.entrenado:
+            return self._listas[0].buscar(consultas, k)
+
+        n_sondeos = min(self.n_sondeos, len(self._listas))
+        distancias = -2 * (consultas @ self._centroides.T) + np.einsum('ij,ij->i', self._centroides, self._centroides)
+        sondeos = np.argpartition(distancias, n_sondeos - 1, axis=1)[:, :n_sondeos]
+
+        resultados = []
+        for consulta, listas in zip(consultas, sondeos):
+            candidatos = []
+            for lista in listas:
+                candidatos.extend(self._listas[lista].buscar(consulta[None, :], k)[0])
+            candidatos.sort(key=lambda c: c[1])
+            resultados.append(candidatos[:k])
+        return resultados
+
+TIPOS_INDICE = {
+    'exacto': IndiceExacto,
+    'ivf': IndiceIVF,
+}
+
+def crear_indice(tipo='exacto', **parametros):
+    """Crea un índice de galería por nombre ('exacto' o 'ivf')."""
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconocido: '{tipo}'. Opciones: {', '.join(TIPOS_INDICE)}")
+    return TIPOS_INDICE[tipo](**parametros)
@@ -0,0 +1,240 @@
+"""
+Instrumentación liviana del pipeline de detección: tiempos por etapa en
+histogramas móviles (p50/p95/p99), FPS de captura frente a FPS procesados y
+frames descartados. Registrar una medición es O(1) y no reserva memoria, por
+lo que puede quedar activa en producción; los percentiles solo se calculan al
+pedir un resumen.
+"""
+import collections
+import contextlib
+import json
+import threading
+import time
+import numpy as np
+
+# Cantidad de mediciones recientes que conserva cada histograma.
+CAPACIDAD_HISTOGRAMA = 1024
+# Ventana (en segundos) para calcular los FPS.
+VENTANA_FPS_S = 5.0
+# Ventana (en segundos) para calcular el uso de CPU.
+VENTANA_CPU_S = 60.0
+RUTA_METRICAS = 'metricas.jsonl'
+INTERVALO_EXPORTACION_S = 60.0
+
+class HistogramaMovil:
+    """Últimas `capacidad` duraciones (en segundos) en un buffer circular preasignado."""
+    def __init__(self, capacidad=CAPACIDAD_HISTOGRAMA):
+        self._valores = np.zeros(capacidad, dtype=np.float32)
+        self._siguiente = 0
+        self.total = 0
+
+    def registrar(self, valor):
+        self._valores[self._siguiente] = valor
+        self._siguiente = (self._siguiente + 1) % len(self._valores)
+        self.total += 1
+
+    def percentiles(self, qs=(50, 95, 99)):
+        n = min(self.total, len(self._valores))
+        if n == 0:
+            return [None] * len(qs)
+        return [float(v) for v in np.percentile(self._valores[:n], qs)]
+
+class ContadorFPS:
+    """
+    Eventos por segundo dentro de una ventana deslizante. Cada marca descarta
+    las que ya salieron de la ventana, así que la memoria no crece aunque
+    nadie consulte los FPS (p. ej. en el modo kiosco).
+    """
+    def __init__(self, ventana_s=VENTANA_FPS_S):
+        self.ventana_s = ventana_s
+        self._instantes = collections.deque()
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def _descartar_viejos(self, ahora):
+        while self._instantes and ahora - self._instantes[0] > self.ventana_s:
+            self._instantes.popleft()
+
+    def marcar(self, ahora=None):
+        ahora = time.perf_counter() if ahora is None else ahora
+        with self._lock:
+            self._instantes.append(ahora)
+            self._descartar_viejos(ahora)
+            self.total += 1
+
+    def fps(self, ahora=None):
+        ahora = time.perf_counter() if ahora is None else ahora
+        with self._lock:
+            self._descartar_viejos(ahora)
+            return len(self._instantes) / self.ventana_s
+
+class MedidorCPU:
+    """
+    Uso de CPU (en % de un núcleo) dentro de una ventana deslizante: el de este
+    proceso más el que reportan los procesos de trabajo como contador.
+    """
+    def __init__(self, ventana_s=VENTANA_CPU_S):
+        self.ventana_s = ventana_s
+        self._muestras = collections.deque([(time.perf_counter(), time.process_time())]) # (instante, segundos de CPU)
+
+    def uso(self, cpu_externa_s=0.0):
+        ahora = time.perf_counter()
+        cpu = time.process_time() + cpu_externa_s
+        self._muestras.append((ahora, cpu))
+        while len(self._muestras) > 2 and ahora - self._muestras[1][0] >= self.ventana_s:
+            self._muestras.popleft()
+        inicio, cpu_inicio = self._muestras[0]
+        if ahora - inicio <= 0:
+            return None
+        return 100.0 * (cpu - cpu_inicio) / (ahora - inicio)
+
+class Metricas:
+    """
+    Registro de tiempos por etapa, tasas de frames y contadores del pipeline.
+
+    Con `acumular=True` también guarda las mediciones sueltas para que un
+    proceso de trabajo las entregue al proceso principal (`tomar_mediciones`).
+    """
+    def __init__(self, acumular=False):
+        self.activo = True
+        self._lock = threading.Lock()
+        self.etapas = {}
+        self.tasas = {}
+        self.contadores = collections.Counter()
+        self.hitos = {} # Hitos únicos, p. ej. segundos hasta la primera ventana
+        self.cpu = MedidorCPU()
+        self._acumuladas = ([], collections.Counter()) if acumular else None
+
+    def registrar(self, etapa, segundos):
+        if not self.activo:
+            return
+        if self._acumuladas is not None:
+            with self._lock:
+                self._acumuladas[0].append((etapa, segundos))
+        histograma = self.etapas.get(etapa)
+        if histograma is None:
+            with self._lock:
+                histograma = self.etapas.setdefault(etapa, HistogramaMovil())
+        histograma.registrar(segundos)
+
+    @contextlib.contextmanager
+    def medir(self, etapa):
+        """Mide la duración del bloque `with` y la registra en la etapa indicada."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def marcar_frame(self, tasa):
+        """Cuenta un frame para la tasa indicada (p. ej. 'captura' o 'procesados_rostros')."""
+        if not self.activo:
+            return
+        contador = self.tasas.get(tasa)
+        if contador is None:
+            with self._lock:
+                contador = self.tasas.setdefault(tasa, ContadorFPS())
+        contador.marcar()
+
+    def contar(self, evento, cantidad=1):
+        if self.activo and cantidad:
+            # `+=` sobre un Counter no es atómico: lo usan varios hilos a la vez.
+            with self._lock:
+                self.contadores[evento] += cantidad
+                if self._acumuladas is not None:
+                    self._acumuladas[1][evento] += cantidad
+
+    def registrar_hito(self, hito, segundos):
+        """Registra (solo la primera vez) un hito del arranque, como el tiempo hasta la primera ventana."""
+        if hito in self.hitos:
+            return
+        self.hitos[hito] = segundos
+        print(f"[arranque] {hito}: {segundos:.2f} s")
+
+    def tomar_mediciones(self):
+        """Retorna y vacía los ([(etapa, segundos)], {evento: cantidad}) acumulados."""
+        with self._lock:
+            tiempos, contadores = self._acumuladas
+            self._acumuladas = ([], collections.Counter())
+        return tiempos, dict(contadores)
+
+    def incorporar(self, mediciones):
+        """Registra las mediciones tomadas en otro proceso con `tomar_mediciones`."""
+        tiempos, contadores = mediciones
+        for etapa, segundos in tiempos:
+            self.registrar(etapa, segundos)
+        for evento, cantidad in contadores.items():
+            self.contar(evento, cantidad)
+
+    def resumen(self):
+        """Retorna un diccionario con percentiles (ms), FPS y contadores actuales."""
+        with self._lock:
+            etapas, tasas = dict(self.etapas), dict(self.tasas)
+            contadores = dict(self.contadores)
+        resumen_etapas = {}
+        for etapa, histograma in sorted(etapas.items()):
+            p50, p95, p99 = histograma.percentiles()
+            resumen_etapas[etapa] = {
+                'p50_ms': p50 * 1000 if p50 is not None else None,
+                'p95_ms': p95 * 1000 if p95 is not None else None,
+                'p99_ms': p99 * 1000 if p99 is not None else None,
+                'n': histograma.total,
+            }
+        # Frames que la compuerta de movimiento dejó sin inferencia (escena quieta)
+        con_movimiento, en_reposo = contadores.get('frames_con_movimiento', 0), contadores.get('frames_en_reposo', 0)
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'etapas': resumen_etapas,
+            'fps': {tasa: contador.fps() for tasa, contador in sorted(tasas.items())},
+            'contadores': contadores,
+            'hitos': dict(self.hitos),
+            'cpu_pct': self.cpu.uso(contadores.get('cpu_trabajadores_ms', 0) / 1000),
+            'reposo_pct': 100.0 * en_reposo / (con_movimiento + en_reposo) if con_movimiento + en_reposo else None,
+        }
+
+    def exportar(self, ruta=RUTA_METRICAS):
+        """Agrega el resumen actual como una línea JSON al archivo de métricas."""
+        with open(ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write(json.dumps(self.resumen(), ensure_ascii=False) + '\n')
+
+class ExportadorMetricas(threading.Thread):
+    """Hilo que exporta las métricas a un archivo local cada `intervalo_s` segundos."""
+    def __init__(self, metricas, ruta=RUTA_METRICAS, intervalo_s=INTERVALO_EXPORTACION_S):
+        super().__init__(name="exportador-metricas", daemon=True)
+        self.metricas = metricas
+        self.ruta = ruta
+        self.intervalo_s = intervalo_s
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.wait(self.intervalo_s):
+            try:
+                self.metricas.exportar(self.ruta)
+            except OSError as e:
+                print(f"Error al exportar las métricas: {e}")
+
+    def detener(self):
+        self._detener.set()
+
+def dibujar_metricas(frame, metricas):
+    """Dibuja en la esquina superior izquierda los FPS y el p95 de cada etapa."""
+    import cv2
+
+    resumen = metricas.resumen()
+    lineas = [f"{tasa}: {fps:.1f} fps" for tasa, fps in resumen['fps'].items()]
+    lineas += [
+        f"{etapa}: p50 {datos['p50_ms']:.1f} / p95 {datos['p95_ms']:.1f} ms"
+        for etapa, datos in resumen['etapas'].items() if datos['p50_ms'] is not None
+    ]
+    lineas += [f"{evento}: {cantidad}" for evento, cantidad in resumen['contadores'].items()]
+    for clave in ('cpu_pct', 'reposo_pct'):
+        if resumen[clave] is not None:
+            lineas.append(f"{clave}: {resumen[clave]:.0f}%")
+    alto_linea = 18
+    cv2.rectangle(frame, (0, 0), (330, 8 + alto_linea * len(lineas)), (0, 0, 0), -1)
+    for i, linea in enumerate(lineas):
+        cv2.putText(frame, linea, (6, 18 + i * alto_linea), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1, cv2.LINE_AA)
+    return frame
+
+# Instancia compartida por todo el proceso.
+METRICAS = Metricas()
@@ -0,0 +1,245 @@
+"""
+Registro de modelos compartido por todo el proceso. Lo crea el
+ControladorPrincipal y los paneles le piden los modelos por nombre, de modo
+que cada uno se carga una sola vez aunque lo usen varios paneles.
+
+Modelos registrados:
+
+- 'detector_epp': el detector de EPP ('best.pt' o su versión ONNX).
+- 'reconocimiento': ReconocimientoFacialEPP con la galería compartida y el
+  detector anterior. Los modelos de dlib ya son únicos por proceso.
+- 'servicio_inferencia': los procesos de trabajo de ServicioInferencia, cada
+  uno con sus propios modelos.
+- 'inferencia': el que usan los paneles, uno de los dos anteriores según
+  USAR_PROCESOS_INFERENCIA.
+
+Cada `adquirir` debe equilibrarse con un `liberar`. Al llegar a cero
+referencias el modelo sigue cargado (para no volver a pagar la carga al
+reabrir un panel) salvo que se cree con `descargar_sin_uso=True`;
+`descargar` lo libera explícitamente, por ejemplo ante falta de memoria.
+"""
+import collections
+import threading
+
+# Ejecutar los modelos en procesos de trabajo en lugar de hilos de este proceso,
+# para que la inferencia no compita por el GIL con la interfaz. Cada proceso
+# carga su propia copia de los modelos (ver `num_trabajadores`); con False hay
+# una sola copia y los hilos de las etapas comparten el GIL con la interfaz.
+# En ambos modos el lote de EPP de todas las cámaras es una sola llamada a YOLO.
+USAR_PROCESOS_INFERENCIA = True
+
+class RegistroModelos:
+    def __init__(self, galeria, backend_detector=None, ruta_detector=None,
+                 usar_procesos=USAR_PROCESOS_INFERENCIA, descargar_sin_uso=False, num_trabajadores=None):
+        self.galeria = galeria
+        self.backend_detector = backend_detector # None: BACKEND_DETECTOR de logica.detectores
+        self.ruta_detector = ruta_detector
+        self.usar_procesos = usar_procesos
+        self.num_trabajadores = num_trabajadores # None: NUM_TRABAJADORES de logica.servicio_inferencia
+        self.descargar_sin_uso = descargar_sin_uso
+        self._lock = threading.RLock()
+        self._modelos = {}
+        self._cargando = {} # nombre -> Event que se activa al terminar su carga
+        self._referencias = collections.Counter()
+        # Modelos de los que depende cada uno (se adquieren al cargarlo y se liberan al descargarlo)
+        self._dependencias = collections.defaultdict(list)
+        self.version_detector = 0 # Aumenta con cada reemplazo del detector de EPP
+
+    # --- Carga y descarga de cada modelo ---
+    # Los módulos de los modelos se importan al cargarlos (ver logica.precarga).
+
+    def _cargar_detector_epp(self):
+        from logica.detectores import crear_detector, precalentar_detector, BACKEND_DETECTOR
+        return precalentar_detector(crear_detector(self.backend_detector or BACKEND_DETECTOR, self.ruta_detector))
+
+    def _cargar_reconocimiento(self):
+        from logica.reconocimiento import ReconocimientoFacialEPP
+        try:
+            detector = self.adquirir('detector_epp')
+        except Exception as e:
+            # Sin detector de EPP el reconocimiento facial sigue funcionando.
+            print(f"Error al cargar el detector de EPP: {e}. Asegúrate de que el modelo está en la carpeta raíz.")
+            reconocimiento = ReconocimientoFacialEPP(galeria=self.galeria, backend_detector=None)
+            reconocimiento.precalentar()
+            return reconocimiento
+        try:
+            reconocimiento = ReconocimientoFacialEPP(galeria=self.galeria, detector_epp=detector)
+            reconocimiento.precalentar()
+        except Exception:
+            self.liberar('detector_epp')
+            raise
+        self._dependencias['reconocimiento'].append('detector_epp')
+        return reconocimiento
+
+    def _cargar_servicio_inferencia(self):
+        from logica.servicio_inferencia import ServicioInferencia, NUM_TRABAJADORES
+        servicio = ServicioInferencia(self.num_trabajadores or NUM_TRABAJADORES)
+        servicio.iniciar()
+        try:
+            # Cada proceso carga sus modelos y su galería (desde la caché de embeddings)
+            if not servicio.esperar_listo():
+                raise RuntimeError("El servicio de inferencia se detuvo antes de estar listo")
+        except Exception:
+            servicio.detener()
+            raise
+        if self.ruta_detector:
+            errores = {t: e for t, e in servicio.recargar_detector(*self._detector_actual()).items() if e}
+            if errores:
+                # Esos procesos siguen con el detector por defecto.
+                print(f"Error al cargar el detector de EPP '{self.ruta_detector}' en los procesos de inferencia: {errores}")
+        return servicio
+
+    def _detector_actual(self):
+        """Retorna (backend, ruta_modelo) del detector de EPP en uso (ruta None: la de por defecto)."""
+        from logica.detectores import backend_para_archivo, BACKEND_DETECTOR
+        if self.backend_detector:
+            return self.backend_detector, self.ruta_detector
+        if self.ruta_detector:
+            return backend_para_archivo(self.ruta_detector), self.ruta_detector
+        return BACKEND_DETECTOR, None
+
+    def _reemplazar_en_servicio(self, servicio, backend, ruta_modelo):
+        """
+        Activa el detector nuevo en todos los procesos de inferencia y espera sus
+        confirmaciones. Si alguno falla, los que ya lo activaron vuelven al
+        detector que tenían en memoria (el archivo pudo sobrescribirse con el
+        modelo que falló) y se lanza RuntimeError.
+        """
+        errores = servicio.recargar_detector(backend, ruta_modelo)
+        fallidos = {trabajador: error for trabajador, error in errores.items() if error}
+        if not fallidos:
+            return
+        correctos = [trabajador for trabajador, error in errores.items() if not error]
+        if correctos:
+            errores_anterior = {t: e for t, e in servicio.restaurar_detector(correctos).items() if e}
+            if errores_anterior:
+                print(f"Error al volver al detector de EPP anterior en los procesos de inferencia: {errores_anterior}")
+        raise RuntimeError("; ".join(f"proceso {trabajador}: {error}" for trabajador, error in sorted(fallidos.items())))
+
+    def _descargar_modelo(self, nombre, modelo):
+        if nombre == 'servicio_inferencia':
+            modelo.detener()
+        for dependencia in self._dependencias.pop(nombre, []):
+            self.liberar(dependencia)
+
+    def _resolver(self, nombre):
+        if nombre == 'inferencia':
+            return 'servicio_inferencia' if self.usar_procesos else 'reconocimiento'
+        return nombre
+
+    # --- API pública ---
+
+    def cargar(self, nombre):
+        """
+        Carga el modelo si aún no lo está (sin tomar una referencia) y lo retorna.
+        La carga se hace fuera del lock del registro, para no bloquear a quien
+        adquiera o libere otros modelos; si otro hilo ya lo está cargando, se
+        espera a que termine (y si falló, se reintenta).
+        """
+        nombre = self._resolver(nombre)
+        while True:
+            with self._lock:
+                if nombre in self._modelos:
+                    return self._modelos[nombre]
+                cargando = self._cargando.get(nombre)
+                if cargando is None:
+                    cargador = getattr(self, f"_cargar_{nombre}", None)
+                    if cargador is None:
+                        raise KeyError(f"Modelo desconocido: '{nombre}'")
+                    cargando = self._cargando[nombre] = threading.Event()
+                    break
+            cargando.wait()
+        try:
+            modelo = cargador()
+            with self._lock:
+                self._modelos[nombre] = modelo
+            return modelo
+        finally:
+            with self._lock:
+                del self._cargando[nombre]
+            cargando.set()
+
+    def adquirir(self, nombre):
+        """Retorna el modelo (cargándolo una sola vez) y toma una referencia."""
+        nombre = self._resolver(nombre)
+        while True:
+            modelo = self.cargar(nombre)
+            with self._lock:
+                # Si se descargó entre la carga y este punto, se vuelve a cargar.
+                if self._modelos.get(nombre) is modelo:
+                    self._referencias[nombre] += 1
+                    return modelo
+
+    def liberar(self, nombre):
+        """Devuelve una referencia tomada con `adquirir`."""
+        nombre = self._resolver(nombre)
+        with self._lock:
+            if self._referencias[nombre] <= 0:
+                return
+            self._referencias[nombre] -= 1
+            if self._referencias[nombre] == 0 and self.descargar_sin_uso:
+                self.descargar(nombre)
+
+    def descargar(self, nombre):
+        """Quita el modelo del registro para liberar memoria, aunque alguien lo siga usando."""
+        nombre = self._resolver(nombre)
+        with self._lock:
+            modelo = self._modelos.pop(nombre, None)
+            self._referencias.pop(nombre, None)
+            if modelo is not None:
+                self._descargar_modelo(nombre, modelo)
+
+    def cargado(self, nombre):
+        return self._resolver(nombre) in self._modelos
+
+    def referencias(self, nombre):
+        return self._referencias[self._resolver(nombre)]
+
+    def cerrar(self):
+        """Descarga todos los modelos (al salir de la aplicación)."""
+        with self._lock:
+            for nombre in list(self._modelos):
+                self.descargar(nombre)
+
+    def reemplazar_detector(self, ruta_modelo, backend=None, al_terminar=None):
+        """
+        Carga en segundo plano otra versión del detector de EPP y, cuando está
+        lista y precalentada, la activa en todos los modelos que la usan;
+        mientras tanto se sigue detectando con la anterior. La ruta nueva solo
+        se adopta cuando todos los procesos de inferencia confirmaron el cambio;
+        si alguno falla, todos vuelven al detector anterior.
+        `al_terminar(error)` se llama desde el hilo de carga (error es None si
+        todo salió bien). Retorna el hilo.
+        """
+        from logica.detectores import crear_detector, precalentar_detector, backend_para_archivo
+        backend = backend or backend_para_archivo(ruta_modelo)
+
+        def cargar():
+            error = None
+            try:
+                nuevo = None
+                if self.cargado('detector_epp') or self.cargado('reconocimiento'):
+                    nuevo = precalentar_detector(crear_detector(backend, ruta_modelo))
+                with self._lock:
+                    servicio = self._modelos.get('servicio_inferencia')
+                if servicio is not None:
+                    # Cada proceso carga el modelo nuevo por su cuenta, lo activa y lo confirma.
+                    self._reemplazar_en_servicio(servicio, backend, ruta_modelo)
+                with self._lock:
+                    self.backend_detector, self.ruta_detector = backend, ruta_modelo
+                    if nuevo is not None:
+                        self._modelos['detector_epp'] = nuevo
+                        reconocimiento = self._modelos.get('reconocimiento')
+                        if reconocimiento is not None:
+                            reconocimiento.detector_epp = nuevo
+                    self.version_detector += 1
+                print(f"Detector de EPP reemplazado por '{ruta_modelo}' ({backend}).")
+            except Exception as e:
+                print(f"Error al cargar el nuevo detector de EPP '{ruta_modelo}': {e}")
+                error = e
+            if al_terminar:
+                al_terminar(error)
+
+        hilo = threading.Thread(target=cargar, name="reemplazo-detector", daemon=True)
+        hilo.start()
+        return hilo
@@ -0,0 +1,70 @@
+"""
+Detector de movimiento barato que decide, frame a frame, si vale la pena
+ejecutar la inferencia completa (YOLO y reconocimiento facial). Compara cada
+frame, reducido y en escala de grises, contra un fondo que se adapta poco a
+poco; si la escena está quieta la inferencia se pausa (con una ejecución de
+control cada `intervalo_reposo_s`) y se reanuda en cuanto algo se mueve.
+"""
+import time
+import cv2
+import numpy as np
+
+# Ancho (px) al que se reduce el frame para buscar movimiento.
+ANCHO_MOVIMIENTO = 160
+# Diferencia de intensidad (0-255) a partir de la cual un pixel cambió.
+UMBRAL_PIXEL = 25
+# Fracción de pixeles cambiados a partir de la cual hay movimiento.
+FRACCION_MINIMA = 0.005
+# Velocidad con la que el fondo absorbe los cambios lentos (luz, sombras).
+APRENDIZAJE_FONDO = 0.05
+# Segundos que se sigue infiriendo después del último movimiento, para que
+# los resultados reflejen la escena ya vacía.
+SEGUNDOS_TRAS_MOVIMIENTO = 3.0
+# Con la escena quieta, una inferencia de control cada tantos segundos.
+INTERVALO_REPOSO_S = 5.0
+
+class DetectorMovimiento:
+    """Compuerta de inferencia para una cámara (un detector por canal)."""
+    def __init__(self, ancho=ANCHO_MOVIMIENTO, umbral_pixel=UMBRAL_PIXEL, fraccion_minima=FRACCION_MINIMA,
+                 aprendizaje=APRENDIZAJE_FONDO, segundos_tras_movimiento=SEGUNDOS_TRAS_MOVIMIENTO,
+                 intervalo_reposo_s=INTERVALO_REPOSO_S):
+        self.ancho = ancho
+        self.umbral_pixel = umbral_pixel
+        self.fraccion_minima = fraccion_minima
+        self.aprendizaje = aprendizaje
+        self.segundos_tras_movimiento = segundos_tras_movimiento
+        self.intervalo_reposo_s = intervalo_reposo_s
+        self._fondo = None
+        self.fraccion = 0.0 # Fracción de pixeles cambiados en el último frame
+        self.ultimo_movimiento = None
+        self.ultima_inferencia = None
+        self.en_reposo = False
+
+    def hay_movimiento(self, frame):
+        """Compara el frame con el fondo (y actualiza el fondo). Retorna True si hubo movimiento."""
+        alto, ancho = frame.shape[:2]
+        reducido = cv2.resize(frame, (self.ancho, max(1, alto * self.ancho // ancho)), interpolation=cv2.INTER_AREA)
+        gris = cv2.cvtColor(reducido, cv2.COLOR_BGR2GRAY) if reducido.ndim == 3 else reducido
+        gris = cv2.GaussianBlur(gris, (5, 5), 0)
+        if self._fondo is None or self._fondo.shape != gris.shape:
+            self._fondo = gris.astype(np.float32)
+            return True
+        diferencia = cv2.absdiff(gris, cv2.convertScaleAbs(self._fondo))
+        self.fraccion = np.count_nonzero(diferencia > self.umbral_pixel) / diferencia.size
+        cv2.accumulateWeighted(gris, self._fondo, self.aprendizaje)
+        return self.fraccion >= self.fraccion_minima
+
+    def debe_inferir(self, frame, ahora=None):
+        """
+        Retorna True si el frame debe pasar a la inferencia: hubo movimiento
+        hace poco o toca la inferencia de control del reposo.
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        if self.hay_movimiento(frame):
+            self.ultimo_movimiento = ahora
+        reciente = self.ultimo_movimiento is not None and ahora - self.ultimo_movimiento < self.segundos_tras_movimiento
+        self.en_reposo = not reciente
+        if reciente or self.ultima_inferencia is None or ahora - self.ultima_inferencia >= self.intervalo_reposo_s:
+            self.ultima_inferencia = ahora
+            return True
+        return False
@@ -0,0 +1,241 @@
+import threading
+import time
+from logica.anotaciones import dibujar_anotaciones, combinar_detecciones
+from logica.metricas import METRICAS
+
+# Frecuencias por defecto (ejecuciones por segundo) de cada etapa de inferencia.
+FRECUENCIA_EPP_HZ = 4.0
+FRECUENCIA_ROSTROS_HZ = 8.0
+# Pausar la inferencia mientras la escena de una cámara está quieta (ver logica.movimiento).
+USAR_COMPUERTA_MOVIMIENTO = True
+
+class _Etapa(threading.Thread):
+    """
+    Hilo que ejecuta una etapa de inferencia, como máximo `frecuencia_hz` veces
+    por segundo, sobre el frame más reciente de cada canal que haya cambiado.
+    Todos los canales con frame nuevo se procesan en una sola llamada por lotes.
+    """
+    def __init__(self, nombre, funcion_lote, frecuencia_hz, planificador):
+        super().__init__(name=f"etapa-{nombre}", daemon=True)
+        self.funcion_lote = funcion_lote
+        self.periodo = 1.0 / frecuencia_hz if frecuencia_hz > 0 else 0.0
+        self.planificador = planificador
+        self.nombre = nombre
+        self.resultados = {} # canal -> último resultado
+        self.secuencias_procesadas = {}
+        self.numeros_procesados = {} # canal -> número de frame del canal procesado
+        # Aumenta con cada `reiniciar`: los resultados de una inferencia que
+        # empezó antes son de frames ya descartados y no se guardan.
+        self.generacion = 0
+        self._lock = threading.Lock()
+
+    def reiniciar(self, canal=None):
+        """Descarta los resultados de un canal, o de todos, y los de las inferencias en curso."""
+        with self._lock:
+            self.generacion += 1
+            for estado in (self.resultados, self.secuencias_procesadas, self.numeros_procesados):
+                if canal is None:
+                    estado.clear()
+                else:
+                    estado.pop(canal, None)
+
+    def run(self):
+        plan = self.planificador
+        while plan.activo:
+            inicio = time.perf_counter()
+            generacion = self.generacion
+            nuevos = plan.frames_nuevos(self.secuencias_procesadas)
+            if not nuevos:
+                # No hay un frame nuevo todavía; esperar a que llegue uno.
+                plan.esperar_frame(self.periodo or 0.05)
+                continue
+            canales = [canal for canal, _, _, _ in nuevos]
+            resultados = [None] * len(nuevos)
+            try:
+                with plan.metricas.medir(f"etapa_{self.nombre}"):
+                    resultados = self.funcion_lote([frame for _, frame, _, _ in nuevos], canales)
+            except Exception as e:
+                print(f"Error en la etapa '{self.name}': {e}")
+            with self._lock:
+                if self.generacion != generacion:
+                    # Se reinició durante la inferencia: el lote es de antes del reinicio.
+                    continue
+                for (canal, _, secuencia, numero), resultado in zip(nuevos, resultados):
+                    if resultado is None:
+                        # Frame descartado: se conserva el resultado anterior y se
+                        # reintenta con el frame más reciente en la próxima vuelta.
+                        continue
+                    self.resultados[canal] = resultado
+                    self.secuencias_procesadas[canal] = secuencia
+                    # Los frames publicados en el canal que esta etapa nunca llegó a ver
+                    anterior = self.numeros_procesados.get(canal)
+                    if anterior is not None:
+                        plan.metricas.contar(f"descartados_{self.nombre}", numero - anterior - 1)
+                    self.numeros_procesados[canal] = numero
+                    plan.metricas.marcar_frame(f"procesados_{self.nombre}")
+            restante = self.periodo - (time.perf_counter() - inicio)
+            if restante > 0:
+                time.sleep(restante)
+
+class PlanificadorInferencia:
+    """
+    Ejecuta la detección de EPP y el reconocimiento facial en hilos separados,
+    cada uno a su propia frecuencia. Cada etapa toma el frame más reciente
+    disponible y la superposición combina el último resultado de ambas sobre
+    el frame más nuevo de la cámara, sin esperar a que terminen los modelos.
+
+    Admite varios canales (cámaras): cada etapa procesa los frames nuevos de
+    todos ellos en un solo lote y devuelve a cada canal su propio resultado.
+
+    Con `compuerta_movimiento`, un detector de movimiento por canal decide qué
+    frames llegan a las etapas: con la escena quieta se siguen mostrando los
+    frames de la cámara, pero los modelos solo corren cada pocos segundos.
+
+    `reconocimiento` es cualquier objeto con `detectar_epp_lote`,
+    `reconocer_rostros_lote` y `reiniciar_seguimiento`: un
+    ReconocimientoFacialEPP en este proceso o un ServicioInferencia que delega
+    en procesos de trabajo.
+    """
+    def __init__(self, reconocimiento, frecuencia_epp_hz=FRECUENCIA_EPP_HZ, frecuencia_rostros_hz=FRECUENCIA_ROSTROS_HZ, metricas=METRICAS,
+                 compuerta_movimiento=USAR_COMPUERTA_MOVIMIENTO):
+        self.reconocimiento = reconocimiento
+        self.metricas = metricas
+        self.compuerta_movimiento = compuerta_movimiento
+        self.detectores_movimiento = {} # canal -> DetectorMovimiento
+        self.frecuencia_epp_hz = frecuencia_epp_hz
+        self.frecuencia_rostros_hz = frecuencia_rostros_hz
+        self.activo = False
+        self._condicion = threading.Condition()
+        self._frames = {} # canal -> (frame, secuencia, número de frame del canal)
+        self._secuencia = 0
+        self._publicados = {} # canal -> frames publicados para la inferencia
+        self._capturas = {} # canal -> frames recibidos de la cámara (para mostrar solo los nuevos)
+        self._etapa_epp = None
+        self._etapa_rostros = None
+
+    def iniciar(self):
+        if self.activo:
+            return
+        self.activo = True
+        self._etapa_epp = _Etapa("epp", self.reconocimiento.detectar_epp_lote, self.frecuencia_epp_hz, self)
+        self._etapa_rostros = _Etapa("rostros", self.reconocimiento.reconocer_rostros_lote, self.frecuencia_rostros_hz, self)
+        self._etapa_epp.start()
+        self._etapa_rostros.start()
+
+    def detener(self):
+        self.activo = False
+        with self._condicion:
+            self._condicion.notify_all()
+        for etapa in (self._etapa_epp, self._etapa_rostros):
+            if etapa and etapa.is_alive():
+                etapa.join(timeout=1)
+        self._etapa_epp = self._etapa_rostros = None
+
+    def reiniciar(self, canal=None):
+        """Descarta el frame y los resultados de un canal, o de todos (p. ej. tras marcar asistencia)."""
+        with self._condicion:
+            if canal is None:
+                self._frames.clear()
+            else:
+                self._frames.pop(canal, None)
+        for etapa in (self._etapa_epp, self._etapa_rostros):
+            if etapa:
+                etapa.reiniciar(canal)
+        self.reconocimiento.reiniciar_seguimiento(canal)
+
+    def publicar_frame(self, frame, canal=0):
+        """
+        Entrega un nuevo frame de una cámara; reemplaza al anterior sin encolarlo.
+        Si la escena está quieta el frame solo se usa para mostrarlo: conserva
+        la secuencia del anterior y las etapas no lo vuelven a procesar.
+        """
+        inferir = True
+        if self.compuerta_movimiento:
+            detector = self.detectores_movimiento.get(canal)
+            if detector is None:
+                from logica.movimiento import DetectorMovimiento
+                detector = self.detectores_movimiento[canal] = DetectorMovimiento()
+            with self.metricas.medir('movimiento'):
+                inferir = detector.debe_inferir(frame)
+            self.metricas.contar('frames_con_movimiento' if not detector.en_reposo else 'frames_en_reposo')
+
+        with self._condicion:
+            self._capturas[canal] = self._capturas.get(canal, 0) + 1
+            anterior = self._frames.get(canal)
+            if inferir or anterior is None:
+                self._secuencia += 1
+                numero = self._publicados.get(canal, 0) + 1
+                self._publicados[canal] = numero
+                self._frames[canal] = (frame, self._secuencia, numero)
+                self._condicion.notify_all()
+            else:
+                self._frames[canal] = (frame, anterior[1], anterior[2])
+        self.metricas.marcar_frame('captura')
+
+    def en_reposo(self, canal=0):
+        """True si la inferencia del canal está pausada porque la escena está quieta."""
+        detector = self.detectores_movimiento.get(canal)
+        return detector is not None and detector.en_reposo
+
+    def frames_nuevos(self, secuencias_procesadas):
+        """Retorna [(canal, frame, secuencia, numero)] de los canales con un frame aún no procesado."""
+        with self._condicion:
+            return [
+                (canal, frame, secuencia, numero)
+                for canal, (frame, secuencia, numero) in self._frames.items()
+                if secuencias_procesadas.get(canal) != secuencia
+            ]
+
+    def esperar_frame(self, timeout):
+        with self._condicion:
+            self._condicion.wait(timeout)
+
+    def obtener_detecciones(self, canal=0):
+        """
+        Retorna (detecciones, secuencia, secuencia_epp) sin dibujar nada: las
+        últimas detecciones combinadas del canal y las secuencias de los frames
+        que usaron la etapa de rostros y la de EPP (cada una cambia solo cuando
+        su etapa tiene un resultado nuevo). Las secuencias crecen con cada frame
+        publicado, así que también indican cuál de los dos resultados es más reciente.
+        """
+        # Las secuencias se leen antes que los resultados: la etapa guarda el
+        # resultado antes de su secuencia, así que nunca es más viejo que ella.
+        secuencia = self._etapa_rostros.secuencias_procesadas.get(canal) if self._etapa_rostros else None
+        secuencia_epp = self._etapa_epp.secuencias_procesadas.get(canal) if self._etapa_epp else None
+        resultado_epp = self._etapa_epp.resultados.get(canal) if self._etapa_epp else None
+        rostros = (self._etapa_rostros.resultados.get(canal) if self._etapa_rostros else None) or []
+        estado_epp, _ = resultado_epp or ({}, [])
+        return combinar_detecciones(estado_epp, rostros), secuencia, secuencia_epp
+
+    def version_visual(self, canal=0):
+        """
+        Identifica lo que se vería del canal: cambia con cada frame nuevo de la
+        cámara y con cada resultado nuevo de una etapa.
+        """
+        return (
+            self._capturas.get(canal),
+            self._etapa_epp.secuencias_procesadas.get(canal) if self._etapa_epp else None,
+            self._etapa_rostros.secuencias_procesadas.get(canal) if self._etapa_rostros else None,
+        )
+
+    def obtener_para_mostrar(self, canal=0):
+        """
+        Retorna (frame, anotar, detecciones, version) sin copiar ni dibujar sobre
+        el frame más reciente del canal: `anotar(imagen, escala)` dibuja las
+        últimas anotaciones de cada etapa sobre una copia ya reducida del frame y
+        `version` es la de `version_visual`. El frame no debe modificarse.
+        Retorna (None, None, None, None) si todavía no llegó ningún frame.
+        """
+        with self._condicion:
+            version = self.version_visual(canal)
+            frame = self._frames.get(canal, (None,))[0]
+        if frame is None:
+            return None, None, None, None
+        resultado_epp = self._etapa_epp.resultados.get(canal) if self._etapa_epp else None
+        rostros = (self._etapa_rostros.resultados.get(canal) if self._etapa_rostros else None) or []
+        estado_epp, cajas_epp = resultado_epp or ({}, [])
+
+        def anotar(imagen, escala=1.0):
+            with self.metricas.medir('dibujo'):
+                dibujar_anotaciones(imagen, cajas_epp, rostros, escala)
+        return frame, anotar, combinar_detecciones(estado_epp, rostros), version
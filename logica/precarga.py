@@ -0,0 +1,41 @@
+"""
+Carga en segundo plano, a través del registro de modelos, el detector de EPP,
+el reconocimiento facial y la galería, con una inferencia de calentamiento,
+para que la ventana aparezca de inmediato y el panel de asistencia no bloquee
+la interfaz al abrirse.
+"""
+import threading
+import time
+from logica.metricas import METRICAS
+
+class PrecargaModelos(threading.Thread):
+    """
+    Hilo que deja cargado en `registro` el modelo `nombre` (por defecto el de
+    inferencia que usan los paneles) y lo guarda en `reconocimiento`.
+    `listo` se activa al terminar, con éxito o con `error`.
+    """
+    def __init__(self, registro, nombre='inferencia', metricas=METRICAS):
+        super().__init__(name="precarga-modelos", daemon=True)
+        self.registro = registro
+        self.nombre = nombre
+        self.metricas = metricas
+        self.reconocimiento = None
+        self.error = None
+        self.duracion_s = None
+        self.listo = threading.Event()
+
+    @property
+    def cargando(self):
+        return not self.listo.is_set()
+
+    def run(self):
+        inicio = time.perf_counter()
+        try:
+            self.reconocimiento = self.registro.cargar(self.nombre)
+        except Exception as e:
+            print(f"Error al precargar los modelos: {e}")
+            self.error = e
+        self.duracion_s = time.perf_counter() - inicio
+        if self.reconocimiento is not None:
+            self.metricas.registrar('precarga_modelos', self.duracion_s)
+        self.listo.set()
@@ -1,28 +1,48 @@
 import face_recognition
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from conexion.database import obtener_todos_los_empleados, obtener_foto_por_codigo
-import io
-from PIL import Image
-import os
+from logica.galeria import GaleriaRostros, TOLERANCIA, TIPO_INDICE
+from logica.seguimiento import SeguidorRostros
+from logica.anotaciones import dibujar_anotaciones, combinar_detecciones
+from logica.detectores import crear_detector, BACKEND_DETECTOR, UMBRAL_CONFIANZA
+from logica.metricas import METRICAS
 
-class ReconocimientoFacialEPP:
-    def __init__(self):
-        self.known_face_encodings = []
-        self.known_face_names = []
-        self.load_known_faces()
+# Tamaño del frame vacío usado para la inferencia de calentamiento.
+FORMA_CALENTAMIENTO = (480, 640, 3)
 
-        # Cargar el modelo YOLO 'best.pt'
-        try:
-            # Obtener la ruta base del script actual
-            ruta_base = os.path.dirname(os.path.abspath(__file__))
-            # Subir un nivel para encontrar best.pt en la raíz del proyecto
-            ruta_modelo = os.path.join(ruta_base, '..', 'best.pt')
-            self.yolo_model = YOLO(ruta_modelo)
-        except Exception as e:
-            print(f"Error al cargar 'best.pt': {e}. Asegúrate de que el archivo está en la carpeta raíz.")
-            self.yolo_model = None
+class ReconocimientoFacialEPP:
+    def __init__(self, galeria=None, tipo_indice=TIPO_INDICE, backend_detector=BACKEND_DETECTOR, metricas=METRICAS,
+                 detector_epp=None, **parametros_indice):
+        # La galería puede compartirse con el controlador para recibir altas y bajas
+        # de empleados sin recargar todas las caras.
+        if galeria is None:
+            galeria = GaleriaRostros(tipo_indice, **parametros_indice)
+        self.galeria = galeria
+        self.seguidores = {} # Un seguidor de pistas por canal (cámara)
+        self.metricas = metricas
+        if not self.galeria.cargada:
+            self.load_known_faces()
+
+        # Cargar el detector de EPP ('best.pt' o su versión exportada a ONNX), salvo
+        # que venga ya cargado (p. ej. compartido desde el registro de modelos).
+        # Reemplazar `detector_epp` por otro es atómico: cada lote usa uno solo.
+        # Con backend_detector=None se omite la detección de EPP.
+        self.detector_epp = detector_epp
+        if self.detector_epp is None and backend_detector is not None:
+            try:
+                self.detector_epp = crear_detector(backend_detector)
+            except Exception as e:
+                print(f"Error al cargar el detector de EPP ({backend_detector}): {e}. Asegúrate de que el modelo está en la carpeta raíz.")
+
+    def precalentar(self):
+        """
+        Ejecuta una inferencia sobre un frame vacío para que la primera llamada
+        real no pague la inicialización perezosa de los modelos.
+        """
+        frame = np.zeros(FORMA_CALENTAMIENTO, dtype=np.uint8)
+        self.detectar_epp(frame)
+        self.reconocer_rostros(frame)
+        self.reiniciar_seguimiento()
 
     def _preprocesar_frame(self, frame):
         """
@@ -35,91 +55,135 @@ class ReconocimientoFacialEPP:
         return cv2.cvtColor(frame_mejorado, cv2.COLOR_GRAY2BGR)
 
     def load_known_faces(self):
-        empleados_data = obtener_todos_los_empleados()
-        self.known_face_encodings = []
-        self.known_face_names = []
-        for empleado in empleados_data:
-            codigo, nombre, apellidos = empleado[0], empleado[1], empleado[2]
-            foto_blob = obtener_foto_por_codigo(codigo)
-            if foto_blob:
-                try:
-                    img_data = io.BytesIO(foto_blob)
-                    img_pil = Image.open(img_data)
-                    img_np = np.array(img_pil.convert("RGB")) # Asegurar RGB para face_recognition
-                    face_encodings = face_recognition.face_encodings(img_np)
-                    if face_encodings:
-                        self.known_face_encodings.append(face_encodings[0])
-                        self.known_face_names.append(f"{nombre} {apellidos} ({codigo})")
-                except Exception:
-                    pass
-
-    def reconocer_y_detectar(self, frame):
         """
-        Realiza el reconocimiento facial y la detección de EPP usando 'best.pt'
-        con el preprocesamiento correcto.
+        Carga las caras conocidas en la galería usando la caché de embeddings.
         """
-        detecciones_epp = {'casco': False, 'chaleco': False, 'persona_detectada': False, 'nombre_reconocido': "Desconocido", 'codigo_reconocido': None}
-
-        # --- Detección de EPP con best.pt ---
-        if self.yolo_model:
-            # Aplicar el preprocesamiento antes de la inferencia YOLO
-            frame_preprocesado = self._preprocesar_frame(frame)
-            results = self.yolo_model(frame_preprocesado, verbose=False, conf=0.5)[0] # Usar umbral de confianza de 0.5
+        self.galeria.cargar()
 
-            for r in results.boxes:
-                x1, y1, x2, y2 = map(int, r.xyxy[0])
-                cls_id = int(r.cls[0])
-                label = self.yolo_model.names[cls_id]
+    def detectar_epp(self, frame):
+        """
+        Detecta casco, chaleco y personas con 'best.pt' sobre el frame preprocesado.
+        Retorna (estado, cajas): las banderas de EPP y una lista de
+        (x1, y1, x2, y2, etiqueta) en coordenadas del frame.
+        """
+        return self.detectar_epp_lote([frame])[0]
 
-                color = (255, 255, 255) # Blanco por defecto
+    def detectar_epp_lote(self, frames, canales=None):
+        """
+        Igual que `detectar_epp`, pero para varios frames (p. ej. uno por cámara)
+        en una única llamada al modelo YOLO. Retorna una lista de (estado, cajas).
+        """
+        detector = self.detector_epp
+        if not detector:
+            return [({'casco': False, 'chaleco': False, 'persona_detectada': False}, []) for _ in frames]
+
+        # Aplicar el preprocesamiento antes de la inferencia YOLO
+        with self.metricas.medir('preprocesamiento'):
+            frames_preprocesados = [self._preprocesar_frame(frame) for frame in frames]
+        with self.metricas.medir('yolo'):
+            resultados = detector.detectar(frames_preprocesados, conf=UMBRAL_CONFIANZA)
+
+        salida = []
+        for detecciones in resultados:
+            estado = {'casco': False, 'chaleco': False, 'persona_detectada': False}
+            cajas = []
+            for x1, y1, x2, y2, cls_id, _ in detecciones:
+                label = detector.names[cls_id]
                 if label == 'casco':
-                    detecciones_epp['casco'] = True
-                    color = (0, 255, 0) # Verde
+                    estado['casco'] = True
                 elif label == 'chaleco':
-                    detecciones_epp['chaleco'] = True
-                    color = (255, 255, 0) # Amarillo/Cian
+                    estado['chaleco'] = True
                 elif label == 'humano':
-                    detecciones_epp['persona_detectada'] = True
-                    color = (0, 0, 255) # Rojo
-
-                # Dibujar los resultados sobre el frame ORIGINAL
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+                    estado['persona_detectada'] = True
+                cajas.append((x1, y1, x2, y2, label))
 
             # Si se detecta casco, asumir que el chaleco también está presente (placeholder)
-            if detecciones_epp['casco']:
-                detecciones_epp['chaleco'] = True
-
-        # --- Reconocimiento Facial ---
-        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_small_frame)
-        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
-
-        for face_encoding, face_location in zip(face_encodings, face_locations):
-            matches = face_recognition.compare_faces(self.known_face_encodings, face_encoding)
-            name = "Desconocido"
-
-            face_distances = face_recognition.face_distance(self.known_face_encodings, face_encoding)
-            if len(face_distances) > 0:
-                best_match_index = np.argmin(face_distances)
-                if matches[best_match_index]:
-                    name = self.known_face_names[best_match_index]
-
-            if name != "Desconocido":
-                detecciones_epp['nombre_reconocido'] = name.split(' (')[0]
-                detecciones_epp['codigo_reconocido'] = name.split(' (')[1][:-1]
+            if estado['casco']:
+                estado['chaleco'] = True
+            salida.append((estado, cajas))
+        return salida
+
+    @property
+    def seguidor(self):
+        """Seguidor de rostros de la cámara principal (canal 0)."""
+        return self._seguidor(0)
+
+    def _seguidor(self, canal):
+        if canal not in self.seguidores:
+            self.seguidores[canal] = SeguidorRostros()
+        return self.seguidores[canal]
+
+    def reconocer_rostros(self, frame, canal=0):
+        """
+        Localiza e identifica los rostros del frame.
+        Retorna una lista de (caja, codigo, nombre) con la caja en formato
+        (top, right, bottom, left) del frame original; codigo es None si es desconocido.
+        """
+        return self.reconocer_rostros_lote([frame], [canal])[0]
 
-            top, right, bottom, left = [v * 4 for v in face_location]
-            cv2.rectangle(frame, (left, top), (right, bottom), (255, 0, 0), 2)
-            cv2.putText(frame, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2, cv2.LINE_AA)
+    def reconocer_rostros_lote(self, frames, canales=None):
+        """
+        Igual que `reconocer_rostros` para varios frames. Cada canal (cámara)
+        tiene su propio seguidor de pistas, y los rostros pendientes de todos
+        los frames se comparan con la galería en una sola búsqueda.
+        """
+        canales = list(canales) if canales is not None else list(range(len(frames)))
+        version_galeria = self.galeria.version
+        por_frame, encodings, destinos = [], [], []
+
+        for frame, canal in zip(frames, canales):
+            small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
+            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+            with self.metricas.medir('face_locations'):
+                face_locations = face_recognition.face_locations(rgb_small_frame)
+
+            # Solo se codifican las caras nuevas o pendientes de verificación;
+            # las pistas ya identificadas conservan su identidad.
+            seguidor = self._seguidor(canal)
+            pistas, pendientes = seguidor.actualizar(face_locations, version_galeria)
+            if pendientes:
+                with self.metricas.medir('face_encodings'):
+                    encodings.extend(face_recognition.face_encodings(rgb_small_frame, [face_locations[i] for i in pendientes]))
+                destinos.extend((seguidor, pistas[i]) for i in pendientes)
+            self.metricas.contar('rostros_codificados', len(pendientes))
+            self.metricas.contar('rostros_seguidos', len(face_locations) - len(pendientes))
+            por_frame.append((face_locations, pistas))
+
+        if encodings:
+            with self.metricas.medir('comparacion'):
+                coincidencias = self.galeria.buscar(encodings, k=1)
+            for (seguidor, pista), mejores in zip(destinos, coincidencias):
+                coincidencia = mejores[0] if mejores and mejores[0][2] <= TOLERANCIA else None
+                seguidor.registrar_identidad(pista, coincidencia, version_galeria)
+
+        return [
+            [
+                (tuple(v * 4 for v in face_location), pista.codigo, pista.nombre)
+                for pista, face_location in zip(pistas, face_locations)
+            ]
+            for face_locations, pistas in por_frame
+        ]
+
+    def reiniciar_seguimiento(self, canal=None):
+        """Descarta las pistas de rostros de un canal, o de todos si es None."""
+        for c, seguidor in self.seguidores.items():
+            if canal is None or c == canal:
+                seguidor.reiniciar()
 
-        return frame, detecciones_epp
+    def reconocer_y_detectar(self, frame):
+        """
+        Realiza el reconocimiento facial y la detección de EPP usando 'best.pt'
+        con el preprocesamiento correcto, y dibuja los resultados sobre el frame.
+        """
+        estado_epp, cajas_epp = self.detectar_epp(frame)
+        rostros = self.reconocer_rostros(frame)
+        with self.metricas.medir('dibujo'):
+            dibujar_anotaciones(frame, cajas_epp, rostros)
+        return frame, combinar_detecciones(estado_epp, rostros)
 
     def recargar_caras_conocidas(self):
         """
-        Vuelve a cargar las caras conocidas, útil si se añade un nuevo empleado.
+        Vuelve a cargar toda la galería desde la base de datos. Para altas y bajas
+        individuales usar directamente las operaciones de `self.galeria`.
         """
-        self.known_face_encodings = []
-        self.known_face_names = []
         self.load_known_faces()
@@ -0,0 +1,156 @@
+import itertools
+
+def iou(caja_a, caja_b):
+    """Intersección sobre unión de dos cajas en formato (top, right, bottom, left)."""
+    top = max(caja_a[0], caja_b[0])
+    right = min(caja_a[1], caja_b[1])
+    bottom = min(caja_a[2], caja_b[2])
+    left = max(caja_a[3], caja_b[3])
+    interseccion = max(0, right - left) * max(0, bottom - top)
+    if interseccion == 0:
+        return 0.0
+    area_a = (caja_a[1] - caja_a[3]) * (caja_a[2] - caja_a[0])
+    area_b = (caja_b[1] - caja_b[3]) * (caja_b[2] - caja_b[0])
+    return interseccion / float(area_a + area_b - interseccion)
+
+def distancia_centros(caja_a, caja_b):
+    """Distancia entre los centros de dos cajas, relativa al tamaño de la primera."""
+    cy_a, cx_a = (caja_a[0] + caja_a[2]) / 2, (caja_a[1] + caja_a[3]) / 2
+    cy_b, cx_b = (caja_b[0] + caja_b[2]) / 2, (caja_b[1] + caja_b[3]) / 2
+    lado = max(caja_a[1] - caja_a[3], caja_a[2] - caja_a[0], 1)
+    return ((cy_a - cy_b) ** 2 + (cx_a - cx_b) ** 2) ** 0.5 / lado
+
+class Pista:
+    """Un rostro seguido a lo largo de varios frames."""
+    def __init__(self, id_pista, caja):
+        self.id = id_pista
+        self.caja = caja
+        self.codigo = None
+        self.nombre = None
+        self.distancia = None
+        self.confirmaciones = 0 # Coincidencias consecutivas con la misma identidad
+        self.frames_desde_verificacion = 0
+        self.frames_perdida = 0
+        # La pista reapareció tras perderse: quien está en la caja puede ser otra
+        # persona, así que se vuelve a codificar antes de confiar en su identidad.
+        self.reencodificar = False
+        self.verificada = False
+        self.version_galeria = None
+
+    @property
+    def confirmada(self):
+        return self.codigo is not None and self.confirmaciones >= SeguidorRostros.CONFIRMACIONES_NECESARIAS
+
+class SeguidorRostros:
+    """
+    Seguidor multi-objeto de rostros por asociación IoU/centroide.
+
+    Una vez que una pista se identifica con confianza (varias coincidencias
+    seguidas con la misma persona) conserva su identidad y no se vuelve a
+    codificar con dlib hasta la siguiente re-verificación periódica. Solo se
+    codifican las pistas nuevas, las no confirmadas, las que reaparecen tras
+    perderse, las desconocidas (cada `intervalo_desconocido` frames) y las de
+    una galería que cambió.
+    """
+    CONFIRMACIONES_NECESARIAS = 2
+
+    def __init__(self, umbral_iou=0.3, umbral_centro=0.5, max_frames_perdida=5,
+                 intervalo_verificacion=30, intervalo_desconocido=5):
+        self.umbral_iou = umbral_iou
+        self.umbral_centro = umbral_centro
+        self.max_frames_perdida = max_frames_perdida
+        self.intervalo_verificacion = intervalo_verificacion
+        self.intervalo_desconocido = intervalo_desconocido
+        self.pistas = []
+        self._ids = itertools.count(1)
+        # Contadores para medir cuánto trabajo de codificación se ahorra.
+        self.rostros_vistos = 0
+        self.rostros_codificados = 0
+
+    def reiniciar(self):
+        self.pistas = []
+
+    def _asociar(self, cajas):
+        """Empareja cajas con pistas: primero por IoU y luego por cercanía de centros."""
+        asignacion = [None] * len(cajas)
+        libres = set(range(len(self.pistas)))
+        pares = sorted(
+            ((iou(p.caja, c), ip, ic) for ip, p in enumerate(self.pistas) for ic, c in enumerate(cajas)),
+            reverse=True
+        )
+        for valor, ip, ic in pares:
+            if valor < self.umbral_iou:
+                break
+            if ip in libres and asignacion[ic] is None:
+                asignacion[ic] = ip
+                libres.discard(ip)
+
+        for ic, caja in enumerate(cajas):
+            if asignacion[ic] is not None or not libres:
+                continue
+            ip = min(libres, key=lambda i: distancia_centros(self.pistas[i].caja, caja))
+            if distancia_centros(self.pistas[ip].caja, caja) <= self.umbral_centro:
+                asignacion[ic] = ip
+                libres.discard(ip)
+        return asignacion, libres
+
+    def actualizar(self, cajas, version_galeria=None):
+        """
+        Asocia las cajas de rostro del frame actual con las pistas existentes.
+        Retorna (pistas, pendientes): la pista de cada caja y los índices de las
+        cajas que deben codificarse y compararse con la galería en este frame.
+        """
+        asignacion, sin_ver = self._asociar(cajas)
+
+        pistas, pendientes = [], []
+        for ic, (caja, ip) in enumerate(zip(cajas, asignacion)):
+            if ip is None:
+                pista = Pista(next(self._ids), caja)
+            else:
+                pista = self.pistas[ip]
+                pista.caja = caja
+                if pista.frames_perdida > 0:
+                    pista.reencodificar = True
+                pista.frames_perdida = 0
+                pista.frames_desde_verificacion += 1
+            pistas.append(pista)
+            if self._necesita_codificacion(pista, version_galeria):
+                pendientes.append(ic)
+
+        for ip in sin_ver:
+            pista = self.pistas[ip]
+            pista.frames_perdida += 1
+            if pista.frames_perdida <= self.max_frames_perdida:
+                pistas.append(pista) # Se conserva por si reaparece en los próximos frames
+
+        self.pistas = pistas
+        self.rostros_vistos += len(cajas)
+        self.rostros_codificados += len(pendientes)
+        return pistas[:len(cajas)], pendientes
+
+    def _necesita_codificacion(self, pista, version_galeria):
+        if not pista.verificada or pista.reencodificar or pista.version_galeria != version_galeria:
+            return True
+        if pista.codigo is None:
+            return pista.frames_desde_verificacion >= self.intervalo_desconocido
+        if not pista.confirmada:
+            return True
+        return pista.frames_desde_verificacion >= self.intervalo_verificacion
+
+    def registrar_identidad(self, pista, coincidencia, version_galeria=None):
+        """
+        Guarda el resultado de comparar la pista con la galería.
+        `coincidencia` es (codigo, nombre, distancia) o None si es desconocido.
+        """
+        codigo = coincidencia[0] if coincidencia else None
+        if codigo is not None and codigo == pista.codigo:
+            pista.confirmaciones += 1
+        else:
+            pista.confirmaciones = 1 if codigo is not None else 0
+        pista.codigo = codigo
+        pista.nombre = coincidencia[1] if coincidencia else None
+        pista.distancia = coincidencia[2] if coincidencia else None
+        pista.frames_desde_verificacion = 0
+        pista.reencodificar = False
+        pista.verificada = True
+        pista.version_galeria = version_galeria
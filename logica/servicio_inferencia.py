@@ -0,0 +1,519 @@
+import multiprocessing as mp
+from multiprocessing import connection, shared_memory
+import itertools
+import os
+import threading
+import time
+import numpy as np
+from logica.metricas import METRICAS
+
+# Número de procesos de inferencia por defecto: uno por núcleo, dejando uno
+# para la interfaz. Cada uno carga su propia copia de los modelos; si la
+# memoria no alcanza, se indica un número menor (RegistroModelos, --trabajadores).
+NUM_TRABAJADORES = max(1, (os.cpu_count() or 1) - 1)
+# Tamaño máximo de frame que cabe en cada ranura de memoria compartida.
+FORMA_MAXIMA_FRAME = (1080, 1920, 3)
+# Ranuras del buffer circular por trabajador (frames en vuelo a la vez), con un
+# mínimo para que varias cámaras y etapas puedan enviar frames al mismo tiempo.
+RANURAS_POR_TRABAJADOR = 2
+RANURAS_MINIMAS = 8
+# Tiempo máximo de espera por el resultado de una tarea. Si se agota, o si el
+# proceso termina antes de responder, el frame se descarta y el proceso se relanza.
+TIEMPO_MAXIMO_TAREA_S = 10.0
+# Cada cuánto se comprueba, mientras se espera un resultado, que el proceso siga vivo.
+INTERVALO_VIGILANCIA_S = 0.5
+# Tiempo máximo para que cada proceso cargue y confirme un detector de EPP nuevo.
+TIEMPO_MAXIMO_RECARGA_S = 120.0
+# Consultas a la galería de los procesos que se pueden pedir con consultar_galeria.
+CONSULTAS_GALERIA = ('buscar_parecidos', 'distancia_a_fotos')
+
+def _recargar_detector(reconocimiento, backend, ruta_modelo, anteriores, enviar, id_tarea):
+    """
+    Carga y precalienta otro detector de EPP en un hilo y lo activa de forma
+    atómica, guardando el anterior en `anteriores` por si hay que restaurarlo.
+    Si la tarea tiene id, confirma el resultado (con el error, si lo hubo).
+    """
+    from logica.detectores import crear_detector, precalentar_detector
+    error = None
+    try:
+        nuevo = precalentar_detector(crear_detector(backend, ruta_modelo))
+        anteriores[:] = [reconocimiento.detector_epp]
+        reconocimiento.detector_epp = nuevo
+    except Exception as e:
+        print(f"Error al recargar el detector de EPP '{ruta_modelo}' (pid {os.getpid()}): {e}")
+        error = str(e)
+    if id_tarea is not None:
+        enviar((id_tarea, [], error is None, error, ([], {})))
+
+def _bucle_trabajador(nombre_memoria, forma_ranura, cola_tareas, conexion_resultados, version_galeria):
+    """
+    Proceso de inferencia: carga sus propios modelos y procesa las tareas que
+    le llegan leyendo el frame directamente de la memoria compartida. Los
+    resultados vuelven por su propia tubería (`conexion_resultados`).
+    """
+    # Importar aquí para que los modelos solo se carguen en el proceso hijo.
+    from logica.reconocimiento import ReconocimientoFacialEPP
+    from logica.metricas import Metricas
+
+    # El hilo que recarga el detector también responde por la tubería.
+    lock_envio = threading.Lock()
+    def enviar(mensaje):
+        with lock_envio:
+            conexion_resultados.send(mensaje)
+
+    memoria = shared_memory.SharedMemory(name=nombre_memoria)
+    ranuras = np.ndarray(forma_ranura, dtype=np.uint8, buffer=memoria.buf)
+    # Los tiempos de cada modelo viajan con el resultado al proceso principal.
+    metricas = Metricas(acumular=True)
+    reconocimiento = ReconocimientoFacialEPP(metricas=metricas)
+    reconocimiento.precalentar()
+    metricas.tomar_mediciones() # Los tiempos del calentamiento no se reportan
+    version_local = version_galeria.value
+    anteriores = [] # Detector activo antes del último 'recargar_detector'
+    enviar(('listo', os.getpid()))
+
+    try:
+        while True:
+            tarea = cola_tareas.get()
+            if tarea is None:
+                break
+            # Una tarea lleva un lote: las ranuras, formas y canales de sus frames.
+            id_tarea, ranuras_tarea, formas, etapa, canal = tarea
+            if etapa == 'reiniciar':
+                reconocimiento.reiniciar_seguimiento(canal)
+                continue
+            if etapa == 'recargar_detector':
+                # En esta tarea de control, el último campo lleva (backend, ruta_modelo).
+                # El modelo actual sigue atendiendo tareas mientras carga el nuevo.
+                threading.Thread(
+                    target=_recargar_detector, args=(reconocimiento,) + canal + (anteriores, enviar, id_tarea), daemon=True
+                ).start()
+                continue
+            if etapa == 'restaurar_detector':
+                # Vuelve al objeto del detector anterior, sin releer su archivo
+                # (que pudo sobrescribirse con el modelo que falló).
+                if anteriores:
+                    reconocimiento.detector_epp = anteriores.pop()
+                    enviar((id_tarea, [], True, None, ([], {})))
+                else:
+                    enviar((id_tarea, [], None, "no hay un detector anterior", ([], {})))
+                continue
+            if version_galeria.value != version_local:
+                # Otro proceso cambió la galería: releerla de la BD (usa la caché de embeddings).
+                version_local = version_galeria.value
+                reconocimiento.recargar_caras_conocidas()
+            if etapa == 'consultar_galeria':
+                # El último campo lleva (método, args, kwargs) de una de CONSULTAS_GALERIA.
+                metodo, args, kwargs = canal
+                try:
+                    resultado = getattr(reconocimiento.galeria, metodo)(*args, **kwargs)
+                    enviar((id_tarea, [], resultado, None, metricas.tomar_mediciones()))
+                except Exception as e:
+                    enviar((id_tarea, [], None, str(e), metricas.tomar_mediciones()))
+                continue
+
+            frames = [ranuras[ranura, :alto, :ancho, :profundidad] for ranura, (alto, ancho, profundidad) in zip(ranuras_tarea, formas)]
+            inicio_cpu = time.process_time()
+            try:
+                # Todo el lote en una sola llamada a YOLO y una sola búsqueda en la galería.
+                if etapa == 'epp':
+                    resultado = reconocimiento.detectar_epp_lote(frames)
+                elif etapa == 'rostros':
+                    resultado = reconocimiento.reconocer_rostros_lote(frames, canal)
+                else:
+                    resultado = list(zip(reconocimiento.detectar_epp_lote(frames), reconocimiento.reconocer_rostros_lote(frames, canal)))
+                # El proceso principal suma esta CPU a la suya en el resumen de métricas.
+                metricas.contar('cpu_trabajadores_ms', round((time.process_time() - inicio_cpu) * 1000))
+                enviar((id_tarea, ranuras_tarea, resultado, None, metricas.tomar_mediciones()))
+            except Exception as e:
+                enviar((id_tarea, ranuras_tarea, None, str(e), metricas.tomar_mediciones()))
+    finally:
+        del ranuras
+        memoria.close()
+        conexion_resultados.close()
+
+class ServicioInferencia:
+    """
+    Ejecuta la detección de EPP y el reconocimiento facial en procesos
+    separados para no competir por el GIL con la interfaz.
+
+    Los frames se copian a un buffer circular en `multiprocessing.shared_memory`
+    (no se serializan con pickle); por la cola solo viaja el número de ranura.
+    Cada proceso devuelve sus resultados por su propia tubería, de modo que si
+    uno muere a mitad de un envío no bloquea los resultados de los demás.
+
+    Cada tarea lleva un lote de frames (uno por cámara), que el proceso
+    resuelve con una sola llamada a YOLO o a la galería. El lote de EPP, que
+    no tiene estado, va entero al proceso con menos trabajo pendiente; los de
+    rostros se dividen por proceso, porque los frames de un mismo `canal`
+    (cámara) siempre van al mismo para que su seguidor de pistas los vea en orden.
+
+    Si un proceso termina o no responde en `TIEMPO_MAXIMO_TAREA_S`, sus tareas
+    pendientes se descartan (liberando sus ranuras) y se lanza otro en su lugar;
+    mientras carga sus modelos no se le envían frames.
+    """
+    def __init__(self, num_trabajadores=NUM_TRABAJADORES, forma_maxima=FORMA_MAXIMA_FRAME,
+                 ranuras_por_trabajador=RANURAS_POR_TRABAJADOR):
+        self.num_trabajadores = max(1, num_trabajadores)
+        self.forma_maxima = tuple(forma_maxima)
+        self.n_ranuras = max(self.num_trabajadores * ranuras_por_trabajador, RANURAS_MINIMAS)
+        self.activo = False
+        self._memoria = None
+        self._ranuras = None
+        self._procesos = []
+        self._colas_tareas = []
+        self._conexiones = [] # trabajador -> extremo de lectura de su tubería de resultados
+        self._conexiones_viejas = [] # De procesos relanzados; las cierra el hilo receptor
+        self._version_galeria = None
+        self._lock = threading.Lock()
+        self._ranuras_libres = []
+        self._pendientes = {} # id_tarea -> (trabajador, ranuras, evento, [resultados, error])
+        self._carga = []
+        self._ids = itertools.count()
+        self._hilo_resultados = None
+        self._contexto = None
+        self._forma_ranuras = None
+        self._listos = [] # trabajador -> True si su proceso ya cargó los modelos
+        self._detector = None # (backend, ruta_modelo) pedido con recargar_detector, para los relanzados
+        self.listo = threading.Event() # Todos los procesos cargaron y precalentaron sus modelos
+
+    def iniciar(self):
+        """Crea la memoria compartida y lanza los procesos (los modelos cargan en segundo plano)."""
+        if self.activo:
+            return
+        self._contexto = mp.get_context('spawn') # Igual en Windows y Linux; no hereda el estado de Tk
+        self._forma_ranuras = (self.n_ranuras,) + self.forma_maxima
+        self._memoria = shared_memory.SharedMemory(create=True, size=int(np.prod(self._forma_ranuras)))
+        self._ranuras = np.ndarray(self._forma_ranuras, dtype=np.uint8, buffer=self._memoria.buf)
+        self._ranuras_libres = list(range(self.n_ranuras))
+        self._version_galeria = self._contexto.Value('i', 0)
+        self._carga = [0] * self.num_trabajadores
+        self._listos = [False] * self.num_trabajadores
+        self.listo.clear()
+        trabajadores = [self._crear_trabajador() for _ in range(self.num_trabajadores)]
+        self._procesos = [proceso for proceso, _, _, _ in trabajadores]
+        self._colas_tareas = [cola for _, cola, _, _ in trabajadores]
+        self._conexiones = [lector for _, _, lector, _ in trabajadores]
+        for proceso, _, _, escritor in trabajadores:
+            proceso.start()
+            escritor.close() # Solo el hijo escribe; así su muerte se ve como fin de la tubería
+        self.activo = True
+        self._hilo_resultados = threading.Thread(target=self._recibir_resultados, daemon=True)
+        self._hilo_resultados.start()
+
+    def detener(self):
+        if not self.activo:
+            return
+        self.activo = False
+        for cola in self._colas_tareas:
+            cola.put(None)
+        for proceso in self._procesos:
+            proceso.join(timeout=2)
+            if proceso.is_alive():
+                proceso.terminate()
+        self._hilo_resultados.join(timeout=2 * INTERVALO_VIGILANCIA_S)
+        with self._lock:
+            for _, _, evento, _ in self._pendientes.values():
+                evento.set()
+            self._pendientes.clear()
+        for lector in self._conexiones + self._conexiones_viejas:
+            lector.close()
+        self._conexiones_viejas = []
+        self._ranuras = None
+        self._memoria.close()
+        self._memoria.unlink()
+        self._memoria = None
+
+    @property
+    def trabajadores_listos(self):
+        return sum(self._listos)
+
+    def _crear_trabajador(self):
+        """Retorna (proceso, cola_tareas, lector, escritor) de un proceso nuevo, sin lanzarlo."""
+        cola = self._contexto.Queue()
+        lector, escritor = self._contexto.Pipe(duplex=False)
+        proceso = self._contexto.Process(
+            target=_bucle_trabajador,
+            args=(self._memoria.name, self._forma_ranuras, cola, escritor, self._version_galeria),
+            daemon=True
+        )
+        return proceso, cola, lector, escritor
+
+    def _relanzar_trabajador(self, trabajador, proceso):
+        """
+        Termina `proceso` (si sigue vivo), descarta las tareas que tenía
+        pendientes liberando sus ranuras y lanza otro proceso en su lugar, con
+        una cola de tareas y una tubería nuevas. No hace nada si ya se relanzó.
+        """
+        with self._lock:
+            if not self.activo or self._procesos[trabajador] is not proceso:
+                return
+            abandonadas = [id_tarea for id_tarea, pendiente in self._pendientes.items() if pendiente[0] == trabajador]
+            for id_tarea in abandonadas:
+                _, ranuras, evento, caja = self._pendientes.pop(id_tarea)
+                self._ranuras_libres.extend(ranuras)
+                caja[1] = "el proceso de inferencia no respondió"
+                evento.set()
+            self._carga[trabajador] = 0
+            self._listos[trabajador] = False
+            self.listo.clear()
+            nuevo, cola, lector, escritor = self._crear_trabajador()
+            if self._detector is not None:
+                cola.put((None, None, None, 'recargar_detector', self._detector))
+            cola_anterior = self._colas_tareas[trabajador]
+            self._conexiones_viejas.append(self._conexiones[trabajador])
+            self._procesos[trabajador], self._colas_tareas[trabajador], self._conexiones[trabajador] = nuevo, cola, lector
+        print(f"Relanzando el proceso de inferencia {trabajador} (pid {proceso.pid}); {len(abandonadas)} tarea(s) descartada(s).")
+        METRICAS.contar('trabajadores_relanzados')
+        if proceso.is_alive():
+            proceso.terminate()
+            proceso.join(timeout=1)
+            if proceso.is_alive():
+                proceso.kill() # Detenido o sin atender señales
+                proceso.join(timeout=1)
+        cola_anterior.cancel_join_thread() # Sus tareas ya se descartaron
+        nuevo.start()
+        escritor.close()
+
+    def esperar_listo(self, timeout=None):
+        """
+        Espera a que todos los procesos tengan sus modelos cargados y precalentados.
+        Retorna False si se agota `timeout`; lanza RuntimeError si algún proceso
+        terminó antes de estar listo (p. ej. por un error al cargar el modelo).
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while not self.listo.wait(0.2):
+            if not self.activo:
+                return False
+            terminados = [proceso for proceso in self._procesos if proceso.exitcode is not None]
+            if terminados:
+                raise RuntimeError(f"{len(terminados)} proceso(s) de inferencia terminaron al cargar los modelos")
+            if limite is not None and time.monotonic() >= limite:
+                return False
+        return True
+
+    def notificar_cambio_galeria(self):
+        """Indica a los procesos que vuelvan a leer la galería antes de su próxima tarea."""
+        if self._version_galeria is not None:
+            with self._version_galeria.get_lock():
+                self._version_galeria.value += 1
+
+    def enviar(self, frames, etapa='completo', canales=None, trabajador=None):
+        """
+        Copia los frames a ranuras libres y encola una sola tarea con todo el
+        lote, sin esperar el resultado. Si no se indica `trabajador`, el lote de
+        EPP va al proceso con menos trabajo y el resto al del primer canal.
+        Retorna (id_tarea, evento, caja_resultado) o None si no hay ranuras
+        libres para todo el lote o el proceso que le toca se está relanzando
+        (el llamador debe descartar los frames en lugar de acumular retraso).
+        """
+        canales = list(canales) if canales is not None else list(range(len(frames)))
+        formas = [frame.shape for frame in frames]
+        for forma in formas:
+            if forma[0] > self.forma_maxima[0] or forma[1] > self.forma_maxima[1]:
+                raise ValueError(f"El frame {forma} supera el tamaño máximo {self.forma_maxima}")
+        with self._lock:
+            if not self.activo or len(self._ranuras_libres) < len(frames):
+                return None
+            if trabajador is None and etapa == 'epp':
+                listos = [i for i in range(self.num_trabajadores) if self._listos[i]]
+                if not listos:
+                    return None
+                trabajador = min(listos, key=self._carga.__getitem__)
+            elif trabajador is None:
+                trabajador = canales[0] % self.num_trabajadores
+            if not self._listos[trabajador]:
+                return None # Su proceso se está relanzando
+            ranuras = [self._ranuras_libres.pop() for _ in frames]
+            id_tarea = next(self._ids)
+            evento, caja = threading.Event(), [None, None]
+            self._pendientes[id_tarea] = (trabajador, ranuras, evento, caja)
+            self._carga[trabajador] += len(frames)
+            cola = self._colas_tareas[trabajador]
+        for ranura, frame, (alto, ancho, profundidad) in zip(ranuras, frames, formas):
+            np.copyto(self._ranuras[ranura, :alto, :ancho, :profundidad], frame)
+        cola.put((id_tarea, ranuras, formas, etapa, canales))
+        return id_tarea, evento, caja
+
+    def procesar(self, frame, etapa='completo', canal=0, timeout=TIEMPO_MAXIMO_TAREA_S):
+        """Envía un frame y espera su resultado. Retorna None si se descartó o falló."""
+        envio = self.enviar([frame], etapa, [canal])
+        if envio is None:
+            return None
+        resultados = self._esperar(envio, etapa, time.monotonic() + timeout)
+        return resultados[0] if resultados else None
+
+    def _esperar(self, envio, etapa, limite):
+        """
+        Espera el resultado de una tarea hasta `limite` (time.monotonic()). Si el
+        proceso terminó o se agotó el tiempo, lo relanza y retorna None.
+        """
+        id_tarea, evento, caja = envio
+        while not evento.wait(INTERVALO_VIGILANCIA_S):
+            with self._lock:
+                pendiente = self._pendientes.get(id_tarea)
+                proceso = self._procesos[pendiente[0]] if pendiente else None
+            if proceso is None:
+                continue # El resultado acaba de llegar
+            if proceso.exitcode is not None or time.monotonic() >= limite:
+                METRICAS.contar('descartados_sin_respuesta')
+                self._relanzar_trabajador(pendiente[0], proceso)
+        if caja[1]:
+            print(f"Error en el proceso de inferencia ({etapa}): {caja[1]}")
+        return caja[0]
+
+    def _recibir_resultados(self):
+        """
+        Hilo que recoge los resultados de todos los procesos, libera las ranuras
+        y despierta a quien espera. Si la tubería de un proceso se cierra (el
+        proceso murió), lo relanza.
+        """
+        while self.activo:
+            with self._lock:
+                viejas, self._conexiones_viejas = self._conexiones_viejas, []
+                lectores, procesos = list(self._conexiones), list(self._procesos)
+            for lector in viejas:
+                lector.close()
+            for lector in connection.wait(lectores, timeout=INTERVALO_VIGILANCIA_S):
+                trabajador = lectores.index(lector)
+                try:
+                    mensaje = lector.recv()
+                except (EOFError, OSError):
+                    self._relanzar_trabajador(trabajador, procesos[trabajador])
+                    continue
+                self._incorporar_resultado(trabajador, lector, mensaje)
+
+    def _incorporar_resultado(self, trabajador, lector, mensaje):
+        if mensaje[0] == 'listo':
+            with self._lock:
+                if self._conexiones[trabajador] is lector:
+                    self._listos[trabajador] = True
+                if all(self._listos):
+                    self.listo.set()
+            return
+        id_tarea, _, resultado, error, mediciones = mensaje
+        METRICAS.incorporar(mediciones)
+        with self._lock:
+            # Las ranuras se liberan una sola vez: aquí o al descartar la tarea en _relanzar_trabajador.
+            pendiente = self._pendientes.pop(id_tarea, None)
+            if pendiente:
+                self._ranuras_libres.extend(pendiente[1])
+                self._carga[pendiente[0]] -= len(pendiente[1])
+        if pendiente:
+            _, _, evento, caja = pendiente
+            caja[0], caja[1] = resultado, error
+            evento.set()
+
+    # --- Misma interfaz que ReconocimientoFacialEPP para el planificador ---
+
+    def _procesar_lote(self, frames, etapa, canales):
+        """
+        Envía los frames como una tarea por proceso (el lote de EPP entero a
+        uno solo) y espera todos los resultados. Un frame descartado (sin
+        ranura libre, con error o sin respuesta del proceso) tiene None como resultado.
+        """
+        canales = list(canales) if canales is not None else list(range(len(frames)))
+        if etapa == 'epp':
+            grupos = {None: list(range(len(frames)))}
+        else:
+            grupos = {}
+            for i, canal in enumerate(canales):
+                grupos.setdefault(canal % self.num_trabajadores, []).append(i)
+        envios = [
+            (indices, self.enviar([frames[i] for i in indices], etapa, [canales[i] for i in indices], trabajador))
+            for trabajador, indices in grupos.items()
+        ]
+        limite = time.monotonic() + TIEMPO_MAXIMO_TAREA_S
+        resultados = [None] * len(frames)
+        for indices, envio in envios:
+            if envio is None:
+                # Sin ranuras libres o con el proceso relanzándose: frames descartados
+                METRICAS.contar('descartados_sin_ranura', len(indices))
+                continue
+            for i, resultado in zip(indices, self._esperar(envio, etapa, limite) or []):
+                resultados[i] = resultado
+        return resultados
+
+    def detectar_epp_lote(self, frames, canales=None):
+        return self._procesar_lote(frames, 'epp', canales)
+
+    def reconocer_rostros_lote(self, frames, canales=None):
+        return self._procesar_lote(frames, 'rostros', canales)
+
+    def detectar_epp(self, frame):
+        return self.detectar_epp_lote([frame])[0] or ({}, [])
+
+    def reconocer_rostros(self, frame, canal=0):
+        return self.reconocer_rostros_lote([frame], [canal])[0] or []
+
+    def recargar_detector(self, backend, ruta_modelo, trabajadores=None, timeout=TIEMPO_MAXIMO_RECARGA_S):
+        """
+        Pide a los procesos (todos o los índices de `trabajadores`) que carguen
+        otro detector de EPP; cada uno lo activa al terminar de cargarlo y lo
+        confirma. Espera todas las confirmaciones y retorna {trabajador: error},
+        con error None si ese proceso ya usa el detector nuevo.
+        """
+        errores = self._tarea_de_control('recargar_detector', (backend, ruta_modelo), trabajadores, timeout)
+        if not any(errores.values()) and len(errores) == self.num_trabajadores:
+            with self._lock:
+                self._detector = (backend, ruta_modelo) # Para los procesos que se relancen
+        return errores
+
+    def restaurar_detector(self, trabajadores, timeout=TIEMPO_MAXIMO_TAREA_S):
+        """
+        Pide a los procesos de `trabajadores` que vuelvan al detector que tenían
+        antes de su último `recargar_detector`, que conservan en memoria (no se
+        relee el archivo). Retorna {trabajador: error} como `recargar_detector`.
+        """
+        return self._tarea_de_control('restaurar_detector', None, trabajadores, timeout)
+
+    def _tarea_de_control(self, etapa, datos, trabajadores, timeout):
+        """Envía la tarea de control a los procesos indicados (todos si es None) y espera sus confirmaciones."""
+        trabajadores = range(self.num_trabajadores) if trabajadores is None else trabajadores
+        envios = {}
+        with self._lock:
+            if not self.activo:
+                return {trabajador: "el servicio de inferencia está detenido" for trabajador in trabajadores}
+            for trabajador in trabajadores:
+                id_tarea = next(self._ids)
+                evento, caja = threading.Event(), [None, None]
+                self._pendientes[id_tarea] = (trabajador, [], evento, caja)
+                self._colas_tareas[trabajador].put((id_tarea, [], None, etapa, datos))
+                envios[trabajador] = (id_tarea, evento, caja)
+        limite = time.monotonic() + timeout
+        errores = {}
+        for trabajador, envio in envios.items():
+            confirmado = self._esperar(envio, etapa, limite)
+            errores[trabajador] = None if confirmado else (envio[2][1] or "sin confirmación del proceso")
+        return errores
+
+    def consultar_galeria(self, metodo, *args, **kwargs):
+        """
+        Ejecuta una consulta de CONSULTAS_GALERIA (p. ej. 'buscar_parecidos') en
+        la galería de un proceso de inferencia, que ya la tiene cargada, y retorna
+        su resultado. Bloquea hasta la respuesta: no llamar desde el hilo de Tk.
+        Lanza RuntimeError si ningún proceso pudo responder.
+        """
+        if metodo not in CONSULTAS_GALERIA:
+            raise ValueError(f"Consulta de galería no permitida: '{metodo}'")
+        with self._lock:
+            listos = [i for i in range(self.num_trabajadores) if self._listos[i]] if self.activo else []
+            if not listos:
+                raise RuntimeError("Los procesos de inferencia no están listos")
+            trabajador = min(listos, key=self._carga.__getitem__)
+            id_tarea = next(self._ids)
+            evento, caja = threading.Event(), [None, None]
+            self._pendientes[id_tarea] = (trabajador, [], evento, caja)
+            self._colas_tareas[trabajador].put((id_tarea, [], None, 'consultar_galeria', (metodo, args, kwargs)))
+        resultado = self._esperar((id_tarea, evento, caja), 'consultar_galeria', time.monotonic() + TIEMPO_MAXIMO_TAREA_S)
+        if caja[1]:
+            raise RuntimeError(caja[1])
+        return resultado
+
+    def reiniciar_seguimiento(self, canal=None):
+        """Descarta las pistas de rostros de un canal (o de todos) en los procesos."""
+        if not self.activo:
+            return
+        trabajadores = range(self.num_trabajadores) if canal is None else [canal % self.num_trabajadores]
+        for trabajador in trabajadores:
+            self._colas_tareas[trabajador].put((None, None, None, 'reiniciar', canal))
@@ -0,0 +1,154 @@
+"""
+Modo kiosco sin interfaz gráfica: mantiene las cámaras y la inferencia en
+marcha y marca la asistencia automáticamente cuando un empleado es reconocido
+con el EPP requerido durante varios frames seguidos.
+"""
+import collections
+import time
+from conexion.database import registrar_asistencia
+from logica.camaras import GestorCamaras, FUENTES_CAMARA
+from logica.planificador import PlanificadorInferencia
+
+# Resultados de rostros consecutivos con la misma persona y EPP completo
+# necesarios para marcar la asistencia.
+FRAMES_CONSECUTIVOS = 3
+# Segundos durante los que no se vuelve a marcar al mismo empleado.
+ENFRIAMIENTO_S = 300
+# Cada cuántos segundos se imprimen las estadísticas de la puerta.
+INTERVALO_ESTADISTICAS_S = 60
+
+class ServicioKiosco:
+    """
+    Bucle de marcado automático de asistencia.
+
+    Por cada cámara se lleva la racha de resultados consecutivos con el mismo
+    empleado y EPP completo; al llegar a `frames_consecutivos` se registra la
+    asistencia, salvo que el empleado esté en su periodo de enfriamiento.
+    Cada paso de la racha necesita un resultado de rostros nuevo y uno de EPP
+    también nuevo o de un frame igual o posterior, para que un solo resultado
+    de EPP no cuente varias veces.
+    """
+    def __init__(self, reconocimiento, fuentes=FUENTES_CAMARA, tipo='entrada',
+                 frames_consecutivos=FRAMES_CONSECUTIVOS, enfriamiento_s=ENFRIAMIENTO_S):
+        self.tipo = tipo
+        self.frames_consecutivos = frames_consecutivos
+        self.enfriamiento_s = enfriamiento_s
+        self.planificador = PlanificadorInferencia(reconocimiento)
+        self.camaras = GestorCamaras(fuentes, self.planificador.publicar_frame)
+        self.activo = False
+        self._rachas = {} # canal -> [codigo, cuenta, inicio_racha]
+        self._secuencias = {} # canal -> secuencia del último resultado de rostros usado
+        self._secuencias_epp = {} # canal -> secuencia del último resultado de EPP usado
+        self._ultima_marca = {} # codigo -> instante (time.monotonic) de la última marca
+        # Estadísticas de la puerta
+        self.inicio = None
+        self.marcas = collections.deque() # Instantes de las marcas, para personas/minuto
+        self.total_marcas = 0
+        self.duplicados_evitados = 0
+        self.tiempos_hasta_marca = collections.deque(maxlen=500)
+
+    def en_enfriamiento(self, codigo, ahora):
+        ultima = self._ultima_marca.get(codigo)
+        return ultima is not None and ahora - ultima < self.enfriamiento_s
+
+    def epp_vigente(self, canal, secuencia, secuencia_epp):
+        """
+        True si el resultado de EPP puede acompañar al de rostros con `secuencia`:
+        es de un frame igual o posterior, o llegó después del último paso de la racha.
+        """
+        if secuencia_epp is None:
+            return False
+        return secuencia_epp >= secuencia or secuencia_epp != self._secuencias_epp.get(canal)
+
+    def procesar_canal(self, canal, ahora):
+        """Revisa el último resultado del canal y marca la asistencia si corresponde."""
+        detecciones, secuencia, secuencia_epp = self.planificador.obtener_detecciones(canal)
+        if secuencia is None or secuencia == self._secuencias.get(canal):
+            return None # Sin resultado de rostros nuevo desde la última revisión
+        codigo = detecciones['codigo_reconocido']
+        if codigo and not self.epp_vigente(canal, secuencia, secuencia_epp):
+            return None # Esperar un resultado de EPP nuevo sin descartar el de rostros
+        self._secuencias[canal] = secuencia
+        self._secuencias_epp[canal] = secuencia_epp
+
+        if not codigo or not (detecciones['casco'] and detecciones['chaleco']):
+            self._rachas.pop(canal, None)
+            return None
+        racha = self._rachas.get(canal)
+        if racha is None or racha[0] != codigo:
+            racha = self._rachas[canal] = [codigo, 0, ahora]
+        racha[1] += 1
+        if racha[1] < self.frames_consecutivos:
+            return None
+
+        self._rachas.pop(canal, None)
+        if self.en_enfriamiento(codigo, ahora):
+            self.duplicados_evitados += 1
+            return None
+        if not registrar_asistencia(codigo, self.tipo, 1, 1):
+            return None
+        self._ultima_marca[codigo] = ahora
+        self.marcas.append(ahora)
+        self.total_marcas += 1
+        self.tiempos_hasta_marca.append(ahora - racha[2])
+        print(f"[{time.strftime('%H:%M:%S')}] Asistencia ({self.tipo}) registrada: "
+              f"{detecciones['nombre_reconocido']} ({codigo}) en la cámara {canal}.")
+        return codigo
+
+    def personas_por_minuto(self, ahora, ventana_s=60):
+        """Marcas registradas en el último minuto (o ventana indicada), escaladas a 1 minuto."""
+        while self.marcas and ahora - self.marcas[0] > ventana_s:
+            self.marcas.popleft()
+        return len(self.marcas) * 60.0 / ventana_s
+
+    def estadisticas(self, ahora=None):
+        ahora = time.monotonic() if ahora is None else ahora
+        minutos = (ahora - self.inicio) / 60 if self.inicio is not None else 0
+        tiempos = sorted(self.tiempos_hasta_marca)
+        return {
+            'marcas': self.total_marcas,
+            'duplicados_evitados': self.duplicados_evitados,
+            'personas_por_minuto_ultimo_minuto': self.personas_por_minuto(ahora),
+            'personas_por_minuto_promedio': self.total_marcas / minutos if minutos > 0 else 0.0,
+            'segundos_hasta_marca_p50': tiempos[len(tiempos) // 2] if tiempos else None,
+        }
+
+    def _limpiar_enfriamientos(self, ahora):
+        vencidos = [c for c, t in self._ultima_marca.items() if ahora - t >= self.enfriamiento_s]
+        for codigo in vencidos:
+            del self._ultima_marca[codigo]
+
+    def ejecutar(self, intervalo_s=0.02):
+        """Bucle principal; termina con Ctrl+C o al llamar a `detener()`."""
+        self.activo = True
+        self.inicio = ultima_estadistica = time.monotonic()
+        self.planificador.iniciar()
+        self.camaras.abrir()
+        print(f"Modo kiosco iniciado ({len(self.camaras)} cámara(s), tipo '{self.tipo}'). Ctrl+C para salir.")
+        try:
+            while self.activo:
+                ahora = time.monotonic()
+                for canal in range(len(self.camaras)):
+                    self.procesar_canal(canal, ahora)
+                if ahora - ultima_estadistica >= INTERVALO_ESTADISTICAS_S:
+                    ultima_estadistica = ahora
+                    self._limpiar_enfriamientos(ahora)
+                    self.imprimir_estadisticas()
+                time.sleep(intervalo_s)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.detener()
+            self.imprimir_estadisticas()
+
+    def detener(self):
+        self.activo = False
+        self.camaras.cerrar()
+        self.planificador.detener()
+
+    def imprimir_estadisticas(self):
+        est = self.estadisticas()
+        p50 = f"{est['segundos_hasta_marca_p50']:.1f} s" if est['segundos_hasta_marca_p50'] is not None else "-"
+        print(f"Marcas: {est['marcas']}  Duplicados evitados: {est['duplicados_evitados']}  "
+              f"Personas/min (último minuto): {est['personas_por_minuto_ultimo_minuto']:.1f}  "
+              f"Promedio: {est['personas_por_minuto_promedio']:.1f}  Tiempo hasta marca (p50): {p50}")
@@ -1,16 +1,21 @@
-from interfaz.ventana_principal import VentanaPrincipal
-from logica.controlador_principal import ControladorPrincipal
-from conexion.database import crear_tablas_iniciales
+import time
+INICIO = time.perf_counter() # Para medir el tiempo hasta la primera ventana
 
-def main():
+import argparse
+from conexion.database import crear_tablas_iniciales, cerrar_conexiones
+
+# Los módulos pesados (cv2, modelos, matplotlib) se importan dentro de cada
+# modo para que la ventana aparezca lo antes posible.
+
+def iniciar_interfaz(args):
     """
-    Función principal para iniciar la aplicación.
+    Inicia la aplicación de escritorio.
     """
-    # 1. Asegurarse de que la base de datos y las tablas existan.
-    crear_tablas_iniciales()
+    from interfaz.ventana_principal import VentanaPrincipal
+    from logica.controlador_principal import ControladorPrincipal
 
     # 2. Crear el controlador
-    controlador = ControladorPrincipal(None) 
+    controlador = ControladorPrincipal(None, inicio=INICIO, trabajadores=args.trabajadores)
     
     # 3. Crear la vista (la ventana principal) y pasarle el controlador
     app = VentanaPrincipal(controlador)
@@ -21,8 +26,81 @@ def main():
     # 5. Mostrar el panel de bienvenida inicial
     controlador.mostrar_inicio()
     
-    # 6. Iniciar el bucle principal de la aplicación
+    # 6. Con la ventana ya visible, cargar los modelos en segundo plano
+    app.after_idle(controlador.al_mostrar_ventana)
+
+    # 7. Iniciar el bucle principal de la aplicación
     app.mainloop()
+    controlador.cerrar()
+
+def auditar_videos(args):
+    """
+    Audita videos grabados sin interfaz gráfica.
+    """
+    from logica.auditoria import auditar, imprimir_resumen, guardar_informe, PASO_FRAMES
+
+    informe = auditar(args.auditar, paso=args.paso or PASO_FRAMES, procesos=args.procesos)
+    imprimir_resumen(informe)
+    if args.salida:
+        guardar_informe(informe, args.salida)
+        print(f"\nInforme guardado en '{args.salida}'.")
+
+def iniciar_servicio_kiosco(args):
+    """
+    Modo kiosco sin interfaz: marca la asistencia automáticamente.
+    """
+    from logica.reconocimiento import ReconocimientoFacialEPP
+    from logica.servicio_kiosco import ServicioKiosco, FRAMES_CONSECUTIVOS, ENFRIAMIENTO_S
+    from logica.camaras import FUENTES_CAMARA
+
+    reconocimiento = ReconocimientoFacialEPP()
+    reconocimiento.precalentar()
+    servicio = ServicioKiosco(
+        reconocimiento,
+        fuentes=args.fuentes or FUENTES_CAMARA,
+        tipo=args.tipo,
+        frames_consecutivos=args.frames_consecutivos or FRAMES_CONSECUTIVOS,
+        enfriamiento_s=args.enfriamiento if args.enfriamiento is not None else ENFRIAMIENTO_S
+    )
+    servicio.ejecutar()
+    cerrar_conexiones()
+
+def main():
+    """
+    Función principal para iniciar la aplicación.
+    """
+    parser = argparse.ArgumentParser(description="Sistema de Control de Asistencia y EPP")
+    parser.add_argument('--auditar', nargs='+', metavar='RUTA',
+                        help="Audita archivos o carpetas de video sin abrir la interfaz gráfica.")
+    parser.add_argument('--paso', type=int, default=None,
+                        help="Procesar 1 de cada N frames al auditar (por defecto: PASO_FRAMES de logica/auditoria.py).")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos en paralelo al auditar (por defecto: uno por núcleo).")
+    parser.add_argument('--trabajadores', type=int, default=None,
+                        help="Procesos de inferencia de la interfaz; cada uno carga su copia de los modelos (por defecto: NUM_TRABAJADORES de logica/servicio_inferencia.py, un núcleo menos que los del equipo).")
+    parser.add_argument('--salida', metavar='ARCHIVO.json',
+                        help="Guarda el informe de la auditoría en formato JSON.")
+    parser.add_argument('--servicio', action='store_true',
+                        help="Modo kiosco sin interfaz: marca la asistencia automáticamente.")
+    parser.add_argument('--tipo', choices=('entrada', 'salida'), default='entrada',
+                        help="Tipo de registro que marca el modo kiosco (por defecto: entrada).")
+    parser.add_argument('--fuentes', nargs='+', metavar='FUENTE',
+                        help="Fuentes de video del modo kiosco: índices de cámara, URLs, videos o carpetas de imágenes (por defecto: FUENTES_CAMARA de logica/camaras.py).")
+    parser.add_argument('--frames-consecutivos', type=int, default=None,
+                        help="Resultados seguidos con el empleado y su EPP antes de marcar (por defecto: FRAMES_CONSECUTIVOS de logica/servicio_kiosco.py).")
+    parser.add_argument('--enfriamiento', type=float, default=None,
+                        help="Segundos sin volver a marcar al mismo empleado (por defecto: ENFRIAMIENTO_S de logica/servicio_kiosco.py).")
+    args = parser.parse_args()
+
+    # 1. Asegurarse de que la base de datos y las tablas existan.
+    crear_tablas_iniciales()
+
+    if args.auditar:
+        auditar_videos(args)
+    elif args.servicio:
+        iniciar_servicio_kiosco(args)
+    else:
+        iniciar_interfaz(args)
 
 if __name__ == '__main__':
     main()